@@ -0,0 +1,122 @@
+"""
+销售分析
+
+时间序列和菜品 / 分类排行都读取 stats.py 维护的分桶汇总表（stats_hourly、stats_dish_daily），
+按查询范围取出汇总行后用 NumPy 向量化聚合，不再扫描 orders / order_items 原始表。
+"""
+from datetime import datetime, time, timedelta
+
+import numpy as np
+
+# 时间序列粒度
+GRANULARITIES = ('hour', 'day', 'week')
+
+# 排行维度
+GROUP_BYS = ('dish', 'category')
+
+# 单次查询最大天数
+MAX_RANGE_DAYS = 366
+
+TIMESERIES_SQL = """
+    SELECT bucket_hour, order_count, paid_order_count, sales
+    FROM stats_hourly
+    WHERE bucket_hour >= %s AND bucket_hour < %s
+"""
+
+BREAKDOWN_SQL = """
+    SELECT dish_id, category_id, quantity, sales
+    FROM stats_dish_daily
+    WHERE stat_date BETWEEN %s AND %s
+"""
+
+
+def _column(rows, field, dtype=np.float64):
+    return np.fromiter((row[field] or 0 for row in rows), dtype=dtype, count=len(rows))
+
+
+def aggregate_series(rows, start, end, granularity='day'):
+    """把小时汇总行聚合成 [start, end] 范围内按 granularity 分桶、补零的时间序列"""
+    start_dt = datetime.combine(start, time.min)
+    days = (end - start).days + 1
+
+    # 每行相对起始时间的小时偏移
+    hours = np.fromiter(
+        ((row['bucket_hour'] - start_dt) // timedelta(hours=1) for row in rows),
+        dtype=np.int64, count=len(rows)
+    )
+    if granularity == 'hour':
+        size = days * 24
+        index = hours
+        labels = [start_dt + timedelta(hours=i) for i in range(size)]
+    elif granularity == 'day':
+        size = days
+        index = hours // 24
+        labels = [start + timedelta(days=i) for i in range(size)]
+    else:
+        # 按自然周（周一开始）分桶
+        first_monday = start - timedelta(days=start.weekday())
+        index = (hours + start.weekday() * 24) // (24 * 7)
+        size = (end - first_monday).days // 7 + 1
+        labels = [first_monday + timedelta(weeks=i) for i in range(size)]
+
+    order_count = np.bincount(index, weights=_column(rows, 'order_count'), minlength=size)
+    paid_order_count = np.bincount(index, weights=_column(rows, 'paid_order_count'), minlength=size)
+    sales = np.bincount(index, weights=_column(rows, 'sales'), minlength=size)
+
+    return [
+        {
+            "bucket": label.isoformat(),
+            "order_count": int(order_count[i]),
+            "paid_order_count": int(paid_order_count[i]),
+            "sales": round(float(sales[i]), 2),
+        }
+        for i, label in enumerate(labels)
+    ]
+
+
+def aggregate_breakdown(rows, group_by='dish', limit=None):
+    """把按天菜品汇总行聚合成菜品或分类排行，按销售额降序"""
+    if not rows:
+        return []
+    key_field = 'dish_id' if group_by == 'dish' else 'category_id'
+    keys = _column(rows, key_field, dtype=np.int64)
+    ids, index = np.unique(keys, return_inverse=True)
+    quantity = np.bincount(index, weights=_column(rows, 'quantity'))
+    sales = np.bincount(index, weights=_column(rows, 'sales'))
+
+    order = np.argsort(-sales, kind='stable')
+    if limit:
+        order = order[:limit]
+    return [
+        {
+            key_field: int(ids[i]),
+            "quantity": int(quantity[i]),
+            "sales": round(float(sales[i]), 2),
+        }
+        for i in order
+    ]
+
+
+def get_timeseries(cursor, start, end, granularity='day'):
+    """读取 [start, end] 日期范围内的销售时间序列"""
+    cursor.execute(TIMESERIES_SQL, (start, end + timedelta(days=1)))
+    return aggregate_series(cursor.fetchall(), start, end, granularity)
+
+
+def get_breakdown(cursor, start, end, group_by='dish', limit=20):
+    """读取 [start, end] 日期范围内的菜品或分类排行"""
+    cursor.execute(BREAKDOWN_SQL, (start, end))
+    ranking = aggregate_breakdown(cursor.fetchall(), group_by, limit)
+    if not ranking:
+        return ranking
+
+    # 补充名称
+    key_field = 'dish_id' if group_by == 'dish' else 'category_id'
+    table = 'dishes' if group_by == 'dish' else 'categories'
+    ids = [row[key_field] for row in ranking]
+    placeholders = ", ".join(["%s"] * len(ids))
+    cursor.execute(f"SELECT id, name FROM {table} WHERE id IN ({placeholders})", ids)
+    names = {row['id']: row['name'] for row in cursor.fetchall()}
+    for row in ranking:
+        row['name'] = names.get(row[key_field])
+    return ranking
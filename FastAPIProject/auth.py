@@ -0,0 +1,120 @@
+"""
+登录令牌
+
+令牌格式与 JWT（HS256）一致：base64url(header).base64url(payload).base64url(signature)，
+payload 中携带用户ID、角色、签发时间、过期时间和令牌ID（jti）。
+校验只做 HMAC 计算，不访问数据库；校验通过的令牌放入 LRU 缓存，重复请求只需一次字典查找。
+注销的令牌记录在内存吊销列表中，到期后自动清理。
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+# 令牌配置
+AUTH_CONFIG = {
+    # 签名密钥，必须通过环境变量 TOKEN_SECRET 设置（未设置时启动失败），且所有 worker 保持一致
+    'secret': os.environ.get('TOKEN_SECRET'),
+    'expires_in': 7 * 24 * 3600,   # 有效期（秒）
+    'cache_size': 10000,           # 已校验令牌缓存条数
+}
+
+_HEADER = base64.urlsafe_b64encode(
+    json.dumps({"alg": "HS256", "typ": "JWT"}, separators=(",", ":")).encode()
+).rstrip(b"=").decode()
+
+
+class TokenError(Exception):
+    """令牌无效、过期或已注销"""
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+class TokenManager:
+    """签发与校验令牌（线程安全）"""
+
+    def __init__(self, secret, expires_in=7 * 24 * 3600, cache_size=10000):
+        if not secret:
+            raise RuntimeError("未设置令牌签名密钥，请通过环境变量 TOKEN_SECRET 设置")
+        self._secret = secret.encode()
+        self.expires_in = expires_in
+        self.cache_size = cache_size
+        self._cache = OrderedDict()   # token -> payload
+        self._revoked = {}            # jti -> exp
+        self._lock = threading.Lock()
+
+    def _sign(self, signing_input: str) -> str:
+        digest = hmac.new(self._secret, signing_input.encode(), hashlib.sha256).digest()
+        return _b64encode(digest)
+
+    def issue(self, user_id, role):
+        """签发令牌"""
+        now = int(time.time())
+        payload = {
+            "id": user_id,
+            "role": role,
+            "iat": now,
+            "exp": now + self.expires_in,
+            "jti": secrets.token_hex(8),
+        }
+        body = _b64encode(json.dumps(payload, separators=(",", ":")).encode())
+        signing_input = f"{_HEADER}.{body}"
+        return f"{signing_input}.{self._sign(signing_input)}"
+
+    def _decode(self, token):
+        try:
+            header, body, signature = token.split(".")
+        except ValueError:
+            raise TokenError("令牌格式错误")
+        # compare_digest 比较 str 时只接受 ASCII，客户端传入非 ASCII 字符会抛 TypeError，统一按字节比较
+        if not hmac.compare_digest(signature.encode(), self._sign(f"{header}.{body}").encode()):
+            raise TokenError("令牌签名无效")
+        try:
+            return json.loads(_b64decode(body))
+        except Exception:
+            raise TokenError("令牌格式错误")
+
+    def verify(self, token):
+        """校验令牌，返回 payload，失败抛出 TokenError"""
+        now = time.time()
+        with self._lock:
+            payload = self._cache.get(token)
+            if payload is not None:
+                self._cache.move_to_end(token)
+        if payload is None:
+            payload = self._decode(token)
+            with self._lock:
+                self._cache[token] = payload
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        if payload.get("exp", 0) <= now:
+            raise TokenError("登录已过期")
+        if payload.get("jti") in self._revoked:
+            raise TokenError("登录已失效")
+        return payload
+
+    def revoke(self, token):
+        """注销令牌"""
+        payload = self.verify(token)
+        now = time.time()
+        with self._lock:
+            # 顺带清理已过期的吊销记录
+            for jti in [j for j, exp in self._revoked.items() if exp <= now]:
+                del self._revoked[jti]
+            self._revoked[payload["jti"]] = payload["exp"]
+            self._cache.pop(token, None)
+
+
+token_manager = TokenManager(**AUTH_CONFIG)
@@ -0,0 +1,106 @@
+"""
+JSON 序列化与压缩基准测试
+
+用法：
+    python bench/json_bench.py [--orders 100] [--items 3] [--repeat 200]
+
+构造一页订单列表（与 /api/order/list 返回结构相同，字段类型与 PyMySQL DictCursor 一致：
+Decimal 金额、datetime 时间），对比：
+- 序列化：FastAPI 默认路径（jsonable_encoder + json.dumps）与 orjson（responses.dumps）的耗时
+- 响应大小：原始 / gzip / brotli（未安装 brotli 时跳过）的字节数与压缩耗时
+"""
+import argparse
+import datetime
+import json
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+from compression import brotli, compress  # noqa: E402
+from responses import dumps  # noqa: E402
+
+
+def make_page(orders, items):
+    """构造一页订单数据"""
+    now = datetime.datetime(2024, 5, 1, 12, 0, 0)
+    rows = []
+    for i in range(orders):
+        created_at = now - datetime.timedelta(minutes=i * 7)
+        order_items = [
+            {
+                "id": i * items + j,
+                "order_id": i + 1,
+                "dish_id": j + 1,
+                "dish_name": f"招牌菜品{j + 1}",
+                "dish_price": Decimal("28.50") + j,
+                "quantity": j + 1,
+                "subtotal": (Decimal("28.50") + j) * (j + 1),
+                "created_at": created_at,
+            }
+            for j in range(items)
+        ]
+        rows.append({
+            "id": i + 1,
+            "order_no": f"ORD{7190000000000000000 + i}",
+            "user_id": i % 50 + 1,
+            "total_price": sum(item["subtotal"] for item in order_items),
+            "status": i % 5 + 1,
+            "remark": "少辣，不要香菜" if i % 3 == 0 else None,
+            "created_at": created_at,
+            "updated_at": created_at + datetime.timedelta(minutes=3),
+            "user_nickname": f"用户{i % 50 + 1}",
+            "items": order_items,
+        })
+    return {
+        "code": 200,
+        "message": "success",
+        "data": {"list": rows, "total": None, "page": 1, "page_size": orders, "next_cursor": "eyJ2IjpbXX0="},
+    }
+
+
+def default_dumps(content):
+    """FastAPI 默认 JSONResponse 的序列化路径"""
+    return json.dumps(
+        jsonable_encoder(content), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def timeit(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON 序列化与压缩基准测试")
+    parser.add_argument("--orders", type=int, default=100)
+    parser.add_argument("--items", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    page = make_page(args.orders, args.items)
+    print(f"{args.orders} 条订单，每单 {args.items} 个明细，重复 {args.repeat} 次")
+
+    default_ms, default_body = timeit(lambda: default_dumps(page), args.repeat)
+    fast_ms, fast_body = timeit(lambda: dumps(page), args.repeat)
+    assert json.loads(default_body) == json.loads(fast_body), "两种序列化结果不一致"
+    print(f"{'jsonable_encoder + json':24s} {default_ms:8.3f} ms/次")
+    print(f"{'orjson':24s} {fast_ms:8.3f} ms/次  ({default_ms / fast_ms:.1f}x)")
+
+    print(f"{'原始':24s} {len(fast_body):8d} 字节")
+    encodings = ["gzip"] + (["br"] if brotli is not None else [])
+    for encoding in encodings:
+        ms, body = timeit(lambda: compress(fast_body, encoding), args.repeat)
+        print(f"{encoding:24s} {len(body):8d} 字节  ({len(body) / len(fast_body):.1%})  压缩 {ms:.3f} ms/次")
+    if brotli is None:
+        print("未安装 brotli，跳过 br")
+
+
+if __name__ == "__main__":
+    main()
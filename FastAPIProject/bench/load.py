@@ -0,0 +1,370 @@
+"""
+接口压测
+
+用法：
+    python bench/load.py [--base-url http://127.0.0.1:8000] [--vus 50] [--duration 60] [--compare 基线结果.json]
+
+先用 bench/seed.py 生成数据，并让被测服务连接同一个数据库：
+    DB_HOST=127.0.0.1 DB_NAME=order_system_bench TOKEN_SECRET=... uvicorn main:app --workers 4
+
+启动 --vus 个虚拟用户并发执行 test_api.http 中的业务流程，每次按权重随机选择一个场景：
+- browse：菜单、分类、菜品列表、菜品详情、热销菜品
+- order：下单、查看订单详情和我的订单，部分订单随后取消
+- history：我的订单按游标翻页、按状态筛选、用户信息
+- admin：订单列表、修改订单状态、数据概览、销售时间序列、用户列表、管理员列表
+- catalog：新建 / 修改 / 删除分类和菜品（会使菜单缓存失效）
+- account：注册、登录、修改资料、退出
+虚拟用户启动时以 bench_user_xxxxxx 登录（登录耗时计入 POST /api/user/login）。
+图片上传 / 缩略图、订单事件推送（WebSocket / SSE）和创建管理员不在压测范围内。
+
+输出每个接口的请求数、错误数、吞吐和 p50 / p95 / p99 延迟；
+能连接数据库时（DB_HOST 等环境变量与被测服务一致）按 MySQL 的 Questions 计数器计算平均每个请求的查询数，
+计数器是全局的，应使用独立的压测库。
+结果保存为 bench/results/ 下的 JSON，--compare 与之前的结果对比，
+任一接口 p95 变慢或吞吐下降超过 --threshold 时返回非 0。
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import math
+import random
+import subprocess
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# 场景权重
+SCENARIO_WEIGHTS = {
+    "browse": 50,
+    "order": 20,
+    "history": 15,
+    "admin": 10,
+    "catalog": 2,
+    "account": 3,
+}
+
+
+def percentile(sorted_values, p):
+    """最近秩百分位数"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, math.ceil(p / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+class Recorder:
+    """按接口（方法 + 路由模板）记录延迟和错误"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = Counter()
+        self.recording = False
+        self.started = None
+        self.stopped = None
+
+    def start(self):
+        self.recording = True
+        self.started = time.perf_counter()
+
+    def stop(self):
+        self.recording = False
+        self.stopped = time.perf_counter()
+
+    def add(self, route, seconds, ok):
+        if not self.recording:
+            return
+        self.latencies[route].append(seconds)
+        if not ok:
+            self.errors[route] += 1
+
+    def summary(self):
+        elapsed = self.stopped - self.started
+        routes = {}
+        for route in sorted(self.latencies):
+            values = sorted(self.latencies[route])
+            routes[route] = {
+                "count": len(values),
+                "errors": self.errors[route],
+                "rps": round(len(values) / elapsed, 2),
+                "p50_ms": round(percentile(values, 50) * 1000, 2),
+                "p95_ms": round(percentile(values, 95) * 1000, 2),
+                "p99_ms": round(percentile(values, 99) * 1000, 2),
+                "max_ms": round(values[-1] * 1000, 2),
+            }
+        values = sorted(v for route_values in self.latencies.values() for v in route_values)
+        total = {
+            "count": len(values),
+            "errors": sum(self.errors.values()),
+            "rps": round(len(values) / elapsed, 2),
+            "p50_ms": round(percentile(values, 50) * 1000, 2),
+            "p95_ms": round(percentile(values, 95) * 1000, 2),
+            "p99_ms": round(percentile(values, 99) * 1000, 2),
+            "max_ms": round(values[-1] * 1000, 2) if values else 0.0,
+        }
+        return round(elapsed, 2), total, routes
+
+
+class VirtualUser:
+    """一个虚拟用户：登录后循环执行场景"""
+
+    def __init__(self, client, recorder, rng, admin_token, dish_ids, accounts):
+        self.client = client
+        self.recorder = recorder
+        self.rng = rng
+        self.admin_token = admin_token
+        self.dish_ids = dish_ids
+        self.accounts = accounts
+        self.token = None
+        self.user_id = None
+
+    async def call(self, method, route, token=None, params=None, body=None, **path):
+        """发送请求并按路由模板记录耗时，成功时返回响应中的 data"""
+        headers = {"token": token} if token else None
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(
+                method, route.format(**path), params=params, json=body, headers=headers
+            )
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            response, ok = None, False
+        self.recorder.add(f"{method} {route}", time.perf_counter() - start, ok)
+        if not ok:
+            return None
+        return response.json().get("data")
+
+    async def login(self):
+        name = f"bench_user_{self.rng.randint(1, self.accounts):06d}"
+        data = await self.call("POST", "/api/user/login", body={"username": name, "password": "123456"})
+        if data is not None:
+            self.token = data["token"]
+            self.user_id = data["user"]["id"]
+
+    async def browse(self):
+        await self.call("GET", "/api/menu")
+        await self.call("GET", "/api/category/list", params={"status": 1})
+        await self.call("GET", "/api/dish/list", params={"category_id": self.rng.randint(1, 5), "status": 1})
+        await self.call("GET", "/api/dish/{dish_id}", dish_id=self.rng.choice(self.dish_ids))
+        await self.call("GET", "/api/dish/popular")
+
+    async def order(self):
+        dish_ids = self.rng.sample(self.dish_ids, self.rng.randint(1, 4))
+        data = await self.call("POST", "/api/order/create", token=self.token, body={
+            "user_id": self.user_id,
+            "items": [{"dish_id": dish_id, "quantity": self.rng.randint(1, 3)} for dish_id in dish_ids],
+            "remark": "压测订单",
+        })
+        if data is None:
+            return
+        await self.call("GET", "/api/order/{order_id}", token=self.token, order_id=data["order_id"])
+        await self.call("GET", "/api/order/my", token=self.token, params={"page_size": 10})
+        if self.rng.random() < 0.2:
+            await self.call("DELETE", "/api/order/{order_id}", token=self.token, order_id=data["order_id"])
+
+    async def history(self):
+        cursor = ""
+        for _ in range(3):
+            data = await self.call("GET", "/api/order/my", token=self.token,
+                                   params={"page_size": 10, "cursor": cursor})
+            if data is None or not data["next_cursor"]:
+                break
+            cursor = data["next_cursor"]
+        await self.call("GET", "/api/order/my", token=self.token, params={"status": 4, "page_size": 10})
+        await self.call("GET", "/api/user/info", token=self.token)
+
+    async def admin(self):
+        token = self.admin_token
+        data = await self.call("GET", "/api/order/list", token=token, params={"page_size": 10, "cursor": ""})
+        await self.call("GET", "/api/order/list", token=token, params={"status": 2, "page_size": 10, "cursor": ""})
+        if data and data["list"]:
+            order = self.rng.choice(data["list"])
+            if order["status"] in (1, 2, 3):
+                await self.call("PUT", "/api/order/{order_id}/status", token=token,
+                                body={"status": order["status"] + 1}, order_id=order["id"])
+        today = datetime.date.today()
+        await self.call("GET", "/api/statistics/overview", token=token)
+        await self.call("GET", "/api/statistics/timeseries", token=token, params={
+            "start": (today - datetime.timedelta(days=30)).isoformat(),
+            "end": today.isoformat(),
+            "group_by": "dish",
+        })
+        await self.call("GET", "/api/admin/users", token=token, params={"page_size": 20, "cursor": ""})
+        await self.call("GET", "/api/admin/list", token=token)
+
+    async def catalog(self):
+        token = self.admin_token
+        suffix = uuid.uuid4().hex[:8]
+        category = await self.call("POST", "/api/category/create", token=token,
+                                   body={"name": f"压测分类{suffix}", "sort_order": 99})
+        if category is None:
+            return
+        dish = await self.call("POST", "/api/dish/create", token=token, body={
+            "category_id": category["id"], "name": f"压测菜品{suffix}", "price": 18.0, "sort_order": 99,
+        })
+        if dish is not None:
+            await self.call("PUT", "/api/dish/{dish_id}", token=token, body={"price": 19.0}, dish_id=dish["id"])
+            await self.call("DELETE", "/api/dish/{dish_id}", token=token, dish_id=dish["id"])
+        await self.call("PUT", "/api/category/{category_id}", token=token,
+                        body={"sort_order": 98}, category_id=category["id"])
+        await self.call("DELETE", "/api/category/{category_id}", token=token, category_id=category["id"])
+
+    async def account(self):
+        name = f"bench_vu_{uuid.uuid4().hex[:12]}"
+        await self.call("POST", "/api/user/register", body={"username": name, "password": "123456"})
+        data = await self.call("POST", "/api/user/login", body={"username": name, "password": "123456"})
+        if data is None:
+            return
+        await self.call("PUT", "/api/user/update", token=data["token"], body={"nickname": "压测用户"})
+        await self.call("POST", "/api/user/logout", token=data["token"])
+
+    async def run(self, deadline, think_time):
+        await self.login()
+        if self.token is None:
+            return
+        scenarios = list(SCENARIO_WEIGHTS)
+        weights = list(SCENARIO_WEIGHTS.values())
+        while time.perf_counter() < deadline:
+            scenario = self.rng.choices(scenarios, weights)[0]
+            await getattr(self, scenario)()
+            if think_time:
+                await asyncio.sleep(self.rng.uniform(0, think_time * 2))
+
+
+def query_counter():
+    """读取 MySQL 全局 Questions 计数器，连接不上数据库时返回 None"""
+    try:
+        from database import get_db
+        with get_db() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SHOW GLOBAL STATUS LIKE 'Questions'")
+                return int(cursor.fetchone()['Value'])
+    except Exception:
+        return None
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args):
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.vus, max_keepalive_connections=args.vus)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30) as client:
+        response = await client.post("/api/admin/login", json={"username": "admin", "password": "123456"})
+        response.raise_for_status()
+        admin_token = response.json()["data"]["token"]
+        response = await client.get("/api/dish/list", params={"status": 1, "page_size": 100})
+        response.raise_for_status()
+        dish_ids = [dish["id"] for dish in response.json()["data"]["list"]]
+
+        # 查询计数在线程中读取，数据库连接不上时不阻塞事件循环
+        count_queries = await asyncio.to_thread(query_counter) is not None
+
+        deadline = time.perf_counter() + args.warmup + args.duration
+        users = [
+            VirtualUser(client, recorder, random.Random(args.seed + i), admin_token, dish_ids, args.accounts)
+            for i in range(args.vus)
+        ]
+        tasks = [asyncio.create_task(user.run(deadline, args.think)) for user in users]
+
+        await asyncio.sleep(args.warmup)
+        recorder.start()
+        before = await asyncio.to_thread(query_counter) if count_queries else None
+        await asyncio.gather(*tasks)
+        recorder.stop()
+        after = await asyncio.to_thread(query_counter) if count_queries else None
+    questions = after - before if before is not None and after is not None else None
+    return recorder, questions
+
+
+def print_report(elapsed, total, routes, queries_per_request):
+    print(f"{'接口':44s} {'请求':>7s} {'错误':>5s} {'次/秒':>8s} {'p50':>8s} {'p95':>8s} {'p99':>8s}")
+    for route, row in list(routes.items()) + [("合计", total)]:
+        print(f"{route:44s} {row['count']:7d} {row['errors']:5d} {row['rps']:8.1f} "
+              f"{row['p50_ms']:8.1f} {row['p95_ms']:8.1f} {row['p99_ms']:8.1f}")
+    print(f"统计时长 {elapsed}s，延迟单位 ms")
+    if queries_per_request is not None:
+        print(f"平均每个请求 {queries_per_request} 次数据库查询")
+    else:
+        print("未连接数据库，跳过查询数统计")
+
+
+def compare(result, baseline, threshold):
+    """与基线结果对比，返回退化的接口列表"""
+    regressions = []
+    print(f"\n与基线对比（{baseline.get('time')}，{baseline.get('revision')}）：")
+    for route, row in list(result["routes"].items()) + [("合计", result["total"])]:
+        base = baseline["total"] if route == "合计" else baseline["routes"].get(route)
+        if not base or not base["p95_ms"] or not base["rps"]:
+            continue
+        p95_change = row["p95_ms"] / base["p95_ms"] - 1
+        rps_change = row["rps"] / base["rps"] - 1
+        flag = ""
+        if p95_change > threshold or rps_change < -threshold:
+            flag = "  <-- 退化"
+            regressions.append(route)
+        print(f"{route:44s} p95 {base['p95_ms']:8.1f} -> {row['p95_ms']:8.1f} ({p95_change:+.0%})  "
+              f"次/秒 {base['rps']:8.1f} -> {row['rps']:8.1f} ({rps_change:+.0%}){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="接口压测")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--vus", type=int, default=50, help="并发虚拟用户数")
+    parser.add_argument("--duration", type=float, default=60, help="统计时长（秒）")
+    parser.add_argument("--warmup", type=float, default=5, help="预热时长（秒），不计入结果")
+    parser.add_argument("--think", type=float, default=0, help="场景之间平均等待秒数")
+    parser.add_argument("--accounts", type=int, default=100000, help="seed.py 生成的用户数")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--label", default="", help="结果文件名后缀")
+    parser.add_argument("--compare", help="对比的基线结果文件")
+    parser.add_argument("--threshold", type=float, default=0.2, help="允许的 p95 / 吞吐退化比例")
+    args = parser.parse_args()
+
+    recorder, questions = asyncio.run(run(args))
+    elapsed, total, routes = recorder.summary()
+    queries_per_request = round(questions / total["count"], 2) if questions is not None and total["count"] else None
+    print_report(elapsed, total, routes, queries_per_request)
+
+    now = datetime.datetime.now()
+    result = {
+        "time": now.isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "config": {
+            "base_url": args.base_url, "vus": args.vus, "duration": args.duration,
+            "warmup": args.warmup, "think": args.think, "accounts": args.accounts, "seed": args.seed,
+        },
+        "elapsed": elapsed,
+        "queries_per_request": queries_per_request,
+        "total": total,
+        "routes": routes,
+    }
+    RESULTS_DIR.mkdir(exist_ok=True)
+    name = now.strftime("%Y%m%d-%H%M%S") + (f"-{args.label}" if args.label else "")
+    path = RESULTS_DIR / f"{name}.json"
+    path.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"结果已保存到 {path}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        if compare(result, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
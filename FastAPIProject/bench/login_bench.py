@@ -0,0 +1,77 @@
+"""
+登录密码校验基准测试
+
+用法：
+    python bench/login_bench.py [--logins 64] [--concurrency 16]
+
+模拟并发登录的密码校验部分，对比两种方式：
+- inline：在 async 处理函数里直接调用 verify_password（阻塞事件循环）
+- offload：通过 async_verify_password 交给哈希线程池
+输出登录吞吐，以及校验期间事件循环的最大 / 平均延迟（心跳任务每 5ms 醒来一次测得）。
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from passwords import (  # noqa: E402
+    PASSWORD_CONFIG, async_verify_password, hash_password, verify_password
+)
+
+HEARTBEAT_INTERVAL = 0.005
+
+
+async def heartbeat(lags, stop):
+    """记录事件循环每次醒来比预期晚了多少"""
+    while not stop.is_set():
+        expected = time.perf_counter() + HEARTBEAT_INTERVAL
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+        lags.append(max(0.0, time.perf_counter() - expected))
+
+
+async def run(mode, stored, logins, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login():
+        async with semaphore:
+            if mode == "inline":
+                ok, _ = verify_password("123456", stored)
+                await asyncio.sleep(0)
+            else:
+                ok, _ = await async_verify_password("123456", stored)
+            assert ok
+
+    lags = []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(lags, stop))
+    await asyncio.sleep(HEARTBEAT_INTERVAL * 2)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await beat
+    max_lag = max(lags) * 1000 if lags else 0.0
+    avg_lag = sum(lags) / len(lags) * 1000 if lags else 0.0
+    print(f"{mode:8s} {logins} 次登录, {elapsed:.3f}s, {logins / elapsed:7.1f} 次/秒, "
+          f"事件循环延迟 最大 {max_lag:7.1f}ms 平均 {avg_lag:6.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="登录密码校验基准测试")
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    stored = hash_password("123456")
+    print(f"PBKDF2 迭代次数 {PASSWORD_CONFIG['iterations']}, 哈希线程数 {PASSWORD_CONFIG['workers']}")
+    asyncio.run(run("inline", stored, args.logins, args.concurrency))
+    asyncio.run(run("offload", stored, args.logins, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+订单号生成器基准测试与唯一性压力测试
+
+用法：
+    python bench/order_no_bench.py [--count 200000] [--threads 8] [--processes 8] [--hosts 2]
+
+1. 单线程吞吐
+2. 多线程并发生成，检查全部唯一
+3. 多进程并发生成，模拟 --hosts 台主机上的多个 worker：每个进程按 ORDER_HOST_ID 和各主机独立的锁目录
+   自行分配节点号（与线上相同的推导方式），检查节点号互不相同、全部唯一且每个进程内严格递增
+任何检查失败时以非零状态码退出。
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import snowflake  # noqa: E402
+from snowflake import SnowflakeGenerator, parse_id  # noqa: E402
+
+
+def bench_single(count):
+    generator = SnowflakeGenerator(node_id=1)
+    start = time.perf_counter()
+    for _ in range(count):
+        generator.next_id()
+    elapsed = time.perf_counter() - start
+    print(f"单线程: {count} 个, {elapsed:.3f}s, {count / elapsed:,.0f} 个/秒, "
+          f"{elapsed / count * 1e9:.0f} ns/个")
+
+
+def stress_threads(count, threads):
+    generator = SnowflakeGenerator(node_id=2)
+    results = [None] * threads
+
+    def work(index):
+        results[index] = [generator.next_id() for _ in range(count)]
+
+    workers = [threading.Thread(target=work, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    ids = [i for chunk in results for i in chunk]
+    unique = len(set(ids))
+    ordered = all(a < b for chunk in results for a, b in zip(chunk, chunk[1:]))
+    print(f"多线程: {threads} 线程 x {count} 个, {elapsed:.3f}s, "
+          f"{len(ids) / elapsed:,.0f} 个/秒, 重复 {len(ids) - unique} 个, 线程内递增 {ordered}")
+    return unique == len(ids) and ordered
+
+
+def _process_worker(host_id, lock_dir, count, ready, queue):
+    os.environ['ORDER_HOST_ID'] = str(host_id)
+    os.environ['ORDER_NODE_LOCK_DIR'] = lock_dir
+    ids = [snowflake.next_id() for _ in range(count)]
+    queue.put(ids)
+    # 全部进程生成完之前保持存活（持有 worker 序号的锁），模拟同时运行的 worker
+    ready.wait()
+
+
+def stress_processes(count, processes, hosts):
+    queue = multiprocessing.Queue()
+    ready = multiprocessing.Event()
+    lock_root = tempfile.mkdtemp(prefix="order-node-bench-")
+    lock_dirs = []
+    for host_id in range(hosts):
+        lock_dirs.append(os.path.join(lock_root, f"host{host_id}"))
+        os.mkdir(lock_dirs[-1])
+    workers = [
+        multiprocessing.Process(
+            target=_process_worker,
+            args=(i % hosts, lock_dirs[i % hosts], count, ready, queue)
+        )
+        for i in range(processes)
+    ]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    results = [queue.get() for _ in workers]
+    ready.set()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    ids = [i for chunk in results for i in chunk]
+    unique = len(set(ids))
+    ordered = all(a < b for chunk in results for a, b in zip(chunk, chunk[1:]))
+    nodes = [parse_id(chunk[0])[1] for chunk in results]
+    distinct = len(set(nodes)) == len(nodes)
+    print(f"多进程: {hosts} 主机 {processes} 进程 x {count} 个, {elapsed:.3f}s, "
+          f"重复 {len(ids) - unique} 个, 进程内递增 {ordered}, 节点号 {sorted(nodes)}")
+    return unique == len(ids) and ordered and distinct
+
+
+def main():
+    parser = argparse.ArgumentParser(description="订单号生成器基准测试")
+    parser.add_argument("--count", type=int, default=200000, help="每个线程/进程生成的数量")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--hosts", type=int, default=2, help="模拟的主机数（每台主机的 worker 共用一个锁目录）")
+    args = parser.parse_args()
+    if args.processes > args.hosts * (snowflake.MAX_WORKER_ID + 1):
+        parser.error(f"每台主机最多 {snowflake.MAX_WORKER_ID + 1} 个 worker，请增加 --hosts")
+
+    bench_single(args.count)
+    ok = stress_threads(args.count, args.threads)
+    ok = stress_processes(args.count, args.processes, args.hosts) and ok
+    print("通过" if ok else "失败")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+基准测试数据生成
+
+用法：
+    DB_HOST=127.0.0.1 DB_USER=root DB_PASSWORD=... DB_NAME=order_system_bench \\
+        python bench/seed.py [--users 100000] [--orders 1000000] [--items 5] [--reset]
+
+在本地 MySQL 兼容数据库（MySQL / MariaDB 均可，数据库需已创建）中按 database.sql 建表，
+再批量写入基准测试数据：
+- 用户：bench_user_000001 ~ bench_user_N，密码均为 123456
+- 菜品：在初始数据基础上补足 --dishes 个
+- 订单：按时间均匀分布在最近 --days 天，订单ID越大下单时间越晚；每单平均 --items 个明细（默认 5，1M 订单约 5M 明细）
+写入后重建菜品销量（sales.py rebuild）和统计汇总（stats.py rebuild）。
+
+数据库连接使用 database.py 的 DB_CONFIG（可用 DB_HOST 等环境变量覆盖），
+非本机数据库需要加 --yes 确认，避免误写线上库。
+"""
+import argparse
+import datetime
+import random
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import sales  # noqa: E402
+import stats  # noqa: E402
+from database import DB_CONFIG, get_db  # noqa: E402
+from migrate import split_statements  # noqa: E402
+from passwords import hash_password  # noqa: E402
+
+SCHEMA_FILE = Path(__file__).resolve().parent.parent / "database.sql"
+
+LOCAL_HOSTS = ("localhost", "127.0.0.1", "::1")
+
+TABLES = (
+    "order_items", "orders", "dishes", "categories", "users", "admins",
+    "stats_total", "stats_daily", "stats_hourly", "stats_dish_daily", "schema_migrations",
+)
+
+# 订单状态分布：1待支付 2已支付 3配送中 4已完成 5已取消
+STATUS_WEIGHTS = {1: 3, 2: 5, 3: 2, 4: 80, 5: 10}
+
+PASSWORD = "123456"
+
+
+def username(index):
+    """第 index 个基准测试用户的用户名（从 1 开始）"""
+    return f"bench_user_{index:06d}"
+
+
+def create_schema(cursor, reset):
+    """按 database.sql 建表并写入初始数据"""
+    cursor.execute("SHOW TABLES LIKE 'orders'")
+    if cursor.fetchone() is not None:
+        if not reset:
+            raise SystemExit("数据库中已有表，加 --reset 删除后重新生成")
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+        for table in TABLES:
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+
+    for statement in split_statements(SCHEMA_FILE.read_text(encoding="utf-8")):
+        if statement.upper().startswith(("CREATE DATABASE", "USE ")):
+            continue
+        cursor.execute(statement)
+
+
+def insert_batches(cursor, sql, rows, batch_size):
+    """分批写入，PyMySQL 的 executemany 会把 INSERT ... VALUES 合并成多行语句"""
+    for start in range(0, len(rows), batch_size):
+        cursor.executemany(sql, rows[start:start + batch_size])
+
+
+def seed_dishes(cursor, rng, total):
+    """补足菜品数量，返回 [(id, price), ...]"""
+    cursor.execute("SELECT id FROM categories")
+    category_ids = [row['id'] for row in cursor.fetchall()]
+    cursor.execute("SELECT COUNT(*) as count FROM dishes")
+    existing = cursor.fetchone()['count']
+    rows = [
+        (
+            rng.choice(category_ids),
+            f"基准菜品{i}",
+            f"基准测试菜品{i}的描述",
+            Decimal(rng.randrange(500, 12800)) / 100,
+            1 if rng.random() < 0.9 else 0,
+            rng.randrange(1, 50),
+        )
+        for i in range(existing + 1, total + 1)
+    ]
+    cursor.executemany(
+        "INSERT INTO dishes (category_id, name, description, price, status, sort_order) "
+        "VALUES (%s, %s, %s, %s, %s, %s)",
+        rows
+    )
+    cursor.execute("SELECT id, price FROM dishes WHERE status = 1")
+    return [(row['id'], row['price']) for row in cursor.fetchall()]
+
+
+def seed_users(cursor, rng, count, start, span, batch_size):
+    password = hash_password(PASSWORD)
+    rows = [
+        (
+            i,
+            username(i),
+            password,
+            f"用户{i}",
+            f"138{i:08d}",
+            start + datetime.timedelta(seconds=rng.randrange(span)),
+        )
+        for i in range(1, count + 1)
+    ]
+    insert_batches(
+        cursor,
+        "INSERT INTO users (id, username, password, nickname, phone, created_at) "
+        "VALUES (%s, %s, %s, %s, %s, %s)",
+        rows, batch_size
+    )
+
+
+def seed_orders(conn, cursor, rng, args, dishes, start, span):
+    """按批生成订单和明细，每批提交一次"""
+    statuses = list(STATUS_WEIGHTS)
+    weights = list(STATUS_WEIGHTS.values())
+    step = span / args.orders
+    item_count = 0
+    began = time.perf_counter()
+
+    for batch_start in range(1, args.orders + 1, args.batch):
+        batch_end = min(batch_start + args.batch, args.orders + 1)
+        orders, items = [], []
+        for order_id in range(batch_start, batch_end):
+            created_at = start + datetime.timedelta(seconds=int(order_id * step))
+            total = Decimal("0")
+            for dish_id, price in rng.sample(dishes, rng.randint(1, args.items * 2 - 1)):
+                quantity = rng.randint(1, 3)
+                subtotal = price * quantity
+                total += subtotal
+                items.append((order_id, dish_id, f"菜品{dish_id}", price, quantity, subtotal, created_at))
+            orders.append((
+                order_id,
+                f"B{order_id:019d}",
+                rng.randint(1, args.users),
+                total,
+                rng.choices(statuses, weights)[0],
+                created_at,
+                created_at,
+            ))
+        cursor.executemany(
+            "INSERT INTO orders (id, order_no, user_id, total_price, status, created_at, updated_at) "
+            "VALUES (%s, %s, %s, %s, %s, %s, %s)",
+            orders
+        )
+        insert_batches(
+            cursor,
+            "INSERT INTO order_items (order_id, dish_id, dish_name, dish_price, quantity, subtotal, created_at) "
+            "VALUES (%s, %s, %s, %s, %s, %s, %s)",
+            items, args.batch
+        )
+        conn.commit()
+        item_count += len(items)
+        done = batch_end - 1
+        elapsed = time.perf_counter() - began
+        print(f"\r订单 {done}/{args.orders}，明细 {item_count}，{done / elapsed:.0f} 单/秒", end="", flush=True)
+    print()
+    return item_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="基准测试数据生成")
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--orders", type=int, default=1000000)
+    parser.add_argument("--items", type=int, default=5, help="每单平均明细数")
+    parser.add_argument("--dishes", type=int, default=200, help="菜品总数")
+    parser.add_argument("--days", type=int, default=365, help="订单时间跨度（天）")
+    parser.add_argument("--batch", type=int, default=5000, help="每批写入行数")
+    parser.add_argument("--seed", type=int, default=42, help="随机数种子，相同参数生成相同数据")
+    parser.add_argument("--reset", action="store_true", help="删除已有表后重新生成")
+    parser.add_argument("--yes", action="store_true", help="确认写入非本机数据库")
+    args = parser.parse_args()
+
+    if DB_CONFIG['host'] not in LOCAL_HOSTS and not args.yes:
+        print(f"数据库 {DB_CONFIG['host']} 不是本机，确认要写入请加 --yes")
+        sys.exit(1)
+    print(f"目标数据库 {DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}")
+
+    rng = random.Random(args.seed)
+    now = datetime.datetime.now().replace(microsecond=0)
+    start = now - datetime.timedelta(days=args.days)
+    span = args.days * 86400
+    began = time.perf_counter()
+
+    with get_db() as conn:
+        with conn.cursor() as cursor:
+            create_schema(cursor, args.reset)
+            conn.commit()
+            # 批量导入期间跳过唯一性和外键检查（数据由本脚本保证合法）
+            cursor.execute("SET unique_checks = 0, foreign_key_checks = 0")
+            try:
+                dishes = seed_dishes(cursor, rng, args.dishes)
+                conn.commit()
+                seed_users(cursor, rng, args.users, start, span, args.batch)
+                conn.commit()
+                print(f"用户 {args.users}，菜品 {args.dishes}")
+                item_count = seed_orders(conn, cursor, rng, args, dishes, start, span)
+            finally:
+                cursor.execute("SET unique_checks = 1, foreign_key_checks = 1")
+            cursor.execute(f"ANALYZE TABLE {', '.join(TABLES[:6])}")
+            cursor.fetchall()
+
+    print("重建菜品销量和统计汇总...")
+    sales.rebuild()
+    stats.rebuild()
+    print(f"完成：{args.users} 用户，{args.orders} 订单，{item_count} 明细，耗时 {time.perf_counter() - began:.0f}s")
+
+
+if __name__ == "__main__":
+    main()
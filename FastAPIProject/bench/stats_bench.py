@@ -0,0 +1,130 @@
+"""
+销售分析基准测试
+
+用法：
+    python bench/stats_bench.py [--days 30] [--dishes 200] [--repeat 50] [--budget 100]
+    DB_HOST=127.0.0.1 DB_USER=root DB_PASSWORD=... DB_NAME=order_system_bench \\
+        python bench/stats_bench.py --db [--end 2024-05-01]
+
+测量 /api/statistics/timeseries 一次查询一个月（--days）数据的耗时：
+- 默认只测聚合：构造 --days 天的小时汇总行和按天菜品汇总行（字段类型与 PyMySQL 返回一致），
+  测 analytics.aggregate_series（小时 / 天 / 周）和 aggregate_breakdown（菜品 / 分类）
+- --db：对数据库（先用 bench/seed.py 生成数据）执行 analytics.get_timeseries / get_breakdown，包含查询耗时
+
+输出各项的 p50 / p95 / 最大耗时（毫秒），任一项 p95 超过 --budget 毫秒时返回非 0。
+"""
+import argparse
+import datetime
+import random
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import analytics  # noqa: E402
+
+
+def make_rows(start, days, dishes, rng):
+    """构造 days 天的小时汇总行和按天菜品汇总行"""
+    start_dt = datetime.datetime.combine(start, datetime.time.min)
+    hourly = []
+    for i in range(days * 24):
+        order_count = rng.randint(0, 200)
+        paid = rng.randint(0, order_count)
+        hourly.append({
+            "bucket_hour": start_dt + datetime.timedelta(hours=i),
+            "order_count": order_count,
+            "paid_order_count": Decimal(paid),
+            "sales": Decimal(paid * 45) + Decimal("0.50"),
+        })
+    dish_daily = []
+    for _ in range(days):
+        for dish_id in range(1, dishes + 1):
+            quantity = rng.randint(0, 50)
+            dish_daily.append({
+                "dish_id": dish_id,
+                "category_id": dish_id % 12 + 1,
+                "quantity": Decimal(quantity),
+                "sales": Decimal(quantity * 28) + Decimal("0.50"),
+            })
+    return hourly, dish_daily
+
+
+def measure(func, repeat):
+    """执行 repeat 次，返回每次耗时（毫秒，升序）"""
+    timings = []
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - begin) * 1000)
+    return sorted(timings)
+
+
+def percentile(timings, p):
+    return timings[min(len(timings) - 1, int(len(timings) * p))]
+
+
+def cases_in_memory(args, start, end):
+    hourly, dish_daily = make_rows(start, args.days, args.dishes, random.Random(42))
+    print(f"{args.days} 天：小时汇总 {len(hourly)} 行，菜品汇总 {len(dish_daily)} 行")
+    cases = []
+    for granularity in analytics.GRANULARITIES:
+        cases.append((f"aggregate_series {granularity}",
+                      lambda g=granularity: analytics.aggregate_series(hourly, start, end, g)))
+    for group_by in analytics.GROUP_BYS:
+        cases.append((f"aggregate_breakdown {group_by}",
+                      lambda g=group_by: analytics.aggregate_breakdown(dish_daily, g, 20)))
+    return cases
+
+
+def cases_db(args, start, end):
+    from database import get_db
+
+    def run(func, *params):
+        with get_db() as conn:
+            with conn.cursor() as cursor:
+                return func(cursor, *params)
+
+    cases = []
+    for granularity in analytics.GRANULARITIES:
+        cases.append((f"get_timeseries {granularity}",
+                      lambda g=granularity: run(analytics.get_timeseries, start, end, g)))
+    for group_by in analytics.GROUP_BYS:
+        cases.append((f"get_breakdown {group_by}",
+                      lambda g=group_by: run(analytics.get_breakdown, start, end, g, 20)))
+    return cases
+
+
+def main():
+    parser = argparse.ArgumentParser(description="销售分析基准测试")
+    parser.add_argument("--days", type=int, default=30, help="查询范围天数")
+    parser.add_argument("--dishes", type=int, default=200, help="菜品数（仅聚合测试）")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--budget", type=float, default=100, help="p95 耗时上限（毫秒）")
+    parser.add_argument("--db", action="store_true", help="对数据库执行完整查询")
+    parser.add_argument("--end", type=datetime.date.fromisoformat, default=datetime.date.today(),
+                        help="查询截止日期，默认今天")
+    args = parser.parse_args()
+
+    end = args.end
+    start = end - datetime.timedelta(days=args.days - 1)
+    cases = cases_db(args, start, end) if args.db else cases_in_memory(args, start, end)
+
+    failed = False
+    print(f"{'项目':<28}{'p50':>10}{'p95':>10}{'最大':>10}")
+    for name, func in cases:
+        func()   # 预热
+        timings = measure(func, args.repeat)
+        p95 = percentile(timings, 0.95)
+        mark = ""
+        if p95 > args.budget:
+            failed = True
+            mark = f"  超过 {args.budget:g}ms"
+        print(f"{name:<28}{percentile(timings, 0.5):>8.2f}ms{p95:>8.2f}ms{timings[-1]:>8.2f}ms{mark}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
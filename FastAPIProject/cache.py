@@ -0,0 +1,310 @@
+"""
+缓存
+
+支持两种存储后端：
+- memory：进程内 LRU + TTL，单进程部署使用
+- redis：Redis 协议的共享缓存，多 worker / 多主机部署时所有进程共用一份缓存
+
+缓存按命名空间划分（菜单、统计、登录），每个命名空间有一个版本号，版本号写在缓存 key 里。
+失效时只需把版本号加一，所有 worker 下一次读取自然落到新 key 上，旧 key 等待过期即可。
+
+异步接口（async_lookup / async_get / async_set / async_clear）中使用 async_* 方法：
+redis 后端的网络往返放到独立线程池执行，不阻塞事件循环；memory 后端直接调用。
+redis 连接设置了较短的超时，出错后 retry_after 秒内直接按未命中处理，Redis 故障时接口只是退化为不走缓存。
+"""
+import asyncio
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import redis
+except ImportError:  # 仅在使用 redis 后端时需要
+    redis = None
+
+# 缓存后端配置
+CACHE_CONFIG = {
+    'backend': os.environ.get('CACHE_BACKEND', 'memory'),   # memory 或 redis
+    'redis_url': os.environ.get('REDIS_URL', 'redis://localhost:6379/0'),
+    'key_prefix': 'order_system:',
+    'maxsize': 512,   # memory 后端最多缓存的条数，超出后淘汰最久未使用的
+    'socket_timeout': 0.2,           # redis 读写超时（秒）
+    'socket_connect_timeout': 0.2,   # redis 连接超时（秒）
+    'retry_after': 5,                # redis 出错后暂停访问的秒数
+    'workers': 8,                    # redis 访问线程数
+}
+
+# 菜单缓存配置
+MENU_CACHE_CONFIG = {
+    'ttl': 60,        # 缓存有效秒数（销量等字段允许在该时间内略有滞后）
+}
+
+# 统计缓存配置
+STATS_CACHE_CONFIG = {
+    'ttl': 10,
+}
+
+# 登录未知用户名缓存配置
+LOGIN_MISS_CACHE_CONFIG = {
+    'ttl': 30,
+}
+LOGIN_MISS_MAXSIZE = 10000
+
+
+class TTLCache:
+    """带过期时间的LRU缓存（线程安全）"""
+
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        """命中返回缓存值，未命中或已过期返回 None"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def __len__(self):
+        return len(self._data)
+
+
+class CacheUnavailableError(Exception):
+    """缓存后端暂时不可用（出错后的暂停期内）"""
+
+
+class MemoryBackend:
+    """进程内缓存后端"""
+
+    name = 'memory'
+    blocking = False   # 操作是否涉及网络往返
+
+    def __init__(self, maxsize=512):
+        self._cache = TTLCache(maxsize)
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, value, ttl):
+        self._cache.set(key, value, ttl)
+
+    def get_version(self, name):
+        return self._versions.get(name, 0)
+
+    def incr_version(self, name):
+        with self._lock:
+            self._versions[name] = self._versions.get(name, 0) + 1
+            return self._versions[name]
+
+    def info(self):
+        return {"size": len(self._cache), "evictions": self._cache.evictions}
+
+
+class RedisBackend:
+    """Redis 协议缓存后端（Redis / KeyDB / Dragonfly / fakeredis 均可）
+
+    缓存值使用 pickle 序列化，以保留 Decimal、datetime 等类型，Redis 必须是受信任的内网服务。
+    出错后 retry_after 秒内不再访问 Redis，直接抛出 CacheUnavailableError（按未命中处理）。
+    """
+
+    name = 'redis'
+    blocking = True
+
+    def __init__(self, url=None, key_prefix='', client=None, socket_timeout=0.2,
+                 socket_connect_timeout=0.2, retry_after=5):
+        if client is None:
+            if redis is None:
+                raise RuntimeError("使用 redis 缓存后端需要安装 redis 包")
+            client = redis.Redis.from_url(
+                url, socket_timeout=socket_timeout, socket_connect_timeout=socket_connect_timeout
+            )
+        self._client = client
+        self._prefix = key_prefix
+        self.retry_after = retry_after
+        self._down_until = 0.0
+        self.failures = 0
+
+    def _call(self, method, *args, **kwargs):
+        if time.monotonic() < self._down_until:
+            raise CacheUnavailableError("缓存后端暂停访问")
+        try:
+            return getattr(self._client, method)(*args, **kwargs)
+        except Exception:
+            self.failures += 1
+            self._down_until = time.monotonic() + self.retry_after
+            raise
+
+    def get(self, key):
+        raw = self._call('get', self._prefix + key)
+        return None if raw is None else pickle.loads(raw)
+
+    def set(self, key, value, ttl):
+        self._call('set', self._prefix + key, pickle.dumps(value), ex=max(1, int(ttl)))
+
+    def get_version(self, name):
+        raw = self._call('get', f"{self._prefix}version:{name}")
+        return int(raw) if raw is not None else 0
+
+    def incr_version(self, name):
+        return self._call('incr', f"{self._prefix}version:{name}")
+
+    def info(self):
+        return {"failures": self.failures, "available": time.monotonic() >= self._down_until}
+
+
+class NamespacedCache:
+    """按命名空间 + 版本号组织的缓存
+
+    查询前先取 version，写回时带上同一个 version，期间如果发生过失效，
+    结果只会写到旧版本的 key 上，不会污染新版本。
+    后端异常时按未命中处理，不影响接口正常返回。
+    """
+
+    def __init__(self, backend, namespace, ttl=60):
+        self.backend = backend
+        self.namespace = namespace
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._errors = 0
+        self._invalidations = 0
+
+    def _key(self, key, version):
+        return f"{self.namespace}:{version}:{key!r}"
+
+    def _count(self, field):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    @property
+    def version(self):
+        try:
+            return self.backend.get_version(self.namespace)
+        except Exception:
+            self._count('_errors')
+            return None
+
+    def lookup(self, key):
+        """返回 (缓存值, 版本号)，未命中时缓存值为 None；版本号用于之后写回"""
+        version = None
+        try:
+            version = self.backend.get_version(self.namespace)
+            value = self.backend.get(self._key(key, version))
+        except Exception:
+            self._count('_errors')
+            value = None
+        self._count('_hits' if value is not None else '_misses')
+        return value, version
+
+    def get(self, key):
+        """命中返回缓存值，未命中返回 None"""
+        return self.lookup(key)[0]
+
+    def set(self, key, value, version=None):
+        """写入缓存，version 为查询前读取的版本号"""
+        try:
+            if version is None:
+                version = self.backend.get_version(self.namespace)
+            self.backend.set(self._key(key, version), value, self.ttl)
+        except Exception:
+            self._count('_errors')
+
+    def clear(self):
+        """使命名空间下的全部缓存失效"""
+        try:
+            self.backend.incr_version(self.namespace)
+        except Exception:
+            self._count('_errors')
+        self._count('_invalidations')
+
+    async def _offload(self, func, *args):
+        if not self.backend.blocking:
+            return func(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_cache_executor, func, *args)
+
+    async def async_lookup(self, key):
+        """异步 lookup，一次线程切换内读取版本号和缓存值"""
+        return await self._offload(self.lookup, key)
+
+    async def async_get(self, key):
+        return (await self.async_lookup(key))[0]
+
+    async def async_set(self, key, value, version=None):
+        await self._offload(self.set, key, value, version)
+
+    async def async_clear(self):
+        await self._offload(self.clear)
+
+    async def async_version(self):
+        return await self._offload(lambda: self.version)
+
+    def stats(self):
+        """缓存命中指标（本进程）"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "backend": self.backend.name,
+                "ttl": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "errors": self._errors,
+                "invalidations": self._invalidations,
+                **self.backend.info(),
+            }
+
+
+def create_backend(config=CACHE_CONFIG):
+    """按配置创建缓存后端"""
+    if config['backend'] == 'redis':
+        return RedisBackend(
+            config['redis_url'], config['key_prefix'],
+            socket_timeout=config['socket_timeout'],
+            socket_connect_timeout=config['socket_connect_timeout'],
+            retry_after=config['retry_after'],
+        )
+    if config['backend'] == 'memory':
+        return MemoryBackend(config['maxsize'])
+    raise ValueError(f"未知的缓存后端: {config['backend']}")
+
+
+# redis 后端的访问线程池（memory 后端不使用）
+_cache_executor = ThreadPoolExecutor(max_workers=CACHE_CONFIG['workers'], thread_name_prefix='cache')
+
+cache_backend = create_backend()
+
+# 菜单缓存：分类列表、菜品列表、菜品详情
+menu_cache = NamespacedCache(cache_backend, 'menu', **MENU_CACHE_CONFIG)
+
+# 统计缓存：数据概览
+stats_cache = NamespacedCache(cache_backend, 'stats', **STATS_CACHE_CONFIG)
+
+# 登录未知用户名缓存：使用独立后端，避免暴力破解的随机用户名把菜单缓存挤出 LRU。
+# 只在共享后端（redis）时启用：memory 后端每个 worker 各有一份，注册 / 创建管理员只能清空本进程的缓存，
+# 其它 worker 会在 TTL 内继续拒绝刚创建的用户名
+login_miss_cache = NamespacedCache(
+    create_backend({**CACHE_CONFIG, 'maxsize': LOGIN_MISS_MAXSIZE}), 'login_miss', **LOGIN_MISS_CACHE_CONFIG
+) if CACHE_CONFIG['backend'] == 'redis' else None
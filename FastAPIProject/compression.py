@@ -0,0 +1,107 @@
+"""
+响应压缩
+
+响应体超过阈值的 JSON / 文本响应按客户端 Accept-Encoding 压缩：
+优先 brotli（需要安装 brotli 包），其次 gzip。小响应压缩收益不抵 CPU 开销，原样返回。
+只处理一次性发送完毕的响应体；文件等流式响应（图片本身已压缩）原样透传。
+压缩后的 ETag 改为弱 ETag，与未压缩的表示区分，条件请求仍按弱比较命中。
+"""
+import gzip
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # 未安装时只使用 gzip
+    brotli = None
+
+# 压缩配置
+COMPRESSION_CONFIG = {
+    'minimum_size': 1024,     # 响应体小于该字节数时不压缩
+    'gzip_level': 6,
+    'brotli_quality': 4,      # 动态内容使用较低的质量等级，压缩率接近 gzip 9 而速度更快
+}
+
+COMPRESSIBLE_TYPES = ('application/json', 'text/', 'application/javascript', 'image/svg+xml')
+
+
+def choose_encoding(accept_encoding):
+    """按 Accept-Encoding 选择压缩算法，不支持时返回 None"""
+    accepted = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    if brotli is not None and accepted.get('br', 0) > 0:
+        return 'br'
+    if accepted.get('gzip', 0) > 0:
+        return 'gzip'
+    return None
+
+
+def compress(body, encoding, config=COMPRESSION_CONFIG):
+    if encoding == 'br':
+        return brotli.compress(body, quality=config['brotli_quality'])
+    return gzip.compress(body, compresslevel=config['gzip_level'])
+
+
+def is_compressible(content_type):
+    return any(content_type.startswith(t) for t in COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    """gzip / brotli 响应压缩（ASGI 中间件）"""
+
+    def __init__(self, app, **config):
+        self.app = app
+        self.config = {**COMPRESSION_CONFIG, **config}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get('accept-encoding', ''))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+
+        async def send_wrapper(message):
+            nonlocal start_message
+            if message['type'] == 'http.response.start':
+                # 等第一段响应体到达后再决定是否压缩
+                start_message = message
+                return
+            if message['type'] != 'http.response.body' or start_message is None:
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            headers = MutableHeaders(raw=start['headers'])
+            body = message.get('body', b'')
+            if (message.get('more_body', False)
+                    or len(body) < self.config['minimum_size']
+                    or 'content-encoding' in headers
+                    or not is_compressible(headers.get('content-type', ''))):
+                await send(start)
+                await send(message)
+                return
+
+            body = compress(body, encoding, self.config)
+            headers['Content-Encoding'] = encoding
+            headers['Content-Length'] = str(len(body))
+            headers.add_vary_header('Accept-Encoding')
+            etag = headers.get('etag')
+            if etag and not etag.startswith('W/'):
+                headers['ETag'] = 'W/' + etag
+            await send(start)
+            await send({'type': 'http.response.body', 'body': body})
+
+        await self.app(scope, receive, send_wrapper)
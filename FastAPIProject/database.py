@@ -1,38 +1,277 @@
 """
 数据库连接配置
 """
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
 import pymysql
 from pymysql.cursors import DictCursor
-from contextlib import contextmanager
 
-# 数据库配置
+# 数据库配置（可用环境变量覆盖，如基准测试时指向本地数据库）
 DB_CONFIG = {
-    'host': '47.120.2.155',
-    'port': 3306,
-    'user': 'order_system',
-    'password': 'twncLGdLaxAH6WZ5',
-    'database': 'order_system',
+    'host': os.environ.get('DB_HOST', '47.120.2.155'),
+    'port': int(os.environ.get('DB_PORT', 3306)),
+    'user': os.environ.get('DB_USER', 'order_system'),
+    'password': os.environ.get('DB_PASSWORD', 'twncLGdLaxAH6WZ5'),
+    'database': os.environ.get('DB_NAME', 'order_system'),
     'charset': 'utf8mb4'
 }
 
+# 连接池配置
+POOL_CONFIG = {
+    'min_size': 2,           # 最少保留的空闲连接数
+    'max_size': 20,          # 最大连接数（空闲 + 使用中）
+    'max_idle_time': 300,    # 空闲超过该秒数的连接会被回收（保留 min_size 个）
+    'max_lifetime': 3600,    # 连接最长存活秒数，超过后回收重建
+    'acquire_timeout': 10,   # 连接池耗尽时等待连接的最长秒数
+}
+
+
+class PoolTimeoutError(Exception):
+    """等待连接超时"""
+
+
+# 查询钩子：hook(sql, 耗时秒数)，在执行查询的线程中调用（见 metrics.py）
+_query_hooks = []
+
+
+def add_query_hook(hook):
+    """注册查询钩子，每条语句执行完成后调用"""
+    _query_hooks.append(hook)
+
+
+class TimedCursor(DictCursor):
+    """注册了查询钩子时为每条语句计时（executemany 按实际发送的语句计）"""
+
+    def execute(self, query, args=None):
+        if not _query_hooks:
+            return super().execute(query, args)
+        start = time.perf_counter()
+        try:
+            return super().execute(query, args)
+        finally:
+            elapsed = time.perf_counter() - start
+            for hook in _query_hooks:
+                hook(query, elapsed)
+
+
+class ConnectionPool:
+    """线程安全的PyMySQL连接池
+
+    - 空闲连接按后进先出复用，冷连接自然老化后被回收
+    - 取出连接时ping检测，失效连接直接丢弃重建
+    - 连接按存活时间回收，避免被MySQL wait_timeout断开
+    """
+
+    def __init__(self, db_config, min_size=2, max_size=20, max_idle_time=300,
+                 max_lifetime=3600, acquire_timeout=10):
+        self.db_config = db_config
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_idle_time = max_idle_time
+        self.max_lifetime = max_lifetime
+        self.acquire_timeout = acquire_timeout
+
+        self._cond = threading.Condition()
+        # 空闲连接：(conn, created_at, last_used)
+        self._idle = deque()
+        # 使用中连接：id(conn) -> created_at
+        self._in_use = {}
+        # 正在建立中的连接数（已占用名额）
+        self._pending = 0
+
+        # 统计指标
+        self._created = 0
+        self._closed = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        self._timeouts = 0
+        self._ping_failures = 0
+
+    def _connect(self):
+        return pymysql.connect(**self.db_config, cursorclass=TimedCursor)
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        self._closed += 1
+
+    def _size(self):
+        return len(self._idle) + len(self._in_use) + self._pending
+
+    def _evict_locked(self, now):
+        """回收超龄或空闲过久的连接（需持有锁）"""
+        kept = deque()
+        remaining = len(self._idle)
+        # 队头是最久未使用的连接，优先回收
+        for conn, created_at, last_used in self._idle:
+            expired = now - created_at > self.max_lifetime
+            idle_too_long = (now - last_used > self.max_idle_time
+                             and remaining - 1 + len(self._in_use) >= self.min_size)
+            if expired or idle_too_long:
+                self._close(conn)
+                remaining -= 1
+            else:
+                kept.append((conn, created_at, last_used))
+        self._idle = kept
+
+    def acquire(self):
+        """获取连接，池满时阻塞等待，超时抛出 PoolTimeoutError"""
+        start = time.monotonic()
+        deadline = start + self.acquire_timeout
+        waited = False
+
+        while True:
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    self._evict_locked(now)
+                    if self._idle:
+                        conn, created_at, _ = self._idle.pop()
+                        self._in_use[id(conn)] = created_at
+                        break
+                    if self._size() < self.max_size:
+                        conn = None
+                        self._pending += 1
+                        break
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeoutError("获取数据库连接超时")
+                    waited = True
+                    self._cond.wait(remaining)
+
+            if conn is None:
+                # 在锁外建立新连接，避免阻塞其它线程
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._pending -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._pending -= 1
+                    self._created += 1
+                    self._in_use[id(conn)] = time.monotonic()
+                break
+
+            # 复用的连接先ping一下，失效则丢弃后重新获取
+            try:
+                conn.ping(reconnect=False)
+                break
+            except Exception:
+                with self._cond:
+                    self._in_use.pop(id(conn), None)
+                    self._ping_failures += 1
+                    self._close(conn)
+                    self._cond.notify()
+
+        wait_time = time.monotonic() - start
+        with self._cond:
+            self._checkouts += 1
+            if waited:
+                self._waits += 1
+            self._wait_time_total += wait_time
+            self._wait_time_max = max(self._wait_time_max, wait_time)
+        return conn
+
+    def release(self, conn, broken=False):
+        """归还连接，broken为True时直接关闭"""
+        with self._cond:
+            created_at = self._in_use.pop(id(conn), None)
+            now = time.monotonic()
+            if broken or created_at is None or now - created_at > self.max_lifetime:
+                self._close(conn)
+            else:
+                self._idle.append((conn, created_at, now))
+            self._cond.notify()
+
+    def close_all(self):
+        """关闭全部空闲连接"""
+        with self._cond:
+            while self._idle:
+                conn, _, _ = self._idle.pop()
+                self._close(conn)
+
+    def stats(self):
+        """连接池指标"""
+        with self._cond:
+            return {
+                "in_use": len(self._in_use),
+                "idle": len(self._idle),
+                "pending": self._pending,
+                "max_size": self.max_size,
+                "created": self._created,
+                "closed": self._closed,
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "wait_time_total_ms": round(self._wait_time_total * 1000, 3),
+                "wait_time_avg_ms": round(
+                    self._wait_time_total * 1000 / self._checkouts, 3
+                ) if self._checkouts else 0.0,
+                "wait_time_max_ms": round(self._wait_time_max * 1000, 3),
+                "timeouts": self._timeouts,
+                "ping_failures": self._ping_failures,
+            }
+
+
+_pool = ConnectionPool(DB_CONFIG, **POOL_CONFIG)
+
+# 数据库线程池：大小与连接池上限一致，线程数不会超过可用连接数
+_db_executor = ThreadPoolExecutor(
+    max_workers=POOL_CONFIG['max_size'], thread_name_prefix='db'
+)
+
 
 def get_connection():
-    """获取数据库连接"""
-    return pymysql.connect(**DB_CONFIG, cursorclass=DictCursor)
+    """从连接池获取数据库连接（用完需调用 release_connection 归还）"""
+    return _pool.acquire()
+
+
+def release_connection(conn, broken=False):
+    """归还数据库连接"""
+    _pool.release(conn, broken=broken)
+
+
+def get_pool_stats():
+    """获取连接池指标"""
+    return _pool.stats()
+
+
+def close_pool():
+    """关闭数据库线程池和连接池中的空闲连接"""
+    _db_executor.shutdown(wait=True)
+    _pool.close_all()
 
 
 @contextmanager
 def get_db():
     """数据库连接上下文管理器"""
     conn = get_connection()
+    broken = False
     try:
         yield conn
         conn.commit()
     except Exception as e:
-        conn.rollback()
+        try:
+            conn.rollback()
+        except Exception:
+            broken = True
         raise e
     finally:
-        conn.close()
+        release_connection(conn, broken=broken)
 
 
 def execute_query(sql, params=None, fetch_one=False):
@@ -61,3 +300,41 @@ def execute_insert(sql, params=None):
             return cursor.lastrowid
 
 
+def execute_transaction(func, *args, **kwargs):
+    """在同一个事务中执行 func(cursor, *args, **kwargs)，返回其结果"""
+    with get_db() as conn:
+        with conn.cursor() as cursor:
+            return func(cursor, *args, **kwargs)
+
+
+# ==================== 异步接口 ====================
+async def run_in_db(func, *args, **kwargs):
+    """在数据库线程池中执行同步函数，不阻塞事件循环
+
+    带上当前上下文（contextvars），查询钩子可以把查询归到发起的请求。
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        _db_executor, functools.partial(context.run, func, *args, **kwargs)
+    )
+
+
+async def async_execute_query(sql, params=None, fetch_one=False):
+    """异步执行查询"""
+    return await run_in_db(execute_query, sql, params, fetch_one)
+
+
+async def async_execute_update(sql, params=None):
+    """异步执行更新操作"""
+    return await run_in_db(execute_update, sql, params)
+
+
+async def async_execute_insert(sql, params=None):
+    """异步执行插入操作，返回插入ID"""
+    return await run_in_db(execute_insert, sql, params)
+
+
+async def async_execute_transaction(func, *args, **kwargs):
+    """异步在同一个事务中执行 func(cursor, *args, **kwargs)"""
+    return await run_in_db(execute_transaction, func, *args, **kwargs)
@@ -8,24 +8,23 @@ USE order_system;
 CREATE TABLE IF NOT EXISTS users (
     id INT AUTO_INCREMENT PRIMARY KEY,
     username VARCHAR(50) UNIQUE NOT NULL COMMENT '用户名',
-    password VARCHAR(50) NOT NULL COMMENT '密码',
+    password VARCHAR(255) NOT NULL COMMENT '密码哈希',
     nickname VARCHAR(100) COMMENT '昵称',
     phone VARCHAR(20) COMMENT '手机号',
     avatar_url VARCHAR(255) COMMENT '头像URL',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-    INDEX idx_username (username)
+    INDEX idx_created (created_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='用户表';
 
 -- 管理员表
 CREATE TABLE IF NOT EXISTS admins (
     id INT AUTO_INCREMENT PRIMARY KEY,
     username VARCHAR(50) UNIQUE NOT NULL COMMENT '用户名',
-    password VARCHAR(50) NOT NULL COMMENT '密码',
+    password VARCHAR(255) NOT NULL COMMENT '密码哈希',
     real_name VARCHAR(50) COMMENT '真实姓名',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-    INDEX idx_username (username)
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='管理员表';
 
 -- 菜品分类表
@@ -36,7 +35,8 @@ CREATE TABLE IF NOT EXISTS categories (
     status TINYINT DEFAULT 1 COMMENT '状态：1启用 0禁用',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-    INDEX idx_sort (sort_order)
+    INDEX idx_sort (sort_order),
+    INDEX idx_status_sort (status, sort_order)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='菜品分类表';
 
 -- 菜品表
@@ -52,8 +52,8 @@ CREATE TABLE IF NOT EXISTS dishes (
     sales INT DEFAULT 0 COMMENT '销量',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-    INDEX idx_category (category_id),
-    INDEX idx_status (status),
+    INDEX idx_category_status_sort (category_id, status, sort_order, id DESC),
+    INDEX idx_status_sort (status, sort_order, id DESC),
     FOREIGN KEY (category_id) REFERENCES categories(id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='菜品表';
 
@@ -67,9 +67,9 @@ CREATE TABLE IF NOT EXISTS orders (
     remark TEXT COMMENT '备注',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-    INDEX idx_user (user_id),
-    INDEX idx_status (status),
-    INDEX idx_order_no (order_no),
+    INDEX idx_user_created (user_id, created_at),
+    INDEX idx_status_created (status, created_at),
+    INDEX idx_created (created_at),
     FOREIGN KEY (user_id) REFERENCES users(id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='订单表';
 
@@ -89,6 +89,59 @@ CREATE TABLE IF NOT EXISTS order_items (
     FOREIGN KEY (dish_id) REFERENCES dishes(id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='订单明细表';
 
+-- 统计全量汇总表（单行）
+CREATE TABLE IF NOT EXISTS stats_total (
+    id TINYINT PRIMARY KEY,
+    user_count INT NOT NULL DEFAULT 0 COMMENT '用户总数',
+    order_count INT NOT NULL DEFAULT 0 COMMENT '订单总数',
+    total_sales DECIMAL(14, 2) NOT NULL DEFAULT 0 COMMENT '总销售额',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='统计全量汇总表';
+
+-- 统计按天汇总表
+CREATE TABLE IF NOT EXISTS stats_daily (
+    stat_date DATE PRIMARY KEY COMMENT '日期',
+    order_count INT NOT NULL DEFAULT 0 COMMENT '订单数',
+    sales DECIMAL(14, 2) NOT NULL DEFAULT 0 COMMENT '销售额',
+    new_users INT NOT NULL DEFAULT 0 COMMENT '新增用户数',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='统计按天汇总表';
+
+-- 统计按小时汇总表
+CREATE TABLE IF NOT EXISTS stats_hourly (
+    bucket_hour DATETIME PRIMARY KEY COMMENT '小时',
+    order_count INT NOT NULL DEFAULT 0 COMMENT '下单数',
+    paid_order_count INT NOT NULL DEFAULT 0 COMMENT '支付订单数',
+    sales DECIMAL(14, 2) NOT NULL DEFAULT 0 COMMENT '销售额',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='统计按小时汇总表';
+
+-- 统计按天菜品汇总表
+CREATE TABLE IF NOT EXISTS stats_dish_daily (
+    stat_date DATE NOT NULL COMMENT '日期',
+    dish_id INT NOT NULL COMMENT '菜品ID',
+    category_id INT COMMENT '分类ID',
+    quantity INT NOT NULL DEFAULT 0 COMMENT '销量',
+    sales DECIMAL(14, 2) NOT NULL DEFAULT 0 COMMENT '销售额',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (stat_date, dish_id),
+    INDEX idx_category_date (category_id, stat_date)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='统计按天菜品汇总表';
+
+INSERT INTO stats_total (id) VALUES (1);
+
+-- 数据库迁移记录（见 migrate.py），本文件已包含以下迁移的结果
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INT PRIMARY KEY COMMENT '迁移编号',
+    name VARCHAR(100) NOT NULL COMMENT '迁移名称',
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '执行时间'
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='数据库迁移记录表';
+
+INSERT INTO schema_migrations (version, name) VALUES
+(1, 'stats_tables'),
+(2, 'password_hash_length'),
+(3, 'composite_indexes');
+
 -- 插入初始管理员数据
 INSERT INTO admins (username, password, real_name) VALUES 
 ('admin', '123456', '系统管理员'),
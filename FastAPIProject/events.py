@@ -0,0 +1,223 @@
+"""
+订单事件推送
+
+下单、修改订单状态、取消订单时发布事件，客户端通过 WebSocket 或 SSE 订阅，
+收到的是单个订单的变化（增量），不再轮询整页订单列表。
+
+主题：
+- user:{用户ID}：该用户自己的订单
+- admin：全部订单（管理员）
+
+每个连接一个有界队列，客户端消费太慢导致队列写满时清空队列并推送 resync，
+由客户端重新拉取一次列表。
+
+多 worker / 多主机部署时设置 EVENTS_BACKEND=redis，事件经 Redis 发布订阅转发给所有进程，
+否则只有连接在同一进程上的客户端能收到。发布在独立线程中执行，不阻塞事件循环；
+Redis 连接设置了较短的超时，出错后 retry_after 秒内不再访问 Redis，事件只在本进程分发。
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from responses import dumps
+
+try:
+    import redis
+except ImportError:  # 仅在使用 redis 转发时需要
+    redis = None
+
+# 事件推送配置
+EVENTS_CONFIG = {
+    'backend': os.environ.get('EVENTS_BACKEND', 'memory'),   # memory 或 redis
+    'redis_url': os.environ.get('REDIS_URL', 'redis://localhost:6379/0'),
+    'channel': 'order_system:events',
+    'queue_size': 100,     # 每个连接最多积压的事件数
+    'heartbeat': 25,       # 空闲多少秒发送一次心跳
+    'socket_timeout': 0.2,           # redis 发布超时（秒）
+    'socket_connect_timeout': 0.2,   # redis 连接超时（秒）
+    'retry_after': 5,                # redis 出错后暂停转发的秒数
+}
+
+ADMIN_TOPIC = "admin"
+RESYNC_EVENT = {"type": "resync"}
+
+
+class RelayUnavailableError(Exception):
+    """Redis 转发暂停使用"""
+
+
+class Subscription:
+    """一个客户端连接的订阅"""
+
+    def __init__(self, topics, queue_size):
+        self.topics = topics
+        self.queue = asyncio.Queue(maxsize=queue_size)
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # 客户端跟不上，丢弃积压事件，通知客户端全量刷新
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC_EVENT)
+
+    async def get(self, timeout=None):
+        """取下一个事件，超时返回 None"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBroker:
+    """进程内按主题分发事件（在事件循环中调用）"""
+
+    def __init__(self, queue_size=100, relay=None):
+        self.queue_size = queue_size
+        self.relay = relay
+        self._loop = None
+        self._subscriptions = {}   # topic -> set(Subscription)
+        self.published = 0
+        self.relay_errors = 0
+
+    def start(self):
+        """在事件循环中调用，配置了转发时开始监听 Redis"""
+        self._loop = asyncio.get_running_loop()
+        if self.relay is not None:
+            self.relay.start(self, self._loop)
+
+    def close(self):
+        if self.relay is not None:
+            _publish_executor.shutdown(wait=True)
+            self.relay.close()
+
+    def subscribe(self, topics):
+        subscription = Subscription(tuple(topics), self.queue_size)
+        for topic in subscription.topics:
+            self._subscriptions.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        for topic in subscription.topics:
+            subscribers = self._subscriptions.get(topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscriptions[topic]
+
+    def publish(self, topics, event):
+        """发布事件；配置了转发时在发布线程中经 Redis 广播给所有进程（含本进程），不等待发布完成"""
+        self.published += 1
+        if self.relay is not None and self._loop is not None:
+            _publish_executor.submit(self._relay_publish, list(topics), event)
+            return
+        self.dispatch(topics, event)
+
+    def _relay_publish(self, topics, event):
+        """在发布线程中执行，转发失败时交回事件循环在本进程分发"""
+        try:
+            self.relay.publish(topics, event)
+        except Exception:
+            self._loop.call_soon_threadsafe(self._relay_failed, topics, event)
+
+    def _relay_failed(self, topics, event):
+        self.relay_errors += 1
+        self.dispatch(topics, event)
+
+    def dispatch(self, topics, event):
+        """分发给本进程的订阅者，同一连接订阅多个主题时只收到一次"""
+        delivered = set()
+        for topic in topics:
+            for subscription in self._subscriptions.get(topic, ()):
+                if subscription not in delivered:
+                    delivered.add(subscription)
+                    subscription.put(event)
+
+    def stats(self):
+        return {
+            "backend": "redis" if self.relay is not None else "memory",
+            "connections": len({s for subs in self._subscriptions.values() for s in subs}),
+            "topics": len(self._subscriptions),
+            "published": self.published,
+            "relay_errors": self.relay_errors,
+        }
+
+
+class RedisRelay:
+    """经 Redis 发布订阅在进程间转发事件
+
+    监听线程收到消息后通过 call_soon_threadsafe 交回事件循环分发。
+    发布出错后 retry_after 秒内不再访问 Redis，直接抛出 RelayUnavailableError。
+    """
+
+    def __init__(self, url, channel, socket_timeout=0.2, socket_connect_timeout=0.2, retry_after=5):
+        if redis is None:
+            raise RuntimeError("使用 redis 事件转发需要安装 redis 包")
+        self._client = redis.Redis.from_url(
+            url, socket_timeout=socket_timeout, socket_connect_timeout=socket_connect_timeout
+        )
+        # 订阅连接长时间阻塞等待消息，不设读超时
+        self._listen_client = redis.Redis.from_url(url, socket_connect_timeout=socket_connect_timeout)
+        self._channel = channel
+        self._pubsub = None
+        self._closed = False
+        self.retry_after = retry_after
+        self._down_until = 0.0
+
+    def publish(self, topics, event):
+        if time.monotonic() < self._down_until:
+            raise RelayUnavailableError("事件转发暂停访问")
+        try:
+            self._client.publish(self._channel, dumps({"topics": list(topics), "event": event}))
+        except Exception:
+            self._down_until = time.monotonic() + self.retry_after
+            raise
+
+    def start(self, broker, loop):
+        def listen():
+            while not self._closed:
+                try:
+                    self._pubsub = self._listen_client.pubsub(ignore_subscribe_messages=True)
+                    self._pubsub.subscribe(self._channel)
+                    for message in self._pubsub.listen():
+                        data = json.loads(message['data'])
+                        loop.call_soon_threadsafe(broker.dispatch, data['topics'], data['event'])
+                except Exception:
+                    # 连接断开后稍等重连，关闭时直接退出
+                    if not self._closed:
+                        time.sleep(1)
+
+        threading.Thread(target=listen, name='events-relay', daemon=True).start()
+
+    def close(self):
+        self._closed = True
+        if self._pubsub is not None:
+            self._pubsub.close()
+
+
+def create_broker(config=EVENTS_CONFIG):
+    """按配置创建事件分发器"""
+    if config['backend'] == 'redis':
+        relay = RedisRelay(
+            config['redis_url'], config['channel'], config['socket_timeout'],
+            config['socket_connect_timeout'], config['retry_after']
+        )
+        return EventBroker(config['queue_size'], relay)
+    if config['backend'] == 'memory':
+        return EventBroker(config['queue_size'])
+    raise ValueError(f"未知的事件推送后端: {config['backend']}")
+
+
+# 发布线程：只用一个线程，同一进程发布的事件保持顺序
+_publish_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='events')
+
+
+def user_topic(user_id):
+    return f"user:{user_id}"
+
+
+order_events = create_broker()
@@ -0,0 +1,89 @@
+"""
+HTTP 缓存
+
+菜单类接口返回 ETag（响应体的哈希），客户端带 If-None-Match 再次请求时，
+内容未变化直接返回 304，不再传输响应体。序列化后的响应体和 ETag 一起存入菜单缓存，
+缓存命中时既不查库也不重新序列化；缓存有效期内 ETag 不变，过期后重新生成时
+销量等字段有变化 ETag 才会变化。
+
+上传图片和缩略图以内容哈希（旧图片为 UUID）命名，同一地址的内容不会变化，
+返回一年有效期的 immutable 缓存头，客户端在有效期内不再发起请求。
+"""
+import hashlib
+import os
+
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import StaticFiles
+
+from responses import dumps
+
+# 缓存头配置
+HTTP_CACHE_CONFIG = {
+    'menu': 'no-cache',                                  # 菜单：可缓存，每次使用前用 ETag 校验
+    'immutable': 'public, max-age=31536000, immutable',  # 上传图片：内容不变，缓存一年
+    'revalidate': 'no-cache',                            # 缩略图退化为原图时：每次使用前校验
+}
+
+
+class CachedResponse:
+    """序列化后的 JSON 响应体及其 ETag"""
+
+    def __init__(self, body, etag):
+        self.body = body
+        self.etag = etag
+
+
+def make_etag(body):
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def render(result):
+    """序列化接口返回值并计算 ETag"""
+    body = dumps(result)
+    return CachedResponse(body, make_etag(body))
+
+
+def _strip_weak(tag):
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match 是否命中（弱比较，支持多个值和 *）"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return _strip_weak(etag) in [_strip_weak(tag) for tag in if_none_match.split(",")]
+
+
+def conditional_response(request, cached, cache_control=None):
+    """ETag 命中返回 304，否则返回完整响应体"""
+    headers = {
+        "ETag": cached.etag,
+        "Cache-Control": cache_control or HTTP_CACHE_CONFIG['menu'],
+    }
+    if etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(cached.body, media_type="application/json", headers=headers)
+
+
+async def file_response(request, path, cache_control=None):
+    """返回文件，带 ETag / Last-Modified 和缓存头，ETag 命中返回 304"""
+    stat_result = await run_in_threadpool(os.stat, path)
+    headers = {"Cache-Control": cache_control or HTTP_CACHE_CONFIG['immutable']}
+    response = FileResponse(path, stat_result=stat_result, headers=headers)
+    if etag_matches(request.headers.get("if-none-match"), response.headers["etag"]):
+        headers["ETag"] = response.headers["etag"]
+        return Response(status_code=304, headers=headers)
+    return response
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """静态文件目录，所有响应（含 304）附加 immutable 缓存头"""
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = HTTP_CACHE_CONFIG['immutable']
+        return response
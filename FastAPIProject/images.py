@@ -0,0 +1,294 @@
+"""
+图片上传与缩略图
+
+上传请求体不经过 Starlette 的表单解析（它会先把整个文件缓存到临时文件，之后才能检查大小），
+而是直接读取 request.stream()，用 python-multipart 按到达的块边解析边处理：
+边累计大小（超限立即中止，不再读取剩余请求体）、边计算 SHA-256、边写入临时文件，
+内存占用与图片大小无关。文件以内容哈希命名，相同图片只保存一份。
+磁盘写入在线程池中执行，不阻塞事件循环。
+
+缩略图按固定宽度档位（thumb / small / medium）生成，支持原格式或 WebP，
+生成后缓存在磁盘上，同一档位只生成一次。上传时预先生成 WebP 缩略图，
+旧图片或其他格式在第一次请求时生成。Pillow 为必需依赖；未安装时直接返回原图（调用方不能按 immutable 缓存）。
+"""
+import hashlib
+import os
+import re
+import uuid
+
+from multipart.exceptions import FormParserError
+from multipart.multipart import MultipartParser, parse_options_header
+from starlette.concurrency import run_in_threadpool
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # requirements.txt 中为必需依赖，缺失时缩略图退化为原图
+    Image = None
+
+# 图片上传配置
+IMAGE_CONFIG = {
+    'max_size': 5 * 1024 * 1024,   # 最大 5MB
+    'chunk_size': 64 * 1024,       # 每次读取 64KB
+}
+
+# 允许的图片类型及对应扩展名
+CONTENT_TYPE_EXTENSIONS = {
+    'image/jpeg': '.jpg',
+    'image/jpg': '.jpg',
+    'image/png': '.png',
+    'image/gif': '.gif',
+    'image/webp': '.webp',
+}
+
+
+# 缩略图配置
+IMAGE_VARIANT_CONFIG = {
+    'sizes': {'thumb': 160, 'small': 320, 'medium': 640},   # 档位 -> 最大宽度（像素）
+    'quality': 80,                                          # JPEG / WebP 质量
+    'eager_sizes': ('thumb', 'small'),                      # 上传时预先生成的 WebP 档位
+}
+
+# 缩略图扩展名 -> Pillow 输出格式
+VARIANT_FORMATS = {
+    '.jpg': 'JPEG',
+    '.png': 'PNG',
+    '.webp': 'WEBP',
+}
+
+# 图片文件名只允许字母数字（哈希 / UUID），防止路径穿越
+_FILENAME_RE = re.compile(r'^[0-9A-Za-z_-]+(\.[a-z]+)$')
+
+
+class ImageTooLargeError(Exception):
+    """图片超过大小限制"""
+
+
+class UploadError(Exception):
+    """上传请求格式错误、缺少文件或图片类型不支持"""
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _commit(temp_path, final_path):
+    """临时文件落盘为最终文件，已存在相同内容时丢弃临时文件"""
+    if os.path.exists(final_path):
+        _remove(temp_path)
+        return False
+    os.replace(temp_path, final_path)
+    return True
+
+
+class _ImageWriter:
+    """边写入临时文件边累计大小、计算内容哈希，完成后以哈希命名"""
+
+    def __init__(self, directory, ext, max_size):
+        self.directory = directory
+        self.ext = ext
+        self.max_size = max_size
+        self.temp_path = directory / f".upload-{uuid.uuid4().hex}.tmp"
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.out = None
+
+    async def open(self):
+        self.out = await run_in_threadpool(open, self.temp_path, 'wb')
+
+    async def write(self, chunk):
+        self.size += len(chunk)
+        if self.size > self.max_size:
+            raise ImageTooLargeError()
+        self.digest.update(chunk)
+        await run_in_threadpool(self.out.write, chunk)
+
+    async def commit(self):
+        """关闭并落盘，返回 (文件名, 是否新文件)"""
+        await run_in_threadpool(self.out.close)
+        filename = f"{self.digest.hexdigest()}{self.ext}"
+        created = await run_in_threadpool(_commit, self.temp_path, self.directory / filename)
+        return filename, created
+
+    async def abort(self):
+        if self.out is not None:
+            await run_in_threadpool(self.out.close)
+            await run_in_threadpool(_remove, self.temp_path)
+
+
+class _FormFileReader:
+    """multipart 解析回调：只收集指定字段的文件内容，其余字段忽略
+
+    python-multipart 的回调是同步的，这里只把事件记下来，由 save_upload 在每块请求体解析后异步处理。
+    """
+
+    def __init__(self, field):
+        self.field = field.encode()
+        self.events = []           # ('begin', content_type) / ('data', bytes) / ('end', None)
+        self._headers = {}
+        self._header_field = b''
+        self._header_value = b''
+        self._in_file = False
+
+    def callbacks(self):
+        return {
+            'on_part_begin': self.on_part_begin,
+            'on_header_field': self.on_header_field,
+            'on_header_value': self.on_header_value,
+            'on_header_end': self.on_header_end,
+            'on_headers_finished': self.on_headers_finished,
+            'on_part_data': self.on_part_data,
+            'on_part_end': self.on_part_end,
+        }
+
+    def on_part_begin(self):
+        self._headers = {}
+
+    def on_header_field(self, data, start, end):
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data, start, end):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b''
+        self._header_value = b''
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b'content-disposition', b''))
+        self._in_file = options.get(b'name') == self.field and b'filename' in options
+        if self._in_file:
+            self.events.append(('begin', self._headers.get(b'content-type', b'').decode('latin-1')))
+
+    def on_part_data(self, data, start, end):
+        if self._in_file:
+            self.events.append(('data', bytes(data[start:end])))
+
+    def on_part_end(self):
+        if self._in_file:
+            self.events.append(('end', None))
+            self._in_file = False
+
+
+async def save_upload(request, field, directory, max_size=None):
+    """从 multipart/form-data 请求体中流式保存字段 field 的图片，返回 (文件名, 是否新文件)
+
+    请求格式错误（Content-Length 无效、multipart 无法解析）、图片类型不支持或请求中没有该文件时抛出 UploadError，
+    超过 max_size（或 Content-Length 明显超限）时抛出 ImageTooLargeError。
+    """
+    max_size = max_size or IMAGE_CONFIG['max_size']
+    try:
+        content_length = int(request.headers.get('content-length') or 0)
+    except ValueError:
+        raise UploadError("请求格式错误，Content-Length 无效")
+    # 请求体明显超限时直接拒绝（预留表单字段的开销）
+    if content_length > max_size + IMAGE_CONFIG['chunk_size']:
+        raise ImageTooLargeError()
+    content_type, options = parse_options_header(request.headers.get('content-type', ''))
+    if content_type != b'multipart/form-data' or not options.get(b'boundary'):
+        raise UploadError("请求格式错误，需要 multipart/form-data")
+
+    reader = _FormFileReader(field)
+    parser = MultipartParser(options[b'boundary'], reader.callbacks())
+    writer = None
+    try:
+        async for chunk in request.stream():
+            try:
+                parser.write(chunk)
+            except FormParserError:
+                raise UploadError("请求格式错误，multipart 解析失败")
+            for event, value in reader.events:
+                if event == 'begin':
+                    if value not in CONTENT_TYPE_EXTENSIONS:
+                        raise UploadError("只支持图片格式：JPG、PNG、GIF、WEBP")
+                    writer = _ImageWriter(directory, CONTENT_TYPE_EXTENSIONS[value], max_size)
+                    await writer.open()
+                elif event == 'data':
+                    await writer.write(value)
+                else:
+                    # 文件部分已读完，其余表单字段不再读取
+                    result = await writer.commit()
+                    writer = None
+                    return result
+            reader.events.clear()
+    except BaseException:
+        if writer is not None:
+            await writer.abort()
+        raise
+    if writer is not None:
+        await writer.abort()
+    raise UploadError("缺少上传文件")
+
+
+def find_source(directory, stem):
+    """按文件名（不含扩展名）查找原图"""
+    for ext in dict.fromkeys(CONTENT_TYPE_EXTENSIONS.values()):
+        path = directory / f"{stem}{ext}"
+        if path.is_file():
+            return path
+    return None
+
+
+def render_variant(source, target, width, fmt):
+    """把原图缩放到指定宽度以内并写入 target（同步，在线程池中调用）"""
+    with Image.open(source) as img:
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((width, width * 4))
+        if fmt == 'JPEG' and img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        elif fmt in ('WEBP', 'PNG') and img.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+            img = img.convert('RGBA')
+        target.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = target.with_name(f".{target.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            img.save(temp_path, fmt, quality=IMAGE_VARIANT_CONFIG['quality'])
+            os.replace(temp_path, target)
+        except BaseException:
+            _remove(temp_path)
+            raise
+
+
+async def get_variant(source_dir, cache_dir, size, filename):
+    """返回缩略图文件路径，不存在时生成
+
+    size 或 filename 不合法时抛出 ValueError，原图不存在时返回 None；
+    未安装 Pillow 时返回原图路径。
+    """
+    width = IMAGE_VARIANT_CONFIG['sizes'].get(size)
+    match = _FILENAME_RE.match(filename)
+    if width is None or match is None or match.group(1) not in VARIANT_FORMATS:
+        raise ValueError(filename)
+
+    target = cache_dir / size / filename
+    if await run_in_threadpool(target.is_file):
+        return target
+
+    source = await run_in_threadpool(find_source, source_dir, filename[:-len(match.group(1))])
+    if source is None or Image is None:
+        return source
+    await run_in_threadpool(render_variant, source, target, width, VARIANT_FORMATS[match.group(1)])
+    return target
+
+
+async def create_variants(source_dir, cache_dir, filename):
+    """上传后预先生成常用档位的 WebP 缩略图，失败不影响上传结果"""
+    if Image is None:
+        return
+    webp_name = os.path.splitext(filename)[0] + '.webp'
+    for size in IMAGE_VARIANT_CONFIG['eager_sizes']:
+        try:
+            await get_variant(source_dir, cache_dir, size, webp_name)
+        except Exception:
+            pass
+
+
+def variant_url(image_url, size, ext='.webp'):
+    """本站上传图片的缩略图地址，外部图片地址原样返回"""
+    prefix = '/uploads/dishes/'
+    if not image_url or not image_url.startswith(prefix):
+        return image_url
+    stem = os.path.splitext(image_url[len(prefix):])[0]
+    return f"/api/image/dish/{size}/{stem}{ext}"
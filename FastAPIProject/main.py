@@ -1,24 +1,57 @@
 """
 微信点餐小程序 - FastAPI后端
 """
-from fastapi import FastAPI, HTTPException, Header, File, UploadFile
+from fastapi import FastAPI, HTTPException, Header, Query, Request, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from typing import Optional, List
-import time
+from datetime import date, datetime
+import asyncio
 import hashlib
-import os
-import uuid
+import json
+import base64
+import hmac
 from pathlib import Path
 from models import *
-from database import execute_query, execute_insert, execute_update
+from cache import menu_cache, stats_cache, login_miss_cache
+from http_cache import (
+    CachedResponse, ImmutableStaticFiles, HTTP_CACHE_CONFIG,
+    render, conditional_response, file_response
+)
+from responses import FastJSONResponse, dumps
+from compression import CompressionMiddleware
+from events import order_events, user_topic, ADMIN_TOPIC, EVENTS_CONFIG
+import stats
+from stats import stats_buffer
+import analytics
+import queries
+import snowflake
+from auth import token_manager, TokenError
+from passwords import async_hash_password, async_verify_password
+from images import (
+    save_upload, ImageTooLargeError, UploadError,
+    IMAGE_VARIANT_CONFIG, get_variant, create_variants, variant_url
+)
+from ranking import dish_ranking, WINDOWS as RANKING_WINDOWS
+from sales import sales_buffer, sold_deltas
+from pricing import dish_index, price_items, PricingError
+import metrics
+from database import (
+    async_execute_query, async_execute_insert, async_execute_update,
+    async_execute_transaction, get_db, run_in_db, get_pool_stats, close_pool, add_query_hook
+)
 
 # 创建上传目录
 UPLOAD_DIR = Path(__file__).parent / "uploads"
 DISH_IMAGE_DIR = UPLOAD_DIR / "dishes"
 DISH_IMAGE_DIR.mkdir(parents=True, exist_ok=True)
+# 缩略图磁盘缓存目录
+DISH_VARIANT_DIR = UPLOAD_DIR / "variants" / "dishes"
 
-app = FastAPI(title="微信点餐小程序API", version="1.0.0")
+# 列表接口每页最多返回的条数
+MAX_PAGE_SIZE = 100
+
+app = FastAPI(title="微信点餐小程序API", version="1.0.0", default_response_class=FastJSONResponse)
 
 # 配置CORS
 app.add_middleware(
@@ -29,23 +62,317 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 挂载静态文件目录
-app.mount("/uploads", StaticFiles(directory=str(UPLOAD_DIR)), name="uploads")
+# 响应压缩（超过阈值的 JSON 按 Accept-Encoding 使用 brotli / gzip）
+app.add_middleware(CompressionMiddleware)
+
+# 运行指标（最外层，耗时包含压缩；GET /metrics 导出）
+app.add_middleware(metrics.MetricsMiddleware)
+add_query_hook(metrics.observe_query)
+metrics.registry.add_stats("db_pool", get_pool_stats)
+metrics.registry.add_stats("cache", menu_cache.stats, {"cache": "menu"})
+metrics.registry.add_stats("cache", stats_cache.stats, {"cache": "stats"})
+if login_miss_cache is not None:
+    metrics.registry.add_stats("cache", login_miss_cache.stats, {"cache": "login_miss"})
+metrics.registry.add_stats("order_events", order_events.stats)
+metrics.registry.add_stats("sales_buffer", sales_buffer.stats)
+metrics.registry.add_stats("stats_buffer", stats_buffer.stats)
+metrics.registry.add_stats("dish_index", dish_index.stats)
+
+# 挂载静态文件目录（文件名不变则内容不变，使用 immutable 缓存头）
+app.mount("/uploads", ImmutableStaticFiles(directory=str(UPLOAD_DIR)), name="uploads")
+
+
+async def warm_menu():
+    """预先生成菜单，数据库未就绪时跳过，首次请求时再生成"""
+    try:
+        await load_menu()
+    except Exception:
+        pass
+
+
+@app.on_event("startup")
+async def startup():
+    """分配订单号节点号，启动订单事件推送、销量和统计汇总写回，后台预先生成菜单（不阻塞启动）"""
+    snowflake.get_generator()
+    order_events.start()
+    sales_buffer.start()
+    stats_buffer.start()
+    app.state.warm_menu_task = asyncio.create_task(warm_menu())
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """写回缓冲的菜品销量和统计汇总，关闭事件转发和数据库连接池"""
+    try:
+        await sales_buffer.stop()
+    except Exception:
+        pass
+    try:
+        await stats_buffer.stop()
+    except Exception:
+        pass
+    order_events.close()
+    close_pool()
 
 
 # ==================== 工具函数 ====================
 def generate_order_no():
-    """生成订单号"""
-    return f"ORD{int(time.time() * 1000)}"
+    """生成订单号（Snowflake：时间戳 + 节点号 + 序号，多进程多主机不重复）"""
+    return f"ORD{snowflake.next_id()}"
 
 
 def verify_token(token: str) -> dict:
-    """验证用户token（简化版，实际应该用JWT）"""
-    # 这里简化处理，实际项目应该使用JWT
+    """验证登录令牌，返回 {"id", "role"}（只做签名计算，不查数据库）"""
     if not token:
         raise HTTPException(status_code=401, detail="未登录")
-    # token格式: user_id或admin_id
-    return {"id": int(token.split("_")[1]) if "_" in token else int(token)}
+    try:
+        payload = token_manager.verify(token)
+    except TokenError as e:
+        raise HTTPException(status_code=401, detail=str(e))
+    return {"id": payload["id"], "role": payload["role"]}
+
+
+def verify_admin(token: str) -> dict:
+    """验证管理员令牌"""
+    user_data = verify_token(token)
+    if user_data["role"] != "admin":
+        raise HTTPException(status_code=403, detail="需要管理员权限")
+    return user_data
+
+
+def verify_user(token: str) -> dict:
+    """验证普通用户令牌（用户相关接口按令牌中的 id 查询 users 表，不接受管理员令牌）"""
+    user_data = verify_token(token)
+    if user_data["role"] != "user":
+        raise HTTPException(status_code=403, detail="需要用户登录")
+    return user_data
+
+
+def check_order_owner(order, user_data):
+    """订单只能由下单用户或管理员查看、操作"""
+    if user_data["role"] != "admin" and order["user_id"] != user_data["id"]:
+        raise HTTPException(status_code=403, detail="无权访问该订单")
+
+
+def save_order(order_no, user_id, total_price, remark, items):
+    """在同一个事务中写入订单、订单明细，返回订单ID（菜品销量、统计汇总由 sales_buffer / stats_buffer 批量写回）
+
+    items 为服务端计价后的订单明细（见 pricing.price_items）。
+    """
+    with get_db() as conn:
+        with conn.cursor() as cursor:
+            sql = """
+                INSERT INTO orders (order_no, user_id, total_price, status, remark) 
+                VALUES (%s, %s, %s, %s, %s)
+            """
+            cursor.execute(sql, (order_no, user_id, total_price, 1, remark))
+            order_id = cursor.lastrowid
+
+            # 订单明细：executemany 会合并成一条多行 INSERT
+            sql = """
+                INSERT INTO order_items (order_id, dish_id, dish_name, dish_price, quantity, subtotal) 
+                VALUES (%s, %s, %s, %s, %s, %s)
+            """
+            cursor.executemany(sql, [
+                (order_id, item['dish_id'], item['dish_name'],
+                 item['dish_price'], item['quantity'], item['subtotal'])
+                for item in items
+            ])
+    return order_id
+
+
+async def price_order(items):
+    """按服务端菜品数据计价：先查内存索引，未命中的菜品一次批量查询"""
+    version = await menu_cache.async_version()
+    dishes, missing = dish_index.lookup({item.dish_id for item in items}, version)
+    if missing:
+        dishes.update(await async_execute_transaction(dish_index.load, missing, version))
+    return price_items([(item.dish_id, item.quantity) for item in items], dishes)
+
+
+def publish_order_event(event):
+    """推送订单事件：下单用户和管理员各收到一份"""
+    order_events.publish([user_topic(event['user_id']), ADMIN_TOPIC], event)
+
+
+def order_topics(user_data):
+    """订阅的主题：管理员订阅全部订单，普通用户只订阅自己的订单"""
+    if user_data['role'] == 'admin':
+        return [ADMIN_TOPIC]
+    return [user_topic(user_data['id'])]
+
+
+def insert_user(cursor, username, password, nickname, phone):
+    """在事务中创建用户，返回用户ID（统计汇总由 stats_buffer 批量写回）"""
+    sql = "INSERT INTO users (username, password, nickname, phone) VALUES (%s, %s, %s, %s)"
+    cursor.execute(sql, (username, password, nickname, phone))
+    return cursor.lastrowid
+
+
+def change_order_status(cursor, user_data, order_id, status, allowed_statuses=None):
+    """在事务中修改订单状态，返回修改前的订单和统计汇总增量（提交后加入 stats_buffer）
+
+    user_data 为操作者，订单加锁后校验是否属于该用户（管理员不限）。
+    """
+    cursor.execute("SELECT * FROM orders WHERE id = %s FOR UPDATE", (order_id,))
+    order = cursor.fetchone()
+    if not order:
+        raise HTTPException(status_code=404, detail="订单不存在")
+    check_order_owner(order, user_data)
+    if allowed_statuses is not None and order['status'] not in allowed_statuses:
+        raise HTTPException(status_code=400, detail="订单状态不允许取消" if status == 5 else "订单状态不允许修改")
+    cursor.execute("UPDATE orders SET status = %s WHERE id = %s", (status, order_id))
+    return order, stats.status_change_deltas(cursor, order, status)
+
+
+async def attach_order_items(orders):
+    """一次查询批量加载订单明细，挂到每个订单的 items 字段"""
+    if not orders:
+        return orders
+    order_ids = [order['id'] for order in orders]
+    sql, params = queries.order_items(order_ids)
+    items = await async_execute_query(sql, params)
+
+    items_by_order = {order_id: [] for order_id in order_ids}
+    for item in items:
+        items_by_order[item['order_id']].append(item)
+    for order in orders:
+        order['items'] = items_by_order[order['id']]
+    return orders
+
+
+def encode_cursor(*values):
+    """把排序键编码成不透明的分页游标"""
+    values = [v if v is None or isinstance(v, (int, float)) else str(v) for v in values]
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """解析分页游标，返回排序键列表"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except Exception:
+        raise HTTPException(status_code=400, detail="无效的分页游标")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="无效的分页游标")
+    return values
+
+
+def need_total(cursor, with_total):
+    """是否统计总数：未指定时页码分页统计，游标分页不统计"""
+    if with_total is None:
+        return cursor is None
+    return with_total
+
+
+def cut_page(rows, page_size, key):
+    """rows 多查一条用于判断是否还有下一页，返回 (当前页数据, next_cursor)"""
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    return rows, encode_cursor(*key(rows[-1]))
+
+
+def attach_thumbnails(dishes):
+    """为菜品补充缩略图地址（列表卡片使用 small 档位的 WebP）"""
+    for dish in dishes:
+        dish['thumb_url'] = variant_url(dish.get('image_url'), 'small')
+    return dishes
+
+
+def query_menu(cursor):
+    """在同一事务中读取启用的分类和在售菜品，保证两者一致"""
+    cursor.execute(queries.MENU_CATEGORIES_SQL)
+    categories = cursor.fetchall()
+    cursor.execute(queries.MENU_DISHES_SQL)
+    dishes = cursor.fetchall()
+    return categories, dishes
+
+
+async def load_menu():
+    """完整菜单（分类嵌套菜品），按菜单缓存版本预先序列化，内容哈希作为菜单版本号
+
+    只有分类 / 菜品的展示字段参与哈希，下单改变销量不会改变版本号；
+    缓存失效后在下一次请求时重新生成（内容未变时版本号不变）。
+    """
+    cache_key = ("menu",)
+    cached, cache_version = await menu_cache.async_lookup(cache_key)
+    if cached is not None:
+        return cached
+    
+    categories, dishes = await async_execute_transaction(query_menu)
+    attach_thumbnails(dishes)
+    by_category = {}
+    for category in categories:
+        category['dishes'] = []
+        by_category[category['id']] = category
+    for dish in dishes:
+        if dish['category_id'] in by_category:
+            by_category[dish['category_id']]['dishes'].append(dish)
+    
+    version = hashlib.blake2b(dumps(categories), digest_size=8).hexdigest()
+    result = {
+        "code": 200,
+        "message": "success",
+        "data": {"version": version, "categories": categories}
+    }
+    cached = CachedResponse(dumps(result), f'"{version}"')
+    await menu_cache.async_set(cache_key, cached, cache_version)
+    return cached
+
+
+ranking_lock = asyncio.Lock()
+ranking_tasks = set()
+
+
+async def reload_ranking():
+    """从数据库重新加载热销排行，同一时间只有一次加载，其余请求等待同一次结果"""
+    async with ranking_lock:
+        if dish_ranking.needs_reload:
+            await async_execute_transaction(dish_ranking.reload, sales_buffer.pending)
+
+
+async def ensure_ranking():
+    """热销排行首次使用或菜品变更后等待重新加载；到达对账间隔时在后台对账，本次仍用内存数据"""
+    if dish_ranking.is_stale:
+        await reload_ranking()
+    elif dish_ranking.needs_reload and not ranking_lock.locked():
+        task = asyncio.create_task(reload_ranking())
+        ranking_tasks.add(task)
+        task.add_done_callback(ranking_tasks.discard)
+
+
+async def sync_ranking_status(order, status):
+    """订单取消（或从取消恢复）时同步热销排行的按天销量，order 为修改前的订单"""
+    was_cancelled = order['status'] == 5
+    if was_cancelled == (status == 5):
+        return
+    rows = await async_execute_query(queries.ORDER_DISH_QUANTITIES_SQL, (order['id'],))
+    dish_ranking.record_cancel(
+        [(row['dish_id'], int(row['quantity'])) for row in rows],
+        order['created_at'].date(),
+        1 if was_cancelled else -1
+    )
+
+
+async def check_password(table, account, password):
+    """校验账号密码；旧的明文密码或低迭代次数哈希校验通过后写回新哈希"""
+    if not account:
+        return False
+    ok, needs_rehash = await async_verify_password(password, account['password'])
+    if needs_rehash:
+        password_hash = await async_hash_password(password)
+        sql = f"UPDATE {table} SET password = %s WHERE id = %s"
+        await async_execute_update(sql, (password_hash, account['id']))
+    return ok
+
+
+async def find_accounts(username):
+    """一次查询同时查找同名的管理员和普通用户，返回 {role: account}"""
+    rows = await async_execute_query(queries.ACCOUNTS_SQL, (username, username))
+    return {row.pop('role'): row for row in rows}
 
 
 # ==================== 用户相关接口 ====================
@@ -55,15 +382,21 @@ async def user_register(data: UserRegister):
     try:
         # 检查用户名是否已存在
         sql = "SELECT id FROM users WHERE username = %s"
-        existing_user = execute_query(sql, (data.username,), fetch_one=True)
+        existing_user = await async_execute_query(sql, (data.username,), fetch_one=True)
         
         if existing_user:
             raise HTTPException(status_code=400, detail="用户名已存在")
         
         # 创建新用户
         nickname = data.nickname or data.username
-        sql = "INSERT INTO users (username, password, nickname, phone) VALUES (%s, %s, %s, %s)"
-        user_id = execute_insert(sql, (data.username, data.password, nickname, data.phone))
+        password_hash = await async_hash_password(data.password)
+        user_id = await async_execute_transaction(
+            insert_user, data.username, password_hash, nickname, data.phone
+        )
+        stats_buffer.add(stats.new_user_deltas())
+        await stats_cache.async_clear()
+        if login_miss_cache is not None:
+            await login_miss_cache.async_clear()
         
         # 返回用户信息
         user = {
@@ -77,7 +410,7 @@ async def user_register(data: UserRegister):
             "code": 200,
             "message": "注册成功",
             "data": {
-                "token": f"user_{user_id}",
+                "token": token_manager.issue(user_id, "user"),
                 "user": user
             }
         }
@@ -91,40 +424,47 @@ async def user_register(data: UserRegister):
 async def user_login(data: UserLogin):
     """用户登录（自动识别管理员）"""
     try:
-        # 先检查是否是管理员
-        sql = "SELECT * FROM admins WHERE username = %s AND password = %s"
-        admin = execute_query(sql, (data.username, data.password), fetch_one=True)
+        # 近期查过不存在的用户名直接拒绝，不访问数据库（仅共享缓存后端）
+        if login_miss_cache is not None and await login_miss_cache.async_get(data.username):
+            raise HTTPException(status_code=401, detail="用户名或密码错误")
+        
+        accounts = await find_accounts(data.username)
+        if not accounts:
+            if login_miss_cache is not None:
+                await login_miss_cache.async_set(data.username, True)
+            raise HTTPException(status_code=401, detail="用户名或密码错误")
         
-        if admin:
+        # 先检查是否是管理员
+        admin = accounts.get('admin')
+        if await check_password("admins", admin, data.password):
             # 管理员登录
             return {
                 "code": 200,
                 "message": "管理员登录成功",
                 "data": {
-                    "token": f"admin_{admin['id']}",
+                    "token": token_manager.issue(admin['id'], "admin"),
                     "user": {
                         "id": admin['id'],
                         "username": admin['username'],
-                        "nickname": admin.get('real_name') or admin['username'],
+                        "nickname": admin['nickname'] or admin['username'],
                         "role": "admin"  # 标记为管理员
                     }
                 }
             }
         
-        # 查询普通用户
-        sql = "SELECT * FROM users WHERE username = %s AND password = %s"
-        user = execute_query(sql, (data.username, data.password), fetch_one=True)
-        
-        if not user:
+        # 普通用户
+        user = accounts.get('user')
+        if not await check_password("users", user, data.password):
             raise HTTPException(status_code=401, detail="用户名或密码错误")
         
         # 普通用户登录
+        user.pop('password')
         user['role'] = 'user'  # 标记为普通用户
         return {
             "code": 200,
             "message": "登录成功",
             "data": {
-                "token": f"user_{user['id']}",
+                "token": token_manager.issue(user['id'], "user"),
                 "user": user
             }
         }
@@ -134,18 +474,34 @@ async def user_login(data: UserLogin):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/user/logout", summary="退出登录")
+async def user_logout(token: str = Header(None)):
+    """退出登录，注销当前令牌"""
+    try:
+        verify_token(token)
+        token_manager.revoke(token)
+        return {"code": 200, "message": "已退出登录"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/api/user/info", summary="获取用户信息")
 async def get_user_info(token: str = Header(None)):
     """获取当前用户信息"""
     try:
-        user_data = verify_token(token)
+        user_data = verify_user(token)
         sql = "SELECT * FROM users WHERE id = %s"
-        user = execute_query(sql, (user_data['id'],), fetch_one=True)
+        user = await async_execute_query(sql, (user_data['id'],), fetch_one=True)
         
         if not user:
             raise HTTPException(status_code=404, detail="用户不存在")
         
+        user.pop('password')
         return {"code": 200, "message": "success", "data": user}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -153,37 +509,44 @@ async def get_user_info(token: str = Header(None)):
 @app.get("/api/admin/users", summary="用户列表（管理员）")
 async def get_user_list(
     token: str = Header(None),
-    page: int = 1,
-    page_size: int = 10
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    with_total: Optional[bool] = None
 ):
-    """获取用户列表（管理员）"""
+    """获取用户列表（管理员）
+
+    传入 cursor 时使用游标分页（首页传空字符串），按 (created_at, id) 定位，不再使用 OFFSET；
+    with_total 控制是否统计总数，游标分页默认不统计。
+    """
     try:
-        verify_token(token)
-        offset = (page - 1) * page_size
+        verify_admin(token)
         
-        sql = """
-            SELECT id, username, nickname, phone, created_at 
-            FROM users 
-            ORDER BY created_at DESC
-            LIMIT %s OFFSET %s
-        """
-        users = execute_query(sql, (page_size, offset))
+        after = decode_cursor(cursor, 2) if cursor else None
+        offset = 0 if cursor is not None else (page - 1) * page_size
+        sql, params, count_sql, count_params = queries.user_page(after, page_size + 1, offset)
+        users = await async_execute_query(sql, params)
+        users, next_cursor = cut_page(users, page_size, lambda u: (u['created_at'], u['id']))
         
         # 获取总数
-        count_sql = "SELECT COUNT(*) as total FROM users"
-        total_result = execute_query(count_sql, fetch_one=True)
-        total = total_result['total'] if total_result else 0
+        total = None
+        if need_total(cursor, with_total):
+            total_result = await async_execute_query(count_sql, count_params, fetch_one=True)
+            total = total_result['total'] if total_result else 0
         
-        return {
+        return FastJSONResponse({
             "code": 200,
             "message": "success",
             "data": {
                 "list": users,
                 "total": total,
                 "page": page,
-                "page_size": page_size
+                "page_size": page_size,
+                "next_cursor": next_cursor
             }
-        }
+        })
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -192,7 +555,7 @@ async def get_user_list(
 async def update_user(data: UserUpdate, token: str = Header(None)):
     """更新用户信息"""
     try:
-        user_data = verify_token(token)
+        user_data = verify_user(token)
         
         update_fields = []
         params = []
@@ -212,9 +575,11 @@ async def update_user(data: UserUpdate, token: str = Header(None)):
         
         params.append(user_data['id'])
         sql = f"UPDATE users SET {', '.join(update_fields)} WHERE id = %s"
-        execute_update(sql, params)
+        await async_execute_update(sql, params)
         
         return {"code": 200, "message": "更新成功"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -224,17 +589,18 @@ async def update_user(data: UserUpdate, token: str = Header(None)):
 async def admin_login(data: AdminLogin):
     """管理员登录"""
     try:
-        sql = "SELECT * FROM admins WHERE username = %s AND password = %s"
-        admin = execute_query(sql, (data.username, data.password), fetch_one=True)
+        sql = "SELECT * FROM admins WHERE username = %s"
+        admin = await async_execute_query(sql, (data.username,), fetch_one=True)
         
-        if not admin:
+        if not await check_password("admins", admin, data.password):
             raise HTTPException(status_code=401, detail="用户名或密码错误")
         
+        admin.pop('password')
         return {
             "code": 200,
             "message": "登录成功",
             "data": {
-                "token": f"admin_{admin['id']}",
+                "token": token_manager.issue(admin['id'], "admin"),
                 "admin": admin
             }
         }
@@ -248,12 +614,17 @@ async def admin_login(data: AdminLogin):
 async def create_admin(data: AdminCreate, token: str = Header(None)):
     """创建管理员（需要管理员权限）"""
     try:
-        verify_token(token)
+        verify_admin(token)
         
+        password_hash = await async_hash_password(data.password)
         sql = "INSERT INTO admins (username, password, real_name) VALUES (%s, %s, %s)"
-        admin_id = execute_insert(sql, (data.username, data.password, data.real_name))
+        admin_id = await async_execute_insert(sql, (data.username, password_hash, data.real_name))
+        if login_miss_cache is not None:
+            await login_miss_cache.async_clear()
         
         return {"code": 200, "message": "创建成功", "data": {"id": admin_id}}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -262,29 +633,37 @@ async def create_admin(data: AdminCreate, token: str = Header(None)):
 async def get_admin_list(token: str = Header(None)):
     """获取管理员列表"""
     try:
-        verify_token(token)
+        verify_admin(token)
         
         sql = "SELECT id, username, real_name, created_at FROM admins ORDER BY id DESC"
-        admins = execute_query(sql)
+        admins = await async_execute_query(sql)
         
         return {"code": 200, "message": "success", "data": admins}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 # ==================== 分类相关接口 ====================
 @app.get("/api/category/list", summary="分类列表")
-async def get_category_list(status: Optional[int] = None):
-    """获取分类列表"""
+async def get_category_list(request: Request, status: Optional[int] = None):
+    """获取分类列表（支持 If-None-Match 条件请求）"""
     try:
-        if status is not None:
-            sql = "SELECT * FROM categories WHERE status = %s ORDER BY sort_order"
-            categories = execute_query(sql, (status,))
-        else:
-            sql = "SELECT * FROM categories ORDER BY sort_order"
-            categories = execute_query(sql)
-        
-        return {"code": 200, "message": "success", "data": categories}
+        cache_key = ("category_list", status)
+        cached, cache_version = await menu_cache.async_lookup(cache_key)
+        if cached is not None:
+            return conditional_response(request, cached)
+        
+        sql, params = queries.category_list(status)
+        categories = await async_execute_query(sql, params)
+        
+        result = {"code": 200, "message": "success", "data": categories}
+        cached = render(result)
+        await menu_cache.async_set(cache_key, cached, cache_version)
+        return conditional_response(request, cached)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -293,12 +672,15 @@ async def get_category_list(status: Optional[int] = None):
 async def create_category(data: CategoryCreate, token: str = Header(None)):
     """创建分类（管理员）"""
     try:
-        verify_token(token)
+        verify_admin(token)
         
         sql = "INSERT INTO categories (name, sort_order) VALUES (%s, %s)"
-        category_id = execute_insert(sql, (data.name, data.sort_order))
+        category_id = await async_execute_insert(sql, (data.name, data.sort_order))
+        await menu_cache.async_clear()
         
         return {"code": 200, "message": "创建成功", "data": {"id": category_id}}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -307,7 +689,7 @@ async def create_category(data: CategoryCreate, token: str = Header(None)):
 async def update_category(category_id: int, data: CategoryUpdate, token: str = Header(None)):
     """更新分类（管理员）"""
     try:
-        verify_token(token)
+        verify_admin(token)
         
         update_fields = []
         params = []
@@ -327,9 +709,12 @@ async def update_category(category_id: int, data: CategoryUpdate, token: str = H
         
         params.append(category_id)
         sql = f"UPDATE categories SET {', '.join(update_fields)} WHERE id = %s"
-        execute_update(sql, params)
+        await async_execute_update(sql, params)
+        await menu_cache.async_clear()
         
         return {"code": 200, "message": "更新成功"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -338,49 +723,60 @@ async def update_category(category_id: int, data: CategoryUpdate, token: str = H
 async def delete_category(category_id: int, token: str = Header(None)):
     """删除分类（管理员）"""
     try:
-        verify_token(token)
+        verify_admin(token)
         
         sql = "DELETE FROM categories WHERE id = %s"
-        execute_update(sql, (category_id,))
+        await async_execute_update(sql, (category_id,))
+        await menu_cache.async_clear()
         
         return {"code": 200, "message": "删除成功"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 # ==================== 文件上传接口 ====================
-@app.post("/api/upload/dish-image", summary="上传菜品图片")
-async def upload_dish_image(file: UploadFile = File(...)):
-    """上传菜品图片"""
-    try:
-        # 验证文件类型
-        allowed_types = ['image/jpeg', 'image/jpg', 'image/png', 'image/gif', 'image/webp']
-        if file.content_type not in allowed_types:
-            raise HTTPException(status_code=400, detail="只支持图片格式：JPG、PNG、GIF、WEBP")
-        
-        # 验证文件大小（5MB）
-        contents = await file.read()
-        if len(contents) > 5 * 1024 * 1024:
+@app.post(
+    "/api/upload/dish-image",
+    summary="上传菜品图片",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"multipart/form-data": {"schema": {
+                "type": "object",
+                "properties": {"file": {"type": "string", "format": "binary"}},
+                "required": ["file"],
+            }}},
+        }
+    },
+)
+async def upload_dish_image(request: Request):
+    """上传菜品图片（表单字段 file；边接收边解析写入，超过5MB立即中止，相同图片只保存一份）"""
+    try:
+        # 按到达的块解析请求体：校验 Content-Length、类型和大小（5MB）、计算内容哈希并写盘
+        try:
+            filename, _ = await save_upload(request, "file", DISH_IMAGE_DIR)
+        except ImageTooLargeError:
             raise HTTPException(status_code=400, detail="图片大小不能超过5MB")
+        except UploadError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
-        # 生成唯一文件名
-        file_ext = os.path.splitext(file.filename)[1] or '.jpg'
-        unique_filename = f"{uuid.uuid4().hex}{file_ext}"
-        file_path = DISH_IMAGE_DIR / unique_filename
-        
-        # 保存文件
-        with open(file_path, 'wb') as f:
-            f.write(contents)
+        # 预先生成常用档位的 WebP 缩略图
+        await create_variants(DISH_IMAGE_DIR, DISH_VARIANT_DIR, filename)
         
         # 返回图片URL
-        image_url = f"/uploads/dishes/{unique_filename}"
+        image_url = f"/uploads/dishes/{filename}"
         
         return {
             "code": 200,
             "message": "上传成功",
             "data": {
                 "url": image_url,
-                "filename": unique_filename
+                "filename": filename,
+                "thumbnails": {
+                    size: variant_url(image_url, size) for size in IMAGE_VARIANT_CONFIG['sizes']
+                }
             }
         }
     except HTTPException:
@@ -389,76 +785,148 @@ async def upload_dish_image(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=f"上传失败: {str(e)}")
 
 
+@app.get("/api/image/dish/{size}/{filename}", summary="菜品图片缩略图")
+async def get_dish_image(request: Request, size: str, filename: str):
+    """获取菜品图片缩略图
+
+    size: thumb（160px）/ small（320px）/ medium（640px）
+    filename: 原图文件名，扩展名决定输出格式（.webp / .jpg / .png），首次请求时生成并缓存
+    """
+    try:
+        path = await get_variant(DISH_IMAGE_DIR, DISH_VARIANT_DIR, size, filename)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="图片尺寸或格式不支持")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    if path is None:
+        raise HTTPException(status_code=404, detail="图片不存在")
+    if DISH_VARIANT_DIR not in path.parents:
+        # 未安装 Pillow 时返回的是原图，安装后同一地址会变成缩略图，不能按 immutable 缓存
+        return await file_response(request, path, HTTP_CACHE_CONFIG['revalidate'])
+    return await file_response(request, path)
+
+
+# ==================== 菜单接口 ====================
+@app.get("/api/menu", summary="菜单")
+async def get_menu(request: Request, version: Optional[str] = None):
+    """获取完整菜单：启用的分类及其在售菜品，均按 sort_order 排序
+
+    version 与当前菜单版本一致时只返回 unchanged，客户端继续使用本地数据；
+    也支持 If-None-Match 条件请求（ETag 即菜单版本）。
+    """
+    try:
+        cached = await load_menu()
+        if version and f'"{version}"' == cached.etag:
+            return {"code": 200, "message": "菜单未变化", "data": {"version": version, "unchanged": True}}
+        return conditional_response(request, cached)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # ==================== 菜品相关接口 ====================
 @app.get("/api/dish/list", summary="菜品列表")
 async def get_dish_list(
+    request: Request,
     category_id: Optional[int] = None,
     status: Optional[int] = None,
-    page: int = 1,
-    page_size: int = 20
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    with_total: Optional[bool] = None
 ):
-    """获取菜品列表"""
+    """获取菜品列表
+
+    传入 cursor 时使用游标分页（首页传空字符串），按 (sort_order, id) 定位；
+    with_total 控制是否统计总数，游标分页默认不统计。
+    支持 If-None-Match 条件请求。
+    """
     try:
-        offset = (page - 1) * page_size
-        
-        where_clauses = []
-        params = []
-        
-        if category_id:
-            where_clauses.append("d.category_id = %s")
-            params.append(category_id)
-        if status is not None:
-            where_clauses.append("d.status = %s")
-            params.append(status)
-        
-        where_sql = f"WHERE {' AND '.join(where_clauses)}" if where_clauses else ""
-        
-        sql = f"""
-            SELECT d.*, c.name as category_name 
-            FROM dishes d 
-            LEFT JOIN categories c ON d.category_id = c.id 
-            {where_sql}
-            ORDER BY d.sort_order, d.id DESC
-            LIMIT %s OFFSET %s
-        """
-        params.extend([page_size, offset])
-        dishes = execute_query(sql, params)
+        cache_key = ("dish_list", category_id, status, page, page_size, cursor, with_total)
+        cached, cache_version = await menu_cache.async_lookup(cache_key)
+        if cached is not None:
+            return conditional_response(request, cached)
+        
+        after = decode_cursor(cursor, 2) if cursor else None
+        offset = 0 if cursor is not None else (page - 1) * page_size
+        sql, params, count_sql, count_params = queries.dish_page(
+            category_id, status, after, page_size + 1, offset
+        )
+        dishes = await async_execute_query(sql, params)
+        dishes, next_cursor = cut_page(dishes, page_size, lambda d: (d['sort_order'], d['id']))
+        attach_thumbnails(dishes)
         
         # 获取总数
-        count_sql = f"SELECT COUNT(*) as total FROM dishes d {where_sql}"
-        total_result = execute_query(count_sql, params[:-2], fetch_one=True)
-        total = total_result['total'] if total_result else 0
+        total = None
+        if need_total(cursor, with_total):
+            total_result = await async_execute_query(count_sql, count_params, fetch_one=True)
+            total = total_result['total'] if total_result else 0
         
-        return {
+        result = {
             "code": 200,
             "message": "success",
             "data": {
                 "list": dishes,
                 "total": total,
                 "page": page,
-                "page_size": page_size
+                "page_size": page_size,
+                "next_cursor": next_cursor
             }
         }
+        cached = render(result)
+        await menu_cache.async_set(cache_key, cached, cache_version)
+        return conditional_response(request, cached)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/dish/popular", summary="热销菜品")
+async def get_popular_dishes(
+    window: str = "all",
+    category_id: Optional[int] = None,
+    limit: int = 10
+):
+    """获取热销菜品排行
+
+    window: all（累计）/ today（今日）/ 7d（近7天）
+    """
+    try:
+        if window not in RANKING_WINDOWS:
+            raise HTTPException(status_code=400, detail="window 只支持 all、today、7d")
+        
+        await ensure_ranking()
+        dishes = dish_ranking.top(min(max(limit, 1), 50), window, category_id)
+        
+        return {"code": 200, "message": "success", "data": dishes}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/dish/{dish_id}", summary="菜品详情")
-async def get_dish_detail(dish_id: int):
-    """获取菜品详情"""
+async def get_dish_detail(request: Request, dish_id: int):
+    """获取菜品详情（支持 If-None-Match 条件请求）"""
     try:
-        sql = """
-            SELECT d.*, c.name as category_name 
-            FROM dishes d 
-            LEFT JOIN categories c ON d.category_id = c.id 
-            WHERE d.id = %s
-        """
-        dish = execute_query(sql, (dish_id,), fetch_one=True)
+        cache_key = ("dish_detail", dish_id)
+        cached, cache_version = await menu_cache.async_lookup(cache_key)
+        if cached is not None:
+            return conditional_response(request, cached)
+        
+        dish = await async_execute_query(queries.DISH_DETAIL_SQL, (dish_id,), fetch_one=True)
         
         if not dish:
             raise HTTPException(status_code=404, detail="菜品不存在")
+        attach_thumbnails([dish])
         
-        return {"code": 200, "message": "success", "data": dish}
+        result = {"code": 200, "message": "success", "data": dish}
+        cached = render(result)
+        await menu_cache.async_set(cache_key, cached, cache_version)
+        return conditional_response(request, cached)
     except HTTPException:
         raise
     except Exception as e:
@@ -469,18 +937,22 @@ async def get_dish_detail(dish_id: int):
 async def create_dish(data: DishCreate, token: str = Header(None)):
     """创建菜品（管理员）"""
     try:
-        verify_token(token)
+        verify_admin(token)
         
         sql = """
             INSERT INTO dishes (category_id, name, description, price, image_url, sort_order) 
             VALUES (%s, %s, %s, %s, %s, %s)
         """
-        dish_id = execute_insert(sql, (
+        dish_id = await async_execute_insert(sql, (
             data.category_id, data.name, data.description,
             data.price, data.image_url, data.sort_order
         ))
+        await menu_cache.async_clear()
+        dish_ranking.mark_stale()
         
         return {"code": 200, "message": "创建成功", "data": {"id": dish_id}}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -489,7 +961,7 @@ async def create_dish(data: DishCreate, token: str = Header(None)):
 async def update_dish(dish_id: int, data: DishUpdate, token: str = Header(None)):
     """更新菜品（管理员）"""
     try:
-        verify_token(token)
+        verify_admin(token)
         
         update_fields = []
         params = []
@@ -521,9 +993,14 @@ async def update_dish(dish_id: int, data: DishUpdate, token: str = Header(None))
         
         params.append(dish_id)
         sql = f"UPDATE dishes SET {', '.join(update_fields)} WHERE id = %s"
-        execute_update(sql, params)
+        await async_execute_update(sql, params)
+        await menu_cache.async_clear()
+        dish_ranking.mark_stale()
+        dish_index.invalidate(dish_id)
         
         return {"code": 200, "message": "更新成功"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -532,12 +1009,17 @@ async def update_dish(dish_id: int, data: DishUpdate, token: str = Header(None))
 async def delete_dish(dish_id: int, token: str = Header(None)):
     """删除菜品（管理员）"""
     try:
-        verify_token(token)
+        verify_admin(token)
         
         sql = "DELETE FROM dishes WHERE id = %s"
-        execute_update(sql, (dish_id,))
+        await async_execute_update(sql, (dish_id,))
+        await menu_cache.async_clear()
+        dish_ranking.mark_stale()
+        dish_index.invalidate(dish_id)
         
         return {"code": 200, "message": "删除成功"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -545,44 +1027,48 @@ async def delete_dish(dish_id: int, token: str = Header(None)):
 # ==================== 订单相关接口 ====================
 @app.post("/api/order/create", summary="创建订单")
 async def create_order(data: OrderCreate, token: str = Header(None)):
-    """创建订单"""
+    """创建订单（下单用户以令牌为准，菜品名称、单价和总价以服务端数据为准）"""
     try:
-        user_data = verify_token(token)
+        user_data = verify_user(token)
+        user_id = user_data['id']
         
-        # 计算总价
-        total_price = sum(item.dish_price * item.quantity for item in data.items)
+        # 按服务端价格计价
+        try:
+            items, total_price = await price_order(data.items)
+        except PricingError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
         # 生成订单号
         order_no = generate_order_no()
         
-        # 创建订单
-        sql = """
-            INSERT INTO orders (order_no, user_id, total_price, status, remark) 
-            VALUES (%s, %s, %s, %s, %s)
-        """
-        order_id = execute_insert(sql, (order_no, data.user_id, total_price, 1, data.remark))
-        
-        # 创建订单明细
-        for item in data.items:
-            sql = """
-                INSERT INTO order_items (order_id, dish_id, dish_name, dish_price, quantity, subtotal) 
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """
-            subtotal = item.dish_price * item.quantity
-            execute_insert(sql, (
-                order_id, item.dish_id, item.dish_name,
-                item.dish_price, item.quantity, subtotal
-            ))
-            
-            # 更新菜品销量
-            sql = "UPDATE dishes SET sales = sales + %s WHERE id = %s"
-            execute_update(sql, (item.quantity, item.dish_id))
+        # 订单、明细在同一事务中写入
+        order_id = await run_in_db(
+            save_order, order_no, user_id, total_price, data.remark, items
+        )
+        stats_buffer.add(stats.new_order_deltas())
+        await stats_cache.async_clear()
+        sold = [(item['dish_id'], item['quantity']) for item in items]
+        sales_buffer.add(sold_deltas(sold))
+        dish_ranking.record_order(sold)
+        publish_order_event({
+            "type": "order_created",
+            "order_id": order_id,
+            "order_no": order_no,
+            "user_id": user_id,
+            "status": 1,
+            "total_price": total_price,
+            "remark": data.remark,
+            "created_at": datetime.now().replace(microsecond=0),
+            "items": items
+        })
         
         return {
             "code": 200,
             "message": "下单成功",
-            "data": {"order_id": order_id, "order_no": order_no}
+            "data": {"order_id": order_id, "order_no": order_no, "total_price": total_price}
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -591,52 +1077,49 @@ async def create_order(data: OrderCreate, token: str = Header(None)):
 async def get_my_orders(
     token: str = Header(None),
     status: Optional[int] = None,
-    page: int = 1,
-    page_size: int = 10
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    with_total: Optional[bool] = None
 ):
-    """获取当前用户的订单列表"""
+    """获取当前用户的订单列表
+
+    传入 cursor 时使用游标分页（首页传空字符串），按 (created_at, id) 定位；
+    with_total 控制是否统计总数，游标分页默认不统计。
+    """
     try:
-        user_data = verify_token(token)
-        offset = (page - 1) * page_size
-        
-        where_clause = "WHERE o.user_id = %s"
-        params = [user_data['id']]
-        
-        if status:
-            where_clause += " AND o.status = %s"
-            params.append(status)
-        
-        sql = f"""
-            SELECT o.*, u.nickname as user_nickname 
-            FROM orders o 
-            LEFT JOIN users u ON o.user_id = u.id 
-            {where_clause}
-            ORDER BY o.created_at DESC
-            LIMIT %s OFFSET %s
-        """
-        params.extend([page_size, offset])
-        orders = execute_query(sql, params)
+        user_data = verify_user(token)
         
-        # 获取订单明细
-        for order in orders:
-            sql = "SELECT * FROM order_items WHERE order_id = %s"
-            order['items'] = execute_query(sql, (order['id'],))
+        after = decode_cursor(cursor, 2) if cursor else None
+        offset = 0 if cursor is not None else (page - 1) * page_size
+        sql, params, count_sql, count_params = queries.order_page(
+            user_data['id'], status, after, page_size + 1, offset
+        )
+        orders = await async_execute_query(sql, params)
+        orders, next_cursor = cut_page(orders, page_size, lambda o: (o['created_at'], o['id']))
+        
+        # 批量获取订单明细
+        await attach_order_items(orders)
         
         # 获取总数
-        count_sql = f"SELECT COUNT(*) as total FROM orders o {where_clause}"
-        total_result = execute_query(count_sql, params[:-2], fetch_one=True)
-        total = total_result['total'] if total_result else 0
+        total = None
+        if need_total(cursor, with_total):
+            total_result = await async_execute_query(count_sql, count_params, fetch_one=True)
+            total = total_result['total'] if total_result else 0
         
-        return {
+        return FastJSONResponse({
             "code": 200,
             "message": "success",
             "data": {
                 "list": orders,
                 "total": total,
                 "page": page,
-                "page_size": page_size
+                "page_size": page_size,
+                "next_cursor": next_cursor
             }
-        }
+        })
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -645,53 +1128,49 @@ async def get_my_orders(
 async def get_order_list(
     token: str = Header(None),
     status: Optional[int] = None,
-    page: int = 1,
-    page_size: int = 10
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    with_total: Optional[bool] = None
 ):
-    """获取所有订单列表（管理员）"""
+    """获取所有订单列表（管理员）
+
+    传入 cursor 时使用游标分页（首页传空字符串），按 (created_at, id) 定位；
+    with_total 控制是否统计总数，游标分页默认不统计。
+    """
     try:
-        verify_token(token)
-        offset = (page - 1) * page_size
-        
-        where_clause = ""
-        params = []
+        verify_admin(token)
         
-        if status:
-            where_clause = "WHERE o.status = %s"
-            params.append(status)
-        
-        sql = f"""
-            SELECT o.*, u.nickname as user_nickname 
-            FROM orders o 
-            LEFT JOIN users u ON o.user_id = u.id 
-            {where_clause}
-            ORDER BY o.created_at DESC
-            LIMIT %s OFFSET %s
-        """
-        params.extend([page_size, offset])
-        orders = execute_query(sql, params)
+        after = decode_cursor(cursor, 2) if cursor else None
+        offset = 0 if cursor is not None else (page - 1) * page_size
+        sql, params, count_sql, count_params = queries.order_page(
+            None, status, after, page_size + 1, offset
+        )
+        orders = await async_execute_query(sql, params)
+        orders, next_cursor = cut_page(orders, page_size, lambda o: (o['created_at'], o['id']))
         
-        # 获取订单明细
-        for order in orders:
-            sql = "SELECT * FROM order_items WHERE order_id = %s"
-            order['items'] = execute_query(sql, (order['id'],))
+        # 批量获取订单明细
+        await attach_order_items(orders)
         
         # 获取总数
-        count_sql = f"SELECT COUNT(*) as total FROM orders o {where_clause}"
-        count_params = params[:-2] if status else []
-        total_result = execute_query(count_sql, count_params, fetch_one=True)
-        total = total_result['total'] if total_result else 0
+        total = None
+        if need_total(cursor, with_total):
+            total_result = await async_execute_query(count_sql, count_params, fetch_one=True)
+            total = total_result['total'] if total_result else 0
         
-        return {
+        return FastJSONResponse({
             "code": 200,
             "message": "success",
             "data": {
                 "list": orders,
                 "total": total,
                 "page": page,
-                "page_size": page_size
+                "page_size": page_size,
+                "next_cursor": next_cursor
             }
-        }
+        })
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -700,24 +1179,18 @@ async def get_order_list(
 async def get_order_detail(order_id: int, token: str = Header(None)):
     """获取订单详情"""
     try:
-        verify_token(token)
+        user_data = verify_token(token)
         
-        sql = """
-            SELECT o.*, u.nickname as user_nickname, u.phone as user_phone 
-            FROM orders o 
-            LEFT JOIN users u ON o.user_id = u.id 
-            WHERE o.id = %s
-        """
-        order = execute_query(sql, (order_id,), fetch_one=True)
+        order = await async_execute_query(queries.ORDER_DETAIL_SQL, (order_id,), fetch_one=True)
         
         if not order:
             raise HTTPException(status_code=404, detail="订单不存在")
+        check_order_owner(order, user_data)
         
         # 获取订单明细
-        sql = "SELECT * FROM order_items WHERE order_id = %s"
-        order['items'] = execute_query(sql, (order_id,))
+        await attach_order_items([order])
         
-        return {"code": 200, "message": "success", "data": order}
+        return FastJSONResponse({"code": 200, "message": "success", "data": order})
     except HTTPException:
         raise
     except Exception as e:
@@ -732,12 +1205,24 @@ async def update_order_status(
 ):
     """更新订单状态（管理员）"""
     try:
-        verify_token(token)
-        
-        sql = "UPDATE orders SET status = %s WHERE id = %s"
-        execute_update(sql, (data.status, order_id))
+        user_data = verify_admin(token)
+        
+        order, deltas = await async_execute_transaction(change_order_status, user_data, order_id, data.status)
+        stats_buffer.add(deltas)
+        await sync_ranking_status(order, data.status)
+        await stats_cache.async_clear()
+        publish_order_event({
+            "type": "order_status",
+            "order_id": order_id,
+            "order_no": order["order_no"],
+            "user_id": order["user_id"],
+            "status": data.status,
+            "old_status": order["status"]
+        })
         
         return {"code": 200, "message": "更新成功"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -748,18 +1233,19 @@ async def cancel_order(order_id: int, token: str = Header(None)):
     try:
         user_data = verify_token(token)
         
-        # 检查订单是否属于当前用户
-        sql = "SELECT * FROM orders WHERE id = %s"
-        order = execute_query(sql, (order_id,), fetch_one=True)
-        
-        if not order:
-            raise HTTPException(status_code=404, detail="订单不存在")
-        
-        if order['status'] not in [1, 2]:
-            raise HTTPException(status_code=400, detail="订单状态不允许取消")
-        
-        sql = "UPDATE orders SET status = 5 WHERE id = %s"
-        execute_update(sql, (order_id,))
+        # 只能取消自己的订单（管理员不限），且只有待支付、已支付的订单可以取消
+        order, deltas = await async_execute_transaction(change_order_status, user_data, order_id, 5, [1, 2])
+        stats_buffer.add(deltas)
+        await sync_ranking_status(order, 5)
+        await stats_cache.async_clear()
+        publish_order_event({
+            "type": "order_status",
+            "order_id": order_id,
+            "order_no": order["order_no"],
+            "user_id": order["user_id"],
+            "status": 5,
+            "old_status": order["status"]
+        })
         
         return {"code": 200, "message": "取消成功"}
     except HTTPException:
@@ -768,59 +1254,200 @@ async def cancel_order(order_id: int, token: str = Header(None)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ==================== 订单事件推送 ====================
+@app.websocket("/api/events/orders/ws")
+async def order_events_ws(websocket: WebSocket, token: Optional[str] = None):
+    """订单事件推送（WebSocket）
+
+    令牌通过 token 请求头或查询参数传递。管理员收到全部订单的事件，普通用户只收到自己订单的事件；
+    空闲时定期发送 ping，收到 resync 时客户端应重新拉取列表。
+    """
+    try:
+        user_data = verify_token(websocket.headers.get("token") or token)
+    except HTTPException:
+        await websocket.close(code=4401)
+        return
+    
+    await websocket.accept()
+    subscription = order_events.subscribe(order_topics(user_data))
+    
+    async def forward():
+        while True:
+            event = await subscription.get(EVENTS_CONFIG['heartbeat'])
+            await websocket.send_text(dumps(event or {"type": "ping"}).decode())
+    
+    sender = asyncio.create_task(forward())
+    try:
+        # 客户端不需要发送消息，读取只为及时发现断开
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+    finally:
+        sender.cancel()
+        order_events.unsubscribe(subscription)
+
+
+@app.get("/api/events/orders", summary="订单事件推送（SSE）")
+async def order_events_sse(request: Request, token: Optional[str] = None):
+    """订单事件推送（Server-Sent Events），事件内容与 WebSocket 相同
+
+    令牌通过 token 请求头或查询参数传递（浏览器的 EventSource 不能设置请求头）。
+    """
+    user_data = verify_token(request.headers.get("token") or token)
+    
+    async def stream():
+        subscription = order_events.subscribe(order_topics(user_data))
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                event = await subscription.get(EVENTS_CONFIG['heartbeat'])
+                if event is None:
+                    yield ": ping\n\n"
+                else:
+                    yield f"event: {event['type']}\ndata: {dumps(event).decode()}\n\n"
+        finally:
+            order_events.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 # ==================== 统计相关接口 ====================
 @app.get("/api/statistics/overview", summary="数据概览")
 async def get_statistics(token: str = Header(None)):
     """获取数据统计概览（管理员）"""
     try:
-        verify_token(token)
-        
-        # 用户总数
-        sql = "SELECT COUNT(*) as total FROM users"
-        user_count = execute_query(sql, fetch_one=True)['total']
-        
-        # 订单总数
-        sql = "SELECT COUNT(*) as total FROM orders"
-        order_count = execute_query(sql, fetch_one=True)['total']
+        verify_admin(token)
         
-        # 今日订单数
-        sql = "SELECT COUNT(*) as total FROM orders WHERE DATE(created_at) = CURDATE()"
-        today_order_count = execute_query(sql, fetch_one=True)['total']
+        cached, cache_version = await stats_cache.async_lookup("overview")
+        if cached is not None:
+            return cached
         
-        # 总销售额
-        sql = "SELECT COALESCE(SUM(total_price), 0) as total FROM orders WHERE status IN (2, 3, 4)"
-        total_sales = execute_query(sql, fetch_one=True)['total']
-        
-        # 今日销售额
-        sql = "SELECT COALESCE(SUM(total_price), 0) as total FROM orders WHERE DATE(created_at) = CURDATE() AND status IN (2, 3, 4)"
-        today_sales = execute_query(sql, fetch_one=True)['total']
+        # 用户数、订单数、销售额从汇总表读取
+        overview = await async_execute_transaction(stats.get_overview, stats_buffer.pending())
         
         # 热销菜品TOP5
-        sql = """
-            SELECT id, name, price, sales 
-            FROM dishes 
-            WHERE status = 1 
-            ORDER BY sales DESC 
-            LIMIT 5
-        """
-        hot_dishes = execute_query(sql)
+        await ensure_ranking()
+        hot_dishes = dish_ranking.top(5)
         
-        return {
+        result = {
             "code": 200,
             "message": "success",
             "data": {
-                "user_count": user_count,
-                "order_count": order_count,
-                "today_order_count": today_order_count,
-                "total_sales": float(total_sales),
-                "today_sales": float(today_sales),
+                "user_count": overview['user_count'],
+                "order_count": overview['order_count'],
+                "today_order_count": overview['today_order_count'],
+                "total_sales": float(overview['total_sales']),
+                "today_sales": float(overview['today_sales']),
                 "hot_dishes": hot_dishes
             }
         }
+        await stats_cache.async_set("overview", result, cache_version)
+        return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/statistics/timeseries", summary="销售时间序列")
+async def get_statistics_timeseries(
+    start: date,
+    end: date,
+    token: str = Header(None),
+    granularity: str = "day",
+    group_by: Optional[str] = None,
+    limit: int = 20
+):
+    """获取销售时间序列及菜品/分类排行（管理员）
+
+    granularity: hour / day / week；group_by: dish / category，不传则不返回排行。
+    """
+    try:
+        verify_admin(token)
+        
+        if granularity not in analytics.GRANULARITIES:
+            raise HTTPException(status_code=400, detail="granularity 只支持 hour、day、week")
+        if group_by is not None and group_by not in analytics.GROUP_BYS:
+            raise HTTPException(status_code=400, detail="group_by 只支持 dish、category")
+        if end < start:
+            raise HTTPException(status_code=400, detail="结束日期不能早于开始日期")
+        if (end - start).days >= analytics.MAX_RANGE_DAYS:
+            raise HTTPException(status_code=400, detail=f"查询范围不能超过{analytics.MAX_RANGE_DAYS}天")
+        
+        cache_key = ("timeseries", start, end, granularity, group_by, limit)
+        cached, cache_version = await stats_cache.async_lookup(cache_key)
+        if cached is not None:
+            return cached
+        
+        series = await async_execute_transaction(analytics.get_timeseries, start, end, granularity)
+        breakdown = None
+        if group_by:
+            breakdown = await async_execute_transaction(
+                analytics.get_breakdown, start, end, group_by, limit
+            )
+        
+        result = {
+            "code": 200,
+            "message": "success",
+            "data": {
+                "start": start,
+                "end": end,
+                "granularity": granularity,
+                "series": series,
+                "group_by": group_by,
+                "breakdown": breakdown
+            }
+        }
+        await stats_cache.async_set(cache_key, result, cache_version)
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/statistics/db-pool", summary="数据库连接池指标")
+async def get_db_pool_stats(token: str = Header(None)):
+    """获取数据库连接池指标（管理员）"""
+    try:
+        verify_admin(token)
+        return {"code": 200, "message": "success", "data": get_pool_stats()}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/statistics/cache", summary="缓存命中指标")
+async def get_cache_stats(token: str = Header(None)):
+    """获取菜单缓存命中指标（管理员）"""
+    try:
+        verify_admin(token)
+        return {
+            "code": 200,
+            "message": "success",
+            "data": {"menu": menu_cache.stats(), "stats": stats_cache.stats()}
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics(authorization: Optional[str] = Header(None)):
+    """Prometheus 指标（设置了 METRICS_TOKEN 时需要 Authorization: Bearer <token>）"""
+    expected = metrics.METRICS_CONFIG['token']
+    if expected and not hmac.compare_digest((authorization or "").encode(), f"Bearer {expected}".encode()):
+        raise HTTPException(status_code=401, detail="未授权")
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+
 @app.get("/", summary="根路径")
 async def root():
     """根路径"""
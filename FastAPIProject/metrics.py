@@ -0,0 +1,253 @@
+"""
+运行指标（Prometheus 文本格式）
+
+MetricsMiddleware 按接口（方法 + 路由模板，如 GET /api/order/{order_id}）记录：
+- http_requests_total：请求数（按状态码）
+- http_request_duration_seconds：请求耗时直方图
+- http_requests_in_flight：正在处理的请求数
+- http_request_db_queries / http_request_db_seconds：每个请求的数据库查询次数和耗时直方图
+
+数据库查询通过 database.add_query_hook 计时，按语句类型记录 db_query_duration_seconds；
+请求内的查询经 contextvars 归到当前请求（run_in_db 会把上下文带到数据库线程）。
+连接池、缓存、事件推送、销量 / 统计汇总缓冲等组件的 stats() 在抓取时读取，导出为 gauge。
+
+记录只是在锁内累加几个整数，不做格式化；文本在 GET /metrics 时才生成。
+指标按进程统计，多 worker 部署时每个 worker 单独暴露（或每个 worker 监听独立端口）。
+"""
+import contextvars
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# 指标配置
+METRICS_CONFIG = {
+    'token': os.environ.get('METRICS_TOKEN'),   # 设置后 /metrics 需要 Authorization: Bearer <token>
+    'exclude_paths': ('/metrics', '/api/events/orders'),   # 不记录的路径（长连接的 SSE 不计入耗时）
+}
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 20, 50)
+
+CONTENT_TYPE = "text/plain; version=0.0.4"   # Starlette 会补上 charset=utf-8
+
+_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+# 当前请求的查询耗时列表（list.append 是原子操作，多个数据库线程同时追加也安全）
+_request_queries = contextvars.ContextVar("request_queries", default=None)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """只增计数器"""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            yield self.name + _format_labels(self.labels, labels), value
+
+
+class Gauge(Counter):
+    """可增可减的当前值"""
+
+    kind = "gauge"
+
+    def dec(self, labels=(), amount=1):
+        self.inc(labels, -amount)
+
+    def set(self, value, labels=()):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram:
+    """直方图：每组标签保存各桶计数、总和、总数"""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {}   # labels -> [各桶计数..., +Inf 桶计数, 总和]
+
+    def observe(self, value, labels=()):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def samples(self):
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        bounds = self.buckets + (float("inf"),)
+        for labels, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, series):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield self.name + "_bucket" + _format_labels(self.labels, labels, le), cumulative
+            yield self.name + "_sum" + _format_labels(self.labels, labels), series[-1]
+            yield self.name + "_count" + _format_labels(self.labels, labels), cumulative
+
+
+class Registry:
+    """指标集合，render() 生成 Prometheus 文本格式"""
+
+    def __init__(self):
+        self._metrics = []
+        self._stats = []   # (前缀, stats 函数, 标签)
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_stats(self, prefix, func, labels=None):
+        """抓取时调用 func()，把返回的 dict 中的数值导出为 gauge：{prefix}_{key}"""
+        self._stats.append((prefix, func, labels or {}))
+
+    def _stats_lines(self):
+        families = {}
+        for prefix, func, labels in self._stats:
+            try:
+                stats = func()
+            except Exception:
+                continue
+            label_text = _format_labels(tuple(labels), tuple(labels.values()))
+            for key, value in stats.items():
+                if isinstance(value, bool):
+                    value = int(value)
+                if isinstance(value, (int, float)):
+                    families.setdefault(f"{prefix}_{key}", []).append((label_text, value))
+        for name in sorted(families):
+            yield f"# TYPE {name} gauge"
+            for label_text, value in families[name]:
+                yield f"{name}{label_text} {_format_value(value)}"
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, value in metric.samples():
+                lines.append(f"{name} {_format_value(value)}")
+        lines.extend(self._stats_lines())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests_total = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+))
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route")
+))
+http_requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled"
+))
+http_request_db_queries = registry.register(Histogram(
+    "http_request_db_queries", "Database queries per HTTP request", ("method", "route"),
+    QUERY_COUNT_BUCKETS
+))
+http_request_db_seconds = registry.register(Histogram(
+    "http_request_db_seconds", "Database time per HTTP request", ("method", "route"),
+    QUERY_LATENCY_BUCKETS
+))
+db_query_duration = registry.register(Histogram(
+    "db_query_duration_seconds", "Database query latency by statement type", ("operation",),
+    QUERY_LATENCY_BUCKETS
+))
+
+
+def observe_query(sql, seconds):
+    """database.add_query_hook 的回调（在数据库线程中调用）"""
+    keyword = sql.lstrip()[:6].upper()
+    db_query_duration.observe(seconds, (keyword if keyword in _OPERATIONS else "OTHER",))
+    queries = _request_queries.get()
+    if queries is not None:
+        queries.append(seconds)
+
+
+def route_label(scope):
+    """路由模板作为标签，避免按实际路径（含ID）产生无限多的序列"""
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # 挂载的子应用（如 /uploads 静态文件）
+    if scope.get("root_path"):
+        return scope["root_path"]
+    return "<unmatched>"
+
+
+class MetricsMiddleware:
+    """记录每个 HTTP 请求的耗时、状态码和数据库查询（纯 ASGI 中间件）"""
+
+    def __init__(self, app, exclude_paths=None):
+        self.app = app
+        self.exclude_paths = set(exclude_paths or METRICS_CONFIG['exclude_paths'])
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        queries = []
+        token = _request_queries.set(queries)
+        http_requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_requests_in_flight.dec()
+            _request_queries.reset(token)
+            labels = (scope["method"], route_label(scope))
+            http_requests_total.inc(labels + (str(status),))
+            http_request_duration.observe(elapsed, labels)
+            http_request_db_queries.observe(len(queries), labels)
+            http_request_db_seconds.observe(sum(queries), labels)
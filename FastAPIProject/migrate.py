@@ -0,0 +1,251 @@
+"""
+数据库迁移
+
+表结构变更写成按编号命名的 SQL 文件放在 migrations/ 目录（0001_stats_tables.sql），
+按编号顺序执行，已执行的编号记录在 schema_migrations 表中，重复运行只会执行新增的迁移。
+database.sql 建库时已包含全部迁移的结果，并把这些编号标记为已执行。
+
+用法：
+    python migrate.py                   # 执行尚未执行的迁移
+    python migrate.py status            # 查看迁移状态
+    python migrate.py check [--strict]  # EXPLAIN 各接口的查询，大表或无索引的全表扫描时返回非 0
+
+MySQL 的 DDL 会隐式提交，一个迁移中途失败时前面的语句已经生效，
+迁移编号只在全部语句执行成功后记录，需要手动处理后重新运行。
+"""
+import datetime
+import re
+import sys
+from pathlib import Path
+
+from database import get_db
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "migrations"
+
+_FILENAME_RE = re.compile(r"^(\d{4})_(\w+)\.sql$")
+
+_CREATE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INT PRIMARY KEY COMMENT '迁移编号',
+        name VARCHAR(100) NOT NULL COMMENT '迁移名称',
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '执行时间'
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='数据库迁移记录表'
+"""
+
+
+def load_migrations(directory=MIGRATIONS_DIR):
+    """按编号返回全部迁移 [(编号, 名称, 文件路径), ...]"""
+    migrations = []
+    for path in sorted(directory.glob("*.sql")):
+        match = _FILENAME_RE.match(path.name)
+        if match is None:
+            raise ValueError(f"迁移文件名不正确: {path.name}")
+        migrations.append((int(match.group(1)), match.group(2), path))
+    versions = [version for version, _, _ in migrations]
+    if len(set(versions)) != len(versions):
+        raise ValueError("迁移编号重复")
+    return migrations
+
+
+def split_statements(sql):
+    """按行尾的分号拆分语句，忽略 -- 注释行"""
+    statements, lines = [], []
+    for line in sql.splitlines():
+        if line.strip().startswith("--"):
+            continue
+        lines.append(line)
+        if line.rstrip().endswith(";"):
+            statement = "\n".join(lines).strip().rstrip(";")
+            if statement:
+                statements.append(statement)
+            lines = []
+    rest = "\n".join(lines).strip()
+    if rest:
+        statements.append(rest)
+    return statements
+
+
+def applied_versions(cursor):
+    cursor.execute(_CREATE_TABLE_SQL)
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row['version'] for row in cursor.fetchall()}
+
+
+def migrate():
+    """执行尚未执行的迁移，返回执行的迁移列表"""
+    done = []
+    with get_db() as conn:
+        with conn.cursor() as cursor:
+            applied = applied_versions(cursor)
+            for version, name, path in load_migrations():
+                if version in applied:
+                    continue
+                for statement in split_statements(path.read_text(encoding="utf-8")):
+                    cursor.execute(statement)
+                cursor.execute(
+                    "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                    (version, name)
+                )
+                conn.commit()
+                done.append((version, name))
+    return done
+
+
+def status():
+    """返回 [(编号, 名称, 是否已执行), ...]"""
+    with get_db() as conn:
+        with conn.cursor() as cursor:
+            applied = applied_versions(cursor)
+    return [(version, name, version in applied) for version, name, _ in load_migrations()]
+
+
+# ==================== 查询计划检查 ====================
+
+# 数据量随用户 / 订单增长的表：这些表上的全表扫描（type = ALL）不论是否 strict 一律视为错误
+LARGE_TABLES = frozenset(('users', 'orders', 'order_items', 'stats_hourly', 'stats_dish_daily'))
+
+# 示例参数，只看执行计划
+_NOW = datetime.datetime(2024, 1, 1, 12, 0, 0)
+_TODAY = _NOW.date()
+
+
+def explain_queries():
+    """各接口实际执行的查询 [(名称, SQL, 参数), ...]
+
+    SQL 由接口使用的同一批函数 / 常量生成（queries.py、stats.py、analytics.py、ranking.py、pricing.py），
+    分页查询同时检查总数查询。不带条件的菜品 / 分类列表是小表排序，不在检查范围内。
+    """
+    import analytics
+    import pricing
+    import queries
+    import ranking
+    import stats
+
+    after = (_NOW, 100)
+    pages = [
+        ("我的订单", queries.order_page(1)),
+        ("我的订单（按状态）", queries.order_page(1, 2)),
+        ("我的订单（游标）", queries.order_page(1, after=after)),
+        ("订单列表", queries.order_page()),
+        ("订单列表（按状态）", queries.order_page(status=2)),
+        ("订单列表（游标）", queries.order_page(after=after)),
+        ("订单列表（按状态 + 游标）", queries.order_page(status=2, after=after)),
+        ("菜品列表（按分类）", queries.dish_page(1, 1)),
+        ("菜品列表（按状态）", queries.dish_page(status=1)),
+        ("菜品列表（按分类 + 游标）", queries.dish_page(1, 1, after=(1, 100))),
+        ("用户列表", queries.user_page()),
+        ("用户列表（游标）", queries.user_page(after=after)),
+    ]
+    result, counted = [], set()
+    for name, (sql, params, count_sql, count_params) in pages:
+        result.append((name, sql, params))
+        # 游标分页的总数查询与页码分页相同，只检查一次
+        if (count_sql, tuple(count_params)) not in counted:
+            counted.add((count_sql, tuple(count_params)))
+            result.append((name + "总数", count_sql, count_params))
+
+    items_sql, items_params = queries.order_items([1, 2, 3])
+    categories_sql, categories_params = queries.category_list(1)
+    result += [
+        ("订单详情", queries.ORDER_DETAIL_SQL, (1,)),
+        ("订单明细", items_sql, items_params),
+        ("取消订单同步排行", queries.ORDER_DISH_QUANTITIES_SQL, (1,)),
+        ("订单状态变化菜品汇总", stats.ORDER_DISH_SALES_SQL, (1,)),
+        ("菜品详情", queries.DISH_DETAIL_SQL, (1,)),
+        ("菜单分类", queries.MENU_CATEGORIES_SQL, ()),
+        ("菜单菜品", queries.MENU_DISHES_SQL, ()),
+        ("分类列表（按状态）", categories_sql, categories_params),
+        ("登录", queries.ACCOUNTS_SQL, ("admin", "admin")),
+        ("下单计价", pricing.dishes_sql(3), (1, 2, 3)),
+        ("菜品排行加载", ranking.DAILY_SALES_SQL, (6,)),
+        ("数据概览", stats.OVERVIEW_SQL, ()),
+        ("销售时间序列", analytics.TIMESERIES_SQL, (_NOW - datetime.timedelta(days=30), _NOW)),
+        ("菜品 / 分类排行", analytics.BREAKDOWN_SQL, (_TODAY - datetime.timedelta(days=30), _TODAY)),
+    ]
+    return result
+
+
+_TABLE_RE = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+_KEYWORDS = {'WHERE', 'LEFT', 'RIGHT', 'INNER', 'JOIN', 'ON', 'USING', 'ORDER', 'GROUP',
+             'HAVING', 'LIMIT', 'UNION'}
+
+
+def table_aliases(sql):
+    """SQL 中别名到表名的映射（EXPLAIN 的 table 列显示的是别名）"""
+    aliases = {}
+    for table, alias in _TABLE_RE.findall(sql):
+        aliases[table] = table
+        if alias and alias.upper() not in _KEYWORDS:
+            aliases[alias] = table
+    return aliases
+
+
+def review_plan(rows, strict=False, aliases=None):
+    """检查一条查询的执行计划，返回 (错误列表, 提示列表)
+
+    - 大表（LARGE_TABLES）全表扫描（type = ALL）：错误
+    - 其它表全表扫描且没有可用索引：错误
+    - 其它表全表扫描但有可用索引（数据量小时优化器会选择全表扫描）：提示，strict 时视为错误
+    - 使用 filesort：提示
+    aliases 为 table_aliases() 的结果，用于把别名对应到表名。
+    派生表 / UNION 结果（<derived2>、<union1,2>）不检查。
+    """
+    aliases = aliases or {}
+    errors, warnings = [], []
+    for row in rows:
+        table = row.get('table') or ''
+        extra = row.get('Extra') or ''
+        if table.startswith('<'):
+            continue
+        if row.get('type') == 'ALL':
+            message = f"{table} 全表扫描（预估 {row.get('rows')} 行）"
+            if aliases.get(table, table) in LARGE_TABLES:
+                errors.append(message + f"，{aliases.get(table, table)} 为大表")
+            elif not row.get('possible_keys'):
+                errors.append(message + "，没有可用索引")
+            elif strict:
+                errors.append(message + f"，可用索引 {row['possible_keys']}")
+            else:
+                warnings.append(message + f"，可用索引 {row['possible_keys']}（数据量小时属正常）")
+        if 'filesort' in extra:
+            warnings.append(f"{table} 使用 filesort")
+    return errors, warnings
+
+
+def check(strict=False):
+    """EXPLAIN 全部典型查询并打印结果，返回是否全部通过"""
+    passed = True
+    with get_db() as conn:
+        with conn.cursor() as cursor:
+            for name, sql, params in explain_queries():
+                cursor.execute("EXPLAIN " + sql, params)
+                rows = cursor.fetchall()
+                errors, warnings = review_plan(rows, strict, table_aliases(sql))
+                print(f"[{'FAIL' if errors else 'OK'}] {name}")
+                for row in rows:
+                    print(f"    {row.get('table')}: type={row.get('type')} key={row.get('key')} "
+                          f"rows={row.get('rows')} {row.get('Extra') or ''}".rstrip())
+                for message in errors:
+                    print(f"    错误: {message}")
+                for message in warnings:
+                    print(f"    提示: {message}")
+                passed = passed and not errors
+    return passed
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if not args:
+        done = migrate()
+        for version, name in done:
+            print(f"已执行 {version:04d}_{name}")
+        print(f"共执行 {len(done)} 个迁移" if done else "没有需要执行的迁移")
+    elif args == ["status"]:
+        for version, name, applied in status():
+            print(f"{version:04d}_{name}  {'已执行' if applied else '未执行'}")
+    elif args[0] == "check" and args[1:] in ([], ["--strict"]):
+        if not check(strict=args[1:] == ["--strict"]):
+            sys.exit(1)
+    else:
+        print("用法: python migrate.py | python migrate.py status | python migrate.py check [--strict]")
+        sys.exit(1)
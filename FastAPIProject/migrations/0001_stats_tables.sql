@@ -0,0 +1,39 @@
+-- 统计汇总表（数据概览、时间序列、菜品排行）
+-- 执行后运行 python stats.py rebuild 从原始表生成汇总数据
+
+CREATE TABLE IF NOT EXISTS stats_total (
+    id TINYINT PRIMARY KEY,
+    user_count INT NOT NULL DEFAULT 0 COMMENT '用户总数',
+    order_count INT NOT NULL DEFAULT 0 COMMENT '订单总数',
+    total_sales DECIMAL(14, 2) NOT NULL DEFAULT 0 COMMENT '总销售额',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='统计全量汇总表';
+
+CREATE TABLE IF NOT EXISTS stats_daily (
+    stat_date DATE PRIMARY KEY COMMENT '日期',
+    order_count INT NOT NULL DEFAULT 0 COMMENT '订单数',
+    sales DECIMAL(14, 2) NOT NULL DEFAULT 0 COMMENT '销售额',
+    new_users INT NOT NULL DEFAULT 0 COMMENT '新增用户数',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='统计按天汇总表';
+
+CREATE TABLE IF NOT EXISTS stats_hourly (
+    bucket_hour DATETIME PRIMARY KEY COMMENT '小时',
+    order_count INT NOT NULL DEFAULT 0 COMMENT '下单数',
+    paid_order_count INT NOT NULL DEFAULT 0 COMMENT '支付订单数',
+    sales DECIMAL(14, 2) NOT NULL DEFAULT 0 COMMENT '销售额',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='统计按小时汇总表';
+
+CREATE TABLE IF NOT EXISTS stats_dish_daily (
+    stat_date DATE NOT NULL COMMENT '日期',
+    dish_id INT NOT NULL COMMENT '菜品ID',
+    category_id INT COMMENT '分类ID',
+    quantity INT NOT NULL DEFAULT 0 COMMENT '销量',
+    sales DECIMAL(14, 2) NOT NULL DEFAULT 0 COMMENT '销售额',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (stat_date, dish_id),
+    INDEX idx_category_date (category_id, stat_date)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='统计按天菜品汇总表';
+
+INSERT IGNORE INTO stats_total (id) VALUES (1);
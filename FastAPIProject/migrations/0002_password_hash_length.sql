@@ -0,0 +1,5 @@
+-- 密码改为存储 PBKDF2 哈希（pbkdf2_sha256$迭代次数$盐$哈希），加长字段
+
+ALTER TABLE users MODIFY password VARCHAR(255) NOT NULL COMMENT '密码哈希';
+
+ALTER TABLE admins MODIFY password VARCHAR(255) NOT NULL COMMENT '密码哈希';
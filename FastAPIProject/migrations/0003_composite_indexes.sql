@@ -0,0 +1,32 @@
+-- 按接口的实际查询条件和排序建立组合索引，替换只能过滤、不能排序的单列索引
+-- 同时删除与 UNIQUE 约束重复的索引，减少写入开销
+
+-- 我的订单：WHERE user_id = ? ORDER BY created_at DESC, id DESC
+-- 订单列表：WHERE status = ? ORDER BY created_at DESC, id DESC / 无条件按 created_at 排序、按时间范围统计
+ALTER TABLE orders
+    ADD INDEX idx_user_created (user_id, created_at),
+    ADD INDEX idx_status_created (status, created_at),
+    ADD INDEX idx_created (created_at),
+    DROP INDEX idx_user,
+    DROP INDEX idx_status,
+    DROP INDEX idx_order_no;
+
+-- 菜品列表：WHERE category_id = ? AND status = ? ORDER BY sort_order, id DESC
+-- 菜单：WHERE status = 1 ORDER BY sort_order, id DESC
+ALTER TABLE dishes
+    ADD INDEX idx_category_status_sort (category_id, status, sort_order, id DESC),
+    ADD INDEX idx_status_sort (status, sort_order, id DESC),
+    DROP INDEX idx_category,
+    DROP INDEX idx_status;
+
+-- 分类列表 / 菜单：WHERE status = ? ORDER BY sort_order
+ALTER TABLE categories
+    ADD INDEX idx_status_sort (status, sort_order);
+
+-- 用户列表：ORDER BY created_at DESC, id DESC；用户名已有 UNIQUE 索引
+ALTER TABLE users
+    ADD INDEX idx_created (created_at),
+    DROP INDEX idx_username;
+
+ALTER TABLE admins
+    DROP INDEX idx_username;
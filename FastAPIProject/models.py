@@ -106,13 +106,15 @@ class DishUpdate(BaseModel):
 # 订单相关
 class OrderItem(BaseModel):
     dish_id: int
-    dish_name: str
-    dish_price: float
     quantity: int
+    # 名称和单价仅供客户端展示，下单时以服务端菜品数据为准
+    dish_name: Optional[str] = None
+    dish_price: Optional[float] = None
 
 
 class OrderCreate(BaseModel):
-    user_id: int
+    # 下单用户以登录令牌为准，该字段仅为兼容旧客户端保留，不再使用
+    user_id: Optional[int] = None
     items: List[OrderItem]
     remark: Optional[str] = None
 
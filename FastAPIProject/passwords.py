@@ -0,0 +1,77 @@
+"""
+密码哈希
+
+使用 PBKDF2-HMAC-SHA256 存储密码，格式：pbkdf2_sha256$迭代次数$盐$哈希（盐和哈希为 base64）。
+哈希计算是 CPU 密集操作，放到独立线程池执行（hashlib 计算期间会释放 GIL，可多核并行），
+不阻塞事件循环，也不占用数据库线程。
+
+兼容旧的明文密码：校验时发现存储值不是哈希格式则按明文比对，比对成功后由调用方
+用 needs_rehash 判断并写回哈希值，实现逐步迁移；迭代次数调高后旧哈希同样会在下次登录时升级。
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+
+# 密码哈希配置
+PASSWORD_CONFIG = {
+    'iterations': 310000,                  # PBKDF2 迭代次数
+    'workers': os.cpu_count() or 2,        # 哈希线程数
+}
+
+ALGORITHM = 'pbkdf2_sha256'
+
+_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_CONFIG['workers'], thread_name_prefix='password'
+)
+
+
+def is_hashed(stored):
+    """存储值是否已是哈希格式"""
+    return stored.startswith(ALGORITHM + '$')
+
+
+def hash_password(password, iterations=None):
+    """计算密码哈希"""
+    iterations = iterations or PASSWORD_CONFIG['iterations']
+    salt = secrets.token_bytes(16)
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, iterations)
+    return '$'.join([
+        ALGORITHM,
+        str(iterations),
+        base64.b64encode(salt).decode(),
+        base64.b64encode(digest).decode(),
+    ])
+
+
+def verify_password(password, stored):
+    """校验密码，返回 (是否正确, 是否需要重新哈希写回)"""
+    if not is_hashed(stored):
+        # 旧数据：明文比对
+        ok = hmac.compare_digest(password.encode(), stored.encode())
+        return ok, ok
+    try:
+        _, iterations, salt, digest = stored.split('$')
+        iterations = int(iterations)
+        salt = base64.b64decode(salt)
+        digest = base64.b64decode(digest)
+    except ValueError:
+        return False, False
+    actual = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, iterations)
+    ok = hmac.compare_digest(actual, digest)
+    return ok, ok and iterations < PASSWORD_CONFIG['iterations']
+
+
+async def async_hash_password(password):
+    """在哈希线程池中计算密码哈希"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, hash_password, password)
+
+
+async def async_verify_password(password, stored):
+    """在哈希线程池中校验密码"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, verify_password, password, stored)
@@ -0,0 +1,132 @@
+"""
+订单计价
+
+下单时不再信任客户端提交的菜品名称和单价，按服务端的菜品数据重新计价：
+菜品ID -> (名称, 单价, 状态) 保存在内存索引中，命中时不访问数据库；
+未命中的菜品用一条 WHERE id IN (...) 查询批量加载，不会每个菜品查询一次。
+
+索引项在以下情况失效：
+- 本进程修改 / 删除菜品时立即失效
+- 菜单缓存版本号变化（任意 worker 修改菜品，redis 缓存后端下所有进程可见）
+- 超过 ttl 秒（兜底，与菜单缓存的滞后时间一致）
+"""
+import threading
+import time
+from decimal import Decimal
+
+# 计价配置
+PRICING_CONFIG = {
+    'ttl': 60,             # 索引项有效秒数
+    'max_quantity': 99,    # 单个菜品最多购买数量
+}
+
+
+def dishes_sql(count):
+    """一次加载 count 个菜品的查询"""
+    placeholders = ", ".join(["%s"] * count)
+    return f"SELECT id, name, price, status FROM dishes WHERE id IN ({placeholders})"
+
+
+class PricingError(Exception):
+    """购物车中的菜品不存在、已下架或数量不合法"""
+
+
+class DishIndex:
+    """菜品价格索引（线程安全）"""
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._dishes = {}      # dish_id -> (菜品信息, 加载时间)
+        self._version = None
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, dish_ids, version=None):
+        """返回 (命中的菜品 {id: 菜品信息}, 未命中的ID列表)"""
+        now = time.monotonic()
+        found, missing = {}, []
+        with self._lock:
+            if version != self._version:
+                self._dishes.clear()
+                self._version = version
+            for dish_id in dish_ids:
+                entry = self._dishes.get(dish_id)
+                if entry is not None and now - entry[1] <= self.ttl:
+                    found[dish_id] = entry[0]
+                else:
+                    missing.append(dish_id)
+            self.hits += len(found)
+            self.misses += len(missing)
+        return found, missing
+
+    def load(self, cursor, dish_ids, version=None):
+        """一条查询加载指定菜品并放入索引，返回 {id: 菜品信息}（不存在的菜品不在结果中）"""
+        cursor.execute(dishes_sql(len(dish_ids)), list(dish_ids))
+        dishes = {row['id']: row for row in cursor.fetchall()}
+        now = time.monotonic()
+        with self._lock:
+            if version == self._version:
+                for dish_id, dish in dishes.items():
+                    self._dishes[dish_id] = (dish, now)
+        return dishes
+
+    def invalidate(self, dish_id=None):
+        """菜品变更后调用，dish_id 为空时清空整个索引"""
+        with self._lock:
+            if dish_id is None:
+                self._dishes.clear()
+            else:
+                self._dishes.pop(dish_id, None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._dishes),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def price_items(items, dishes, max_quantity=None):
+    """按服务端菜品数据计价
+
+    items 为 [(dish_id, quantity), ...]，dishes 为 {id: 菜品信息}，
+    返回 (订单明细列表, 总价)，同一菜品出现多次时合并数量。
+    """
+    max_quantity = max_quantity or PRICING_CONFIG['max_quantity']
+    if not items:
+        raise PricingError("购物车为空")
+
+    quantities = {}
+    for dish_id, quantity in items:
+        if quantity < 1:
+            raise PricingError("菜品数量不正确")
+        quantities[dish_id] = quantities.get(dish_id, 0) + quantity
+
+    lines = []
+    total = Decimal("0")
+    for dish_id, quantity in quantities.items():
+        dish = dishes.get(dish_id)
+        if dish is None:
+            raise PricingError(f"菜品不存在: {dish_id}")
+        if dish['status'] != 1:
+            raise PricingError(f"菜品已下架: {dish['name']}")
+        if quantity > max_quantity:
+            raise PricingError(f"{dish['name']} 最多购买 {max_quantity} 份")
+        price = Decimal(str(dish['price']))
+        subtotal = price * quantity
+        lines.append({
+            "dish_id": dish_id,
+            "dish_name": dish['name'],
+            "dish_price": price,
+            "quantity": quantity,
+            "subtotal": subtotal,
+        })
+        total += subtotal
+    return lines, total
+
+
+dish_index = DishIndex(ttl=PRICING_CONFIG['ttl'])
@@ -0,0 +1,147 @@
+"""
+接口查询的 SQL
+
+分页列表、详情、菜单等查询在这里统一构造：main.py 的接口执行这些 SQL，
+migrate.py check 用同样的函数生成查询做 EXPLAIN，检查的就是接口实际执行的语句。
+统计、分析、排行、计价的 SQL 分别定义在 stats.py / analytics.py / ranking.py / pricing.py 中。
+
+分页函数返回 (列表 SQL, 参数, 总数 SQL, 总数参数)；after 为游标解码后的上一页最后一条的排序键，
+传入时按排序键定位，不再使用 OFFSET。列表 SQL 多查一条用于判断是否还有下一页（见 main.cut_page）。
+"""
+
+# 游标条件：按 (created_at, id) / (sort_order, id) 定位上一页最后一条之后的数据
+ORDER_CURSOR = "o.created_at <= %s AND (o.created_at < %s OR (o.created_at = %s AND o.id < %s))"
+USER_CURSOR = "created_at <= %s AND (created_at < %s OR (created_at = %s AND id < %s))"
+DISH_CURSOR = "d.sort_order >= %s AND (d.sort_order > %s OR (d.sort_order = %s AND d.id < %s))"
+
+# 菜单只包含展示用的字段：销量、更新时间随下单变化，放进来会让菜单版本号频繁变化
+MENU_CATEGORY_FIELDS = "id, name, sort_order"
+MENU_DISH_FIELDS = "id, category_id, name, description, price, image_url, sort_order"
+
+MENU_CATEGORIES_SQL = f"SELECT {MENU_CATEGORY_FIELDS} FROM categories WHERE status = 1 ORDER BY sort_order, id"
+MENU_DISHES_SQL = f"SELECT {MENU_DISH_FIELDS} FROM dishes WHERE status = 1 ORDER BY sort_order, id DESC"
+
+ORDER_DETAIL_SQL = """
+    SELECT o.*, u.nickname as user_nickname, u.phone as user_phone
+    FROM orders o
+    LEFT JOIN users u ON o.user_id = u.id
+    WHERE o.id = %s
+"""
+
+DISH_DETAIL_SQL = """
+    SELECT d.*, c.name as category_name
+    FROM dishes d
+    LEFT JOIN categories c ON d.category_id = c.id
+    WHERE d.id = %s
+"""
+
+# 订单中各菜品的数量（取消订单时同步热销排行）
+ORDER_DISH_QUANTITIES_SQL = """
+    SELECT dish_id, SUM(quantity) as quantity
+    FROM order_items WHERE order_id = %s
+    GROUP BY dish_id
+"""
+
+# 一次查询同时查找同名的管理员和普通用户
+ACCOUNTS_SQL = """
+    SELECT 'admin' as role, id, username, password, real_name as nickname,
+           NULL as phone, NULL as avatar_url, created_at, updated_at
+    FROM admins WHERE username = %s
+    UNION ALL
+    SELECT 'user' as role, id, username, password, nickname,
+           phone, avatar_url, created_at, updated_at
+    FROM users WHERE username = %s
+"""
+
+
+def _where(clauses):
+    return f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+
+def _cursor_params(after):
+    key, last_id = after
+    return [key, key, key, last_id]
+
+
+def order_page(user_id=None, status=None, after=None, limit=11, offset=0):
+    """订单分页（我的订单传 user_id，管理员订单列表不传），按下单时间倒序"""
+    clauses, params = [], []
+    if user_id is not None:
+        clauses.append("o.user_id = %s")
+        params.append(user_id)
+    if status:
+        clauses.append("o.status = %s")
+        params.append(status)
+    count_sql = f"SELECT COUNT(*) as total FROM orders o {_where(clauses)}"
+    count_params = list(params)
+
+    if after is not None:
+        clauses.append(ORDER_CURSOR)
+        params.extend(_cursor_params(after))
+    sql = f"""
+        SELECT o.*, u.nickname as user_nickname
+        FROM orders o
+        LEFT JOIN users u ON o.user_id = u.id
+        {_where(clauses)}
+        ORDER BY o.created_at DESC, o.id DESC
+        LIMIT %s OFFSET %s
+    """
+    params.extend([limit, offset])
+    return sql, params, count_sql, count_params
+
+
+def dish_page(category_id=None, status=None, after=None, limit=21, offset=0):
+    """菜品分页，按 sort_order、ID 倒序"""
+    clauses, params = [], []
+    if category_id:
+        clauses.append("d.category_id = %s")
+        params.append(category_id)
+    if status is not None:
+        clauses.append("d.status = %s")
+        params.append(status)
+    count_sql = f"SELECT COUNT(*) as total FROM dishes d {_where(clauses)}"
+    count_params = list(params)
+
+    if after is not None:
+        clauses.append(DISH_CURSOR)
+        params.extend(_cursor_params(after))
+    sql = f"""
+        SELECT d.*, c.name as category_name
+        FROM dishes d
+        LEFT JOIN categories c ON d.category_id = c.id
+        {_where(clauses)}
+        ORDER BY d.sort_order, d.id DESC
+        LIMIT %s OFFSET %s
+    """
+    params.extend([limit, offset])
+    return sql, params, count_sql, count_params
+
+
+def user_page(after=None, limit=11, offset=0):
+    """用户分页（管理员），按注册时间倒序"""
+    clauses, params = [], []
+    if after is not None:
+        clauses.append(USER_CURSOR)
+        params.extend(_cursor_params(after))
+    sql = f"""
+        SELECT id, username, nickname, phone, created_at
+        FROM users
+        {_where(clauses)}
+        ORDER BY created_at DESC, id DESC
+        LIMIT %s OFFSET %s
+    """
+    params.extend([limit, offset])
+    return sql, params, "SELECT COUNT(*) as total FROM users", []
+
+
+def category_list(status=None):
+    """分类列表，返回 (SQL, 参数)"""
+    if status is not None:
+        return "SELECT * FROM categories WHERE status = %s ORDER BY sort_order", [status]
+    return "SELECT * FROM categories ORDER BY sort_order", []
+
+
+def order_items(order_ids):
+    """一次查询多个订单的明细，返回 (SQL, 参数)"""
+    placeholders = ", ".join(["%s"] * len(order_ids))
+    return f"SELECT * FROM order_items WHERE order_id IN ({placeholders}) ORDER BY order_id, id", list(order_ids)
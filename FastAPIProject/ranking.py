@@ -0,0 +1,155 @@
+"""
+热销菜品排行
+
+在内存中维护每道菜的累计销量和最近几天的按天销量，下单时直接累加，
+查询时用堆（heapq.nlargest）取 Top-K，不再对 dishes 表做 ORDER BY sales 全表排序。
+
+内存数据按固定间隔与数据库对账（reconcile），菜品信息变更后标记为过期，
+下一次查询前重新加载。累计销量与 dishes.sales 口径一致（取消订单不扣减），
+按天销量不含已取消订单，订单取消时从当天销量中扣除。
+多 worker 部署时各进程独立维护，误差不超过一个对账周期。
+"""
+import heapq
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+# 排行配置
+RANKING_CONFIG = {
+    'reconcile_interval': 300,   # 与数据库对账的间隔秒数
+    'window_days': 7,            # 保留的按天销量天数
+}
+
+# 排行时间窗口
+WINDOWS = ('all', 'today', '7d')
+
+# 最近几天（参数为天数 - 1）未取消订单的按天菜品销量
+DAILY_SALES_SQL = """
+    SELECT DATE(o.created_at) as stat_date, oi.dish_id, SUM(oi.quantity) as quantity
+    FROM orders o
+    JOIN order_items oi ON oi.order_id = o.id
+    WHERE o.created_at >= CURDATE() - INTERVAL %s DAY AND o.status != 5
+    GROUP BY DATE(o.created_at), oi.dish_id
+"""
+
+
+class DishRanking:
+    """菜品销量排行（线程安全）"""
+
+    def __init__(self, window_days=7, reconcile_interval=300):
+        self.window_days = window_days
+        self.reconcile_interval = reconcile_interval
+        self._lock = threading.Lock()
+        self._dishes = {}          # dish_id -> 菜品信息
+        self._sales = Counter()    # dish_id -> 累计销量
+        self._daily = {}           # date -> Counter(dish_id -> 当天销量)
+        self._loaded_at = None
+        self._stale = True
+
+    @property
+    def is_stale(self):
+        """尚未加载或菜品信息已变更（需要等待重新加载后再查询）"""
+        return self._stale or self._loaded_at is None
+
+    @property
+    def needs_reload(self):
+        """是否需要重新从数据库加载"""
+        if self._stale or self._loaded_at is None:
+            return True
+        return time.monotonic() - self._loaded_at > self.reconcile_interval
+
+    def mark_stale(self):
+        """菜品信息变更后调用，下次查询前重新加载"""
+        self._stale = True
+
+    def reload(self, cursor, pending=None):
+        """从数据库加载菜品、累计销量和最近几天的按天销量
+
+        pending 返回尚未写回数据库的销量增量（见 sales.py），加到累计销量上。
+        """
+        cursor.execute("SELECT id, name, price, category_id, status, sales FROM dishes")
+        dishes = {row['id']: row for row in cursor.fetchall()}
+
+        cursor.execute(DAILY_SALES_SQL, (self.window_days - 1,))
+        daily = {}
+        for row in cursor.fetchall():
+            daily.setdefault(row['stat_date'], Counter())[row['dish_id']] = int(row['quantity'])
+
+        sales = Counter({dish_id: row['sales'] or 0 for dish_id, row in dishes.items()})
+        if pending is not None:
+            sales.update(pending())
+
+        with self._lock:
+            self._dishes = dishes
+            self._sales = sales
+            self._daily = daily
+            self._loaded_at = time.monotonic()
+            self._stale = False
+
+    def record_order(self, items):
+        """下单后累加销量，items 为 [(dish_id, quantity), ...]"""
+        today = date.today()
+        with self._lock:
+            day = self._daily.setdefault(today, Counter())
+            for dish_id, quantity in items:
+                self._sales[dish_id] += quantity
+                day[dish_id] += quantity
+            self._prune(today)
+
+    def record_cancel(self, items, day, sign=-1):
+        """订单取消后从下单当天的销量中扣除，items 为 [(dish_id, quantity), ...]
+
+        已取消的订单恢复为其他状态时 sign=1 加回。
+        """
+        with self._lock:
+            counter = self._daily.get(day)
+            if counter is None:
+                if day < date.today() - timedelta(days=self.window_days - 1):
+                    return
+                counter = self._daily[day] = Counter()
+            for dish_id, quantity in items:
+                counter[dish_id] += sign * quantity
+
+    def _prune(self, today):
+        oldest = today - timedelta(days=self.window_days - 1)
+        for day in [d for d in self._daily if d < oldest]:
+            del self._daily[day]
+
+    def _window_sales(self, window):
+        if window == 'all':
+            return self._sales
+        today = date.today()
+        if window == 'today':
+            return self._daily.get(today, Counter())
+        oldest = today - timedelta(days=self.window_days - 1)
+        total = Counter()
+        for day, counter in self._daily.items():
+            if day >= oldest:
+                total.update(counter)
+        return total
+
+    def top(self, k=5, window='all', category_id=None):
+        """在售菜品销量 Top-K，可按时间窗口和分类过滤"""
+        with self._lock:
+            sales = self._window_sales(window)
+            candidates = (
+                (quantity, dish_id) for dish_id, quantity in sales.items()
+                if dish_id in self._dishes
+                and self._dishes[dish_id]['status'] == 1
+                and (category_id is None or self._dishes[dish_id]['category_id'] == category_id)
+            )
+            best = heapq.nlargest(k, candidates)
+            return [
+                {
+                    "id": dish_id,
+                    "name": self._dishes[dish_id]['name'],
+                    "price": self._dishes[dish_id]['price'],
+                    "category_id": self._dishes[dish_id]['category_id'],
+                    "sales": quantity,
+                }
+                for quantity, dish_id in best
+            ]
+
+
+dish_ranking = DishRanking(**RANKING_CONFIG)
@@ -0,0 +1,41 @@
+"""
+JSON 响应
+
+使用 orjson 序列化：数据库返回的 Decimal、datetime、date 等类型在序列化时直接处理，
+不再经过 FastAPI 的 jsonable_encoder 逐个字段递归转换。
+列表类接口直接返回 FastJSONResponse 跳过 jsonable_encoder；其他接口通过 default_response_class 使用同一编码器。
+输出与 jsonable_encoder + json.dumps 保持一致：Decimal 为整数或浮点数，时间为 ISO 8601 格式。
+"""
+import datetime
+import decimal
+
+import orjson
+from starlette.responses import JSONResponse
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(obj):
+    """orjson 不直接支持的类型"""
+    if isinstance(obj, decimal.Decimal):
+        # 与 FastAPI 一致：没有小数部分的输出为整数
+        return int(obj) if obj.as_tuple().exponent >= 0 else float(obj)
+    if isinstance(obj, datetime.timedelta):
+        return obj.total_seconds()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode()
+    raise TypeError(f"无法序列化的类型: {type(obj).__name__}")
+
+
+def dumps(content) -> bytes:
+    """序列化为 UTF-8 JSON"""
+    return orjson.dumps(content, default=_default, option=_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    """使用 orjson 序列化的 JSON 响应"""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,70 @@
+"""
+菜品销量写回缓冲
+
+下单时不再在订单事务里执行 UPDATE dishes SET sales = sales + ...，
+而是先把销量增量累加在内存中，由后台任务每隔 flush_interval 秒（或累计 flush_count 单后立即）
+合并成一条多行 UPDATE 写回。热门菜品的行锁从每单一次变为每个周期一次，
+高峰期下单不再排队等同一行锁。
+
+缓冲、失败重试和关闭时写回见 writeback.py；进程被强制杀死时最多丢失一个周期的增量，
+可执行 `python sales.py rebuild` 按订单明细重新计算销量。
+"""
+import sys
+from collections import Counter
+
+from database import get_db
+from writeback import WriteBehindBuffer
+
+# 销量写回配置
+SALES_CONFIG = {
+    'flush_interval': 0.5,   # 写回间隔（秒）
+    'flush_count': 50,       # 累计多少单后立即写回
+}
+
+
+def sold_deltas(items):
+    """一单的销量增量，items 为 [(dish_id, quantity), ...]"""
+    deltas = Counter()
+    for dish_id, quantity in items:
+        deltas[dish_id] += quantity
+    return deltas
+
+
+def update_sales(cursor, deltas):
+    """一条 UPDATE 批量累加销量，按ID排序加锁避免死锁"""
+    dish_ids = sorted(deltas)
+    case_sql = " ".join(["WHEN %s THEN %s"] * len(dish_ids))
+    placeholders = ", ".join(["%s"] * len(dish_ids))
+    sql = f"UPDATE dishes SET sales = sales + CASE id {case_sql} END WHERE id IN ({placeholders})"
+    params = []
+    for dish_id in dish_ids:
+        params.extend([dish_id, deltas[dish_id]])
+    params.extend(dish_ids)
+    cursor.execute(sql, params)
+
+
+def rebuild():
+    """按订单明细重新计算全部菜品销量"""
+    with get_db() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                UPDATE dishes d
+                LEFT JOIN (
+                    SELECT dish_id, SUM(quantity) as quantity
+                    FROM order_items
+                    GROUP BY dish_id
+                ) t ON t.dish_id = d.id
+                SET d.sales = COALESCE(t.quantity, 0)
+            """)
+            return cursor.rowcount
+
+
+sales_buffer = WriteBehindBuffer(update_sales, **SALES_CONFIG)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["rebuild"]:
+        print(f"菜品销量已重建，更新 {rebuild()} 个菜品")
+    else:
+        print("用法: python sales.py rebuild")
+        sys.exit(1)
@@ -0,0 +1,147 @@
+"""
+订单号生成器（Snowflake）
+
+64 位 ID 由三部分组成：
+- 41 位毫秒时间戳（相对 EPOCH_MS，可用约 69 年）
+- 10 位节点号（0 ~ 1023）= 5 位主机号 + 5 位 worker 序号，每个 worker 进程一个
+- 12 位毫秒内序号（每毫秒 4096 个）
+
+生成完全在进程内完成，不需要访问数据库。同一毫秒内序号用尽、或系统时钟回拨时，
+借用下一毫秒继续递增，保证同一进程内严格单调、不重复。
+
+节点号在进程首次生成订单号时分配：
+- 主机号：环境变量 ORDER_HOST_ID（0 ~ 31），多主机 / 多容器部署时必须为每台主机设置不同的值；
+  未设置时由主机名推导，不同主机可能相同，仅适合单机部署
+- worker 序号：在本机锁目录（ORDER_NODE_LOCK_DIR，默认系统临时目录）中用文件锁抢占一个空闲序号，
+  进程退出时锁自动释放，同一台主机上的 worker 不会拿到相同序号；
+  没有 fcntl 的平台（Windows）退化为进程号推导，仅适合开发环境
+"""
+import os
+import socket
+import tempfile
+import threading
+import time
+import zlib
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# 自定义纪元：2024-01-01 00:00:00 UTC
+EPOCH_MS = 1704067200000
+
+HOST_BITS = 5
+WORKER_BITS = 5
+NODE_BITS = HOST_BITS + WORKER_BITS
+SEQUENCE_BITS = 12
+MAX_HOST_ID = (1 << HOST_BITS) - 1
+MAX_WORKER_ID = (1 << WORKER_BITS) - 1
+MAX_NODE_ID = (1 << NODE_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+
+def default_host_id():
+    """主机号：优先使用 ORDER_HOST_ID，未设置时由主机名推导"""
+    value = os.environ.get('ORDER_HOST_ID')
+    if value is not None:
+        host_id = int(value)
+        if not 0 <= host_id <= MAX_HOST_ID:
+            raise ValueError(f"ORDER_HOST_ID 必须在 0 ~ {MAX_HOST_ID} 之间")
+        return host_id
+    return zlib.crc32(socket.gethostname().encode()) & MAX_HOST_ID
+
+
+def acquire_worker_id(host_id, lock_dir=None):
+    """在本机锁目录中抢占一个空闲的 worker 序号，返回 (worker_id, 持有锁的文件)
+
+    锁文件需在进程存活期间保持打开，进程退出时操作系统自动释放锁。
+    """
+    if fcntl is None:
+        return os.getpid() & MAX_WORKER_ID, None
+    lock_dir = lock_dir or os.environ.get('ORDER_NODE_LOCK_DIR') or tempfile.gettempdir()
+    for worker_id in range(MAX_WORKER_ID + 1):
+        lock_file = open(os.path.join(lock_dir, f"order-node-{host_id}-{worker_id}.lock"), "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            continue
+        return worker_id, lock_file
+    raise RuntimeError(f"主机号 {host_id} 的 {MAX_WORKER_ID + 1} 个 worker 序号均已被占用")
+
+
+class SnowflakeGenerator:
+    """Snowflake ID 生成器（线程安全）
+
+    CPython 没有原子 CAS，这里用一把只保护几条整数运算的锁；订单号在事件循环线程上生成，
+    锁始终无竞争，持锁期间也不会休眠或等待时钟。
+    """
+
+    def __init__(self, node_id=None):
+        self._lease = None
+        if node_id is None:
+            host_id = default_host_id()
+            worker_id, self._lease = acquire_worker_id(host_id)
+            node_id = (host_id << WORKER_BITS) | worker_id
+        self.node_id = node_id
+        if not 0 <= self.node_id <= MAX_NODE_ID:
+            raise ValueError(f"节点号必须在 0 ~ {MAX_NODE_ID} 之间")
+        self._node_part = self.node_id << SEQUENCE_BITS
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._sequence = 0
+
+    def next_id(self):
+        """生成下一个ID"""
+        now_ms = int(time.time() * 1000) - EPOCH_MS
+        with self._lock:
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._sequence = 0
+            else:
+                # 同一毫秒或时钟回拨：序号递增，用尽时借用下一毫秒
+                self._sequence += 1
+                if self._sequence > MAX_SEQUENCE:
+                    self._last_ms += 1
+                    self._sequence = 0
+            timestamp, sequence = self._last_ms, self._sequence
+        return (timestamp << (NODE_BITS + SEQUENCE_BITS)) | self._node_part | sequence
+
+
+def parse_id(snowflake_id):
+    """拆解ID，返回 (毫秒时间戳, 节点号, 序号)"""
+    sequence = snowflake_id & MAX_SEQUENCE
+    node_id = (snowflake_id >> SEQUENCE_BITS) & MAX_NODE_ID
+    timestamp = (snowflake_id >> (NODE_BITS + SEQUENCE_BITS)) + EPOCH_MS
+    return timestamp, node_id, sequence
+
+
+_generator = None
+_generator_lock = threading.Lock()
+
+
+def get_generator():
+    """当前进程的生成器，首次使用时分配节点号"""
+    global _generator
+    if _generator is None:
+        with _generator_lock:
+            if _generator is None:
+                _generator = SnowflakeGenerator()
+    return _generator
+
+
+def next_id():
+    """用当前进程的生成器生成下一个ID"""
+    return get_generator().next_id()
+
+
+def _reset_after_fork():
+    """预加载后 fork 出的 worker 不能沿用父进程的节点号，首次使用时重新分配"""
+    global _generator, _generator_lock
+    _generator = None
+    _generator_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
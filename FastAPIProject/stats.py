@@ -0,0 +1,295 @@
+"""
+统计汇总
+
+数据概览不再实时扫描 users / orders 表，而是读取增量维护的汇总表：
+- stats_total：全量汇总（单行，id = 1）
+- stats_daily：按天汇总（订单数、销售额、新增用户）
+- stats_hourly：按小时汇总（订单数、支付订单数、销售额），供时间序列分析使用
+- stats_dish_daily：按天、菜品汇总（销量、销售额），供菜品 / 分类分析使用
+
+stats_total 只有一行，stats_daily、stats_hourly 当天 / 当前小时只有一行，若在每个下单 / 注册事务中累加，
+所有写入都会排队等这几行的行锁。因此全部汇总的增量先累加在内存中（stats_buffer，见 writeback.py），
+由后台任务每隔 flush_interval 秒合并成每张表一条多行 upsert 写回：
+- 注册、下单在事务提交后记录增量（日期按应用服务器时间，需与数据库时区一致）
+- 修改订单状态、取消订单在事务中计算增量（读取订单明细，销售额记到订单创建当天 / 小时），提交后加入缓冲
+- 每个 worker 独立累加、独立写回，增量相加，多进程下结果正确；写回失败时放回缓冲区重试
+- 读取概览时补上本进程尚未写回的增量；进程被强制杀死时最多丢失一个周期的增量
+
+数据出现偏差时可执行 `python stats.py rebuild` 从原始表重新计算，
+`python stats.py backfill START END` 只重算指定日期范围内的小时 / 菜品汇总。
+
+销售额口径与原统计一致：状态为已支付/配送中/已完成的订单金额，计入订单创建当天（小时）。
+"""
+import sys
+from collections import Counter
+from datetime import datetime
+
+from database import get_db
+from writeback import WriteBehindBuffer
+
+# 汇总写回配置
+STATS_CONFIG = {
+    'flush_interval': 1.0,   # 写回间隔（秒）
+    'flush_count': 200,      # 累计多少次增量后立即写回
+}
+
+# 计入销售额的订单状态：2已支付 3配送中 4已完成
+PAID_STATUSES = (2, 3, 4)
+
+# 订单中各菜品的数量和金额（订单进入 / 离开已支付状态时更新菜品汇总）
+ORDER_DISH_SALES_SQL = """
+    SELECT oi.dish_id, d.category_id, SUM(oi.quantity) as quantity, SUM(oi.subtotal) as sales
+    FROM order_items oi
+    LEFT JOIN dishes d ON oi.dish_id = d.id
+    WHERE oi.order_id = %s
+    GROUP BY oi.dish_id, d.category_id
+"""
+
+OVERVIEW_SQL = """
+    SELECT t.user_count, t.order_count, t.total_sales,
+           COALESCE(d.order_count, 0) as today_order_count,
+           COALESCE(d.sales, 0) as today_sales
+    FROM stats_total t
+    LEFT JOIN stats_daily d ON d.stat_date = CURDATE()
+    WHERE t.id = 1
+"""
+
+_TOTAL_UPSERT_SQL = """
+    INSERT INTO stats_total (id, user_count, order_count, total_sales)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        user_count = user_count + VALUES(user_count),
+        order_count = order_count + VALUES(order_count),
+        total_sales = total_sales + VALUES(total_sales)
+"""
+
+_DAILY_UPSERT_SQL = """
+    INSERT INTO stats_daily (stat_date, order_count, sales, new_users)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        order_count = order_count + VALUES(order_count),
+        sales = sales + VALUES(sales),
+        new_users = new_users + VALUES(new_users)
+"""
+
+_HOURLY_UPSERT_SQL = """
+    INSERT INTO stats_hourly (bucket_hour, order_count, paid_order_count, sales)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        order_count = order_count + VALUES(order_count),
+        paid_order_count = paid_order_count + VALUES(paid_order_count),
+        sales = sales + VALUES(sales)
+"""
+
+_DISH_DAILY_UPSERT_SQL = """
+    INSERT INTO stats_dish_daily (stat_date, dish_id, category_id, quantity, sales)
+    VALUES (%s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        quantity = quantity + VALUES(quantity),
+        sales = sales + VALUES(sales)
+"""
+
+
+# 增量的键为 (表, 主键, 字段)，写回时按表合并为多行 upsert，行按主键排序加锁避免死锁
+_UPSERTS = {
+    'total': (_TOTAL_UPSERT_SQL, ('user_count', 'order_count', 'total_sales')),
+    'daily': (_DAILY_UPSERT_SQL, ('order_count', 'sales', 'new_users')),
+    'hourly': (_HOURLY_UPSERT_SQL, ('order_count', 'paid_order_count', 'sales')),
+    'dish': (_DISH_DAILY_UPSERT_SQL, ('quantity', 'sales')),   # 键为 (stat_date, dish_id, category_id)
+}
+
+
+def _add(deltas, stat_date, users=0, orders=0, sales=0):
+    """累加全量和按天汇总的增量"""
+    deltas['total', 1, 'user_count'] += users
+    deltas['total', 1, 'order_count'] += orders
+    deltas['total', 1, 'total_sales'] += sales
+    deltas['daily', stat_date, 'order_count'] += orders
+    deltas['daily', stat_date, 'sales'] += sales
+    deltas['daily', stat_date, 'new_users'] += users
+
+
+def new_user_deltas(now=None):
+    """新用户注册"""
+    deltas = Counter()
+    _add(deltas, (now or datetime.now()).date(), users=1)
+    return deltas
+
+
+def _add_hourly(deltas, created_at, orders=0, paid_orders=0, sales=0):
+    """累加小时汇总的增量"""
+    bucket_hour = created_at.replace(minute=0, second=0, microsecond=0)
+    deltas['hourly', bucket_hour, 'order_count'] += orders
+    deltas['hourly', bucket_hour, 'paid_order_count'] += paid_orders
+    deltas['hourly', bucket_hour, 'sales'] += sales
+
+
+def new_order_deltas(now=None):
+    """新订单创建（新订单均为待支付，不计销售额）"""
+    now = now or datetime.now()
+    deltas = Counter()
+    _add(deltas, now.date(), orders=1)
+    _add_hourly(deltas, now, orders=1)
+    return deltas
+
+
+def status_change_deltas(cursor, order, new_status):
+    """订单状态变化，order 为修改前的订单（需包含 id、status、total_price、created_at）
+
+    在修改状态的事务中调用（只读取订单明细），返回的增量在事务提交后加入 stats_buffer。
+    """
+    deltas = Counter()
+    was_paid = order['status'] in PAID_STATUSES
+    is_paid = new_status in PAID_STATUSES
+    if was_paid == is_paid:
+        return deltas
+    sign = 1 if is_paid else -1
+    created_at = order['created_at']
+    _add(deltas, created_at.date(), sales=sign * order['total_price'])
+    _add_hourly(deltas, created_at, paid_orders=sign, sales=sign * order['total_price'])
+
+    # 菜品汇总
+    cursor.execute(ORDER_DISH_SALES_SQL, (order['id'],))
+    for row in cursor.fetchall():
+        key = (created_at.date(), row['dish_id'], row['category_id'])
+        deltas['dish', key, 'quantity'] += sign * row['quantity']
+        deltas['dish', key, 'sales'] += sign * row['sales']
+    return deltas
+
+
+def _sort_key(key):
+    # 菜品汇总按主键 (stat_date, dish_id) 排序，category_id 可能为 NULL 不参与比较
+    return key[:2] if isinstance(key, tuple) else key
+
+
+def write_deltas(cursor, deltas):
+    """把增量写回汇总表：每张表一条多行 upsert（executemany 合并），全为 0 的行跳过"""
+    tables = {}
+    for (table, key, field), value in deltas.items():
+        tables.setdefault(table, {}).setdefault(key, {})[field] = value
+    for table, (sql, fields) in _UPSERTS.items():
+        rows = tables.get(table)
+        if not rows:
+            continue
+        params = [
+            (key if isinstance(key, tuple) else (key,)) + tuple(rows[key].get(field, 0) for field in fields)
+            for key in sorted(rows, key=_sort_key)
+            if any(rows[key].values())
+        ]
+        if params:
+            cursor.executemany(sql, params)
+
+
+def get_overview(cursor, pending=None):
+    """读取数据概览汇总，pending 为本进程尚未写回的增量（stats_buffer.pending()）"""
+    cursor.execute(OVERVIEW_SQL)
+    overview = cursor.fetchone() or {
+        "user_count": 0,
+        "order_count": 0,
+        "total_sales": 0,
+        "today_order_count": 0,
+        "today_sales": 0,
+    }
+    if pending:
+        today = datetime.now().date()
+        overview["user_count"] += pending['total', 1, 'user_count']
+        overview["order_count"] += pending['total', 1, 'order_count']
+        overview["total_sales"] += pending['total', 1, 'total_sales']
+        overview["today_order_count"] += pending['daily', today, 'order_count']
+        overview["today_sales"] += pending['daily', today, 'sales']
+    return overview
+
+
+def rebuild():
+    """从原始表重新计算全部汇总"""
+    paid = ", ".join(str(s) for s in PAID_STATUSES)
+    with get_db() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("DELETE FROM stats_daily")
+            cursor.execute("DELETE FROM stats_total")
+            cursor.execute(f"""
+                INSERT INTO stats_daily (stat_date, order_count, sales, new_users)
+                SELECT stat_date, SUM(order_count), SUM(sales), SUM(new_users)
+                FROM (
+                    SELECT DATE(created_at) as stat_date, COUNT(*) as order_count,
+                           COALESCE(SUM(CASE WHEN status IN ({paid}) THEN total_price END), 0) as sales,
+                           0 as new_users
+                    FROM orders
+                    GROUP BY DATE(created_at)
+                    UNION ALL
+                    SELECT DATE(created_at), 0, 0, COUNT(*)
+                    FROM users
+                    GROUP BY DATE(created_at)
+                ) t
+                GROUP BY stat_date
+            """)
+            cursor.execute("""
+                INSERT INTO stats_total (id, user_count, order_count, total_sales)
+                SELECT 1, (SELECT COUNT(*) FROM users),
+                       COALESCE(SUM(order_count), 0), COALESCE(SUM(sales), 0)
+                FROM stats_daily
+            """)
+            _backfill_buckets(cursor)
+            cursor.execute("SELECT COUNT(*) as days FROM stats_daily")
+            return cursor.fetchone()['days']
+
+
+def _backfill_buckets(cursor, start=None, end=None):
+    """重算 [start, end] 日期范围内的小时 / 菜品汇总，未指定范围时重算全部"""
+    paid = ", ".join(str(s) for s in PAID_STATUSES)
+    if start is None:
+        cursor.execute("DELETE FROM stats_hourly")
+        cursor.execute("DELETE FROM stats_dish_daily")
+        order_range, params = "", ()
+    else:
+        cursor.execute(
+            "DELETE FROM stats_hourly WHERE bucket_hour >= %s AND bucket_hour < %s + INTERVAL 1 DAY",
+            (start, end)
+        )
+        cursor.execute("DELETE FROM stats_dish_daily WHERE stat_date BETWEEN %s AND %s", (start, end))
+        order_range = "AND o.created_at >= %s AND o.created_at < %s + INTERVAL 1 DAY"
+        params = (start, end)
+
+    cursor.execute(f"""
+        INSERT INTO stats_hourly (bucket_hour, order_count, paid_order_count, sales)
+        SELECT DATE_FORMAT(o.created_at, '%%Y-%%m-%%d %%H:00:00') as bucket_hour,
+               COUNT(*),
+               SUM(o.status IN ({paid})),
+               COALESCE(SUM(CASE WHEN o.status IN ({paid}) THEN o.total_price END), 0)
+        FROM orders o
+        WHERE 1 = 1 {order_range}
+        GROUP BY bucket_hour
+    """, params)
+    cursor.execute(f"""
+        INSERT INTO stats_dish_daily (stat_date, dish_id, category_id, quantity, sales)
+        SELECT DATE(o.created_at), oi.dish_id, MAX(d.category_id),
+               SUM(oi.quantity), SUM(oi.subtotal)
+        FROM orders o
+        JOIN order_items oi ON oi.order_id = o.id
+        LEFT JOIN dishes d ON oi.dish_id = d.id
+        WHERE o.status IN ({paid}) {order_range}
+        GROUP BY DATE(o.created_at), oi.dish_id
+    """, params)
+
+
+def backfill(start, end):
+    """重算指定日期范围内的小时 / 菜品汇总"""
+    with get_db() as conn:
+        with conn.cursor() as cursor:
+            _backfill_buckets(cursor, start, end)
+
+
+stats_buffer = WriteBehindBuffer(write_deltas, **STATS_CONFIG)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args == ["rebuild"]:
+        days = rebuild()
+        print(f"统计汇总已重建，共 {days} 天")
+    elif len(args) == 3 and args[0] == "backfill":
+        backfill(args[1], args[2])
+        print(f"已重算 {args[1]} 至 {args[2]} 的小时 / 菜品汇总")
+    else:
+        print("用法: python stats.py rebuild | python stats.py backfill START END")
+        sys.exit(1)
@@ -0,0 +1,112 @@
+"""
+增量写回缓冲
+
+业务写入时不直接更新热点行，而是把增量累加在内存中，由后台任务每隔 flush_interval 秒
+（或累计 flush_count 次写入后立即）调用 write(cursor, deltas) 在一个事务中批量写回。
+菜品销量（sales.py）和统计汇总（stats.py）共用。
+
+- 增量为 Counter，每个 worker 独立累加、独立写回，增量相加，多进程下结果正确
+- 写回失败时增量放回缓冲区，下个周期重试
+- 正常关闭时写回剩余增量；进程被强制杀死时最多丢失一个周期的增量
+"""
+import asyncio
+import threading
+from collections import Counter
+
+from database import execute_transaction, run_in_db
+
+
+class WriteBehindBuffer:
+    """增量写回缓冲（线程安全）"""
+
+    def __init__(self, write, flush_interval=1.0, flush_count=100):
+        self.write = write
+        self.flush_interval = flush_interval
+        self.flush_count = flush_count
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = Counter()    # 尚未写回的增量
+        self._inflight = Counter()   # 正在写回的增量
+        self._count = 0
+        self._wakeup = None
+        self._task = None
+        self.flushes = 0
+        self.flush_errors = 0
+
+    def add(self, deltas):
+        """累加一次业务写入产生的增量（事务提交后调用）"""
+        if not deltas:
+            return
+        with self._lock:
+            self._pending.update(deltas)
+            self._count += 1
+            full = self._count >= self.flush_count
+        if full and self._wakeup is not None:
+            self._wakeup.set()
+
+    def pending(self):
+        """尚未落库的增量（含正在写回的），供读取时补齐"""
+        with self._lock:
+            pending = Counter(self._pending)
+            pending.update(self._inflight)
+            return pending
+
+    def flush(self):
+        """把缓冲的增量写回数据库（同步，在数据库线程中调用），返回写回的增量项数"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                deltas, self._pending = self._pending, Counter()
+                self._count = 0
+                self._inflight = deltas
+            try:
+                execute_transaction(self.write, deltas)
+                self.flushes += 1
+            except Exception:
+                self.flush_errors += 1
+                with self._lock:
+                    self._pending.update(deltas)
+                raise
+            finally:
+                with self._lock:
+                    self._inflight = Counter()
+            return len(deltas)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await run_in_db(self.flush)
+            except Exception:
+                # 增量已放回缓冲区，下个周期重试
+                await asyncio.sleep(self.flush_interval)
+
+    def start(self):
+        """在事件循环中启动后台写回任务"""
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """停止后台任务并写回剩余增量"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await run_in_db(self.flush)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pending_keys": len(self._pending),
+                "pending_writes": self._count,
+                "flushes": self.flushes,
+                "flush_errors": self.flush_errors,
+            }
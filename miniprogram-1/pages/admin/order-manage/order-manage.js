@@ -1,5 +1,6 @@
 // pages/admin/order-manage/order-manage.js
 const { orderApi } = require('../../../utils/request.js')
+const { subscribeOrderEvents } = require('../../../utils/events.js')
 
 Page({
   data: {
@@ -20,6 +21,56 @@ Page({
     this.loadOrders()
   },
 
+  onShow() {
+    if (!this.unsubscribe) {
+      this.unsubscribe = subscribeOrderEvents(event => this.handleOrderEvent(event))
+    }
+  },
+
+  onHide() {
+    this.stopOrderEvents()
+  },
+
+  onUnload() {
+    this.stopOrderEvents()
+  },
+
+  stopOrderEvents() {
+    if (this.unsubscribe) {
+      this.unsubscribe()
+      this.unsubscribe = null
+    }
+  },
+
+  refreshOrders() {
+    this.loadOrders()
+  },
+
+  // 订单事件：更新列表中对应订单的状态，新订单插到列表开头
+  handleOrderEvent(event) {
+    if (event.type === 'resync') {
+      this.refreshOrders()
+      return
+    }
+    const status = this.data.currentStatus
+    const orders = this.data.orders
+    const index = orders.findIndex(o => o.id === event.order_id)
+
+    if (event.type === 'order_created') {
+      if (index === -1 && (status === 0 || status === event.status)) {
+        const order = Object.assign({}, event, { id: event.order_id })
+        this.setData({ orders: [order].concat(orders) })
+      }
+    } else if (event.type === 'order_status' && index !== -1) {
+      if (status === 0 || status === event.status) {
+        this.setData({ [`orders[${index}].status`]: event.status })
+      } else {
+        orders.splice(index, 1)
+        this.setData({ orders })
+      }
+    }
+  },
+
   // 加载订单
   loadOrders() {
     this.setData({ loading: true })
@@ -113,7 +164,6 @@ Page({
           title: `已标记为${statusText}`,
           icon: 'success'
         })
-        this.loadOrders()
       })
       .catch(err => {
         console.error('更新失败', err)
@@ -1,5 +1,5 @@
 // pages/index/index.js
-const { categoryApi, dishApi, getToken } = require('../../utils/request.js')
+const { menuApi, getToken } = require('../../utils/request.js')
 const app = getApp()
 
 Page({
@@ -15,7 +15,7 @@ Page({
 
   onLoad() {
     this.checkLogin()
-    this.loadCategories()
+    this.loadMenu()
     this.loadCart()
   },
 
@@ -33,50 +33,45 @@ Page({
     }
   },
 
-  // 加载分类
-  loadCategories() {
+  // 加载菜单（一次请求返回全部分类和菜品）
+  loadMenu() {
     this.setData({ loading: true })
     
-    categoryApi.getList(1)
+    menuApi.get()
       .then(res => {
-        const categories = res.data || []
+        // 菜品按分类保存，切换分类时不再请求
+        this.menu = {}
+        const categories = (res.data.categories || []).map(category => {
+          this.menu[category.id] = category.dishes || []
+          return { id: category.id, name: category.name }
+        })
         this.setData({ categories })
         
         if (categories.length > 0) {
-          this.loadDishes(categories[0].id)
+          const current = this.menu[this.data.currentCategory] ? this.data.currentCategory : categories[0].id
+          this.showDishes(current)
         }
       })
       .catch(err => {
-        console.error('加载分类失败', err)
+        console.error('加载菜单失败', err)
       })
       .finally(() => {
         this.setData({ loading: false })
       })
   },
 
-  // 加载菜品
-  loadDishes(categoryId) {
-    this.setData({ loading: true })
-    
-    dishApi.getList({ category_id: categoryId, status: 1 })
-      .then(res => {
-        this.setData({ 
-          dishes: res.data.list || [],
-          currentCategory: categoryId
-        })
-      })
-      .catch(err => {
-        console.error('加载菜品失败', err)
-      })
-      .finally(() => {
-        this.setData({ loading: false })
-      })
+  // 显示分类下的菜品
+  showDishes(categoryId) {
+    this.setData({
+      dishes: (this.menu && this.menu[categoryId]) || [],
+      currentCategory: categoryId
+    })
   },
 
   // 切换分类
   handleCategoryChange(e) {
     const categoryId = e.currentTarget.dataset.id
-    this.loadDishes(categoryId)
+    this.showDishes(categoryId)
   },
 
   // 加载购物车
@@ -1,5 +1,6 @@
 // pages/order-detail/order-detail.js
 const { orderApi } = require('../../utils/request.js')
+const { subscribeOrderEvents } = require('../../utils/events.js')
 
 Page({
   data: {
@@ -22,6 +23,36 @@ Page({
     }
   },
 
+  onShow() {
+    if (!this.unsubscribe) {
+      this.unsubscribe = subscribeOrderEvents(event => this.handleOrderEvent(event))
+    }
+  },
+
+  onHide() {
+    this.stopOrderEvents()
+  },
+
+  onUnload() {
+    this.stopOrderEvents()
+  },
+
+  stopOrderEvents() {
+    if (this.unsubscribe) {
+      this.unsubscribe()
+      this.unsubscribe = null
+    }
+  },
+
+  // 订单事件：当前订单状态变化时直接更新
+  handleOrderEvent(event) {
+    if (event.type === 'resync') {
+      this.loadOrderDetail()
+    } else if (event.type === 'order_status' && String(event.order_id) === String(this.data.orderId) && this.data.order) {
+      this.setData({ 'order.status': event.status })
+    }
+  },
+
   // 加载订单详情
   loadOrderDetail() {
     this.setData({ loading: true })
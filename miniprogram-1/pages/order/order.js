@@ -1,5 +1,6 @@
 // pages/order/order.js
 const { orderApi, getToken } = require('../../utils/request.js')
+const { subscribeOrderEvents } = require('../../utils/events.js')
 
 Page({
   data: {
@@ -24,7 +25,30 @@ Page({
   },
 
   onShow() {
-    // 刷新订单列表
+    // 刷新订单列表，之后通过推送更新
+    this.refreshOrders()
+    if (!this.unsubscribe) {
+      this.unsubscribe = subscribeOrderEvents(event => this.handleOrderEvent(event))
+    }
+  },
+
+  onHide() {
+    this.stopOrderEvents()
+  },
+
+  onUnload() {
+    this.stopOrderEvents()
+  },
+
+  stopOrderEvents() {
+    if (this.unsubscribe) {
+      this.unsubscribe()
+      this.unsubscribe = null
+    }
+  },
+
+  // 重新加载第一页
+  refreshOrders() {
     this.setData({ 
       orders: [],
       page: 1,
@@ -33,6 +57,31 @@ Page({
     this.loadOrders()
   },
 
+  // 订单事件：更新列表中对应订单的状态，新订单插到列表开头
+  handleOrderEvent(event) {
+    if (event.type === 'resync') {
+      this.refreshOrders()
+      return
+    }
+    const status = this.data.currentStatus
+    const orders = this.data.orders
+    const index = orders.findIndex(o => o.id === event.order_id)
+
+    if (event.type === 'order_created') {
+      if (index === -1 && (status === 0 || status === event.status)) {
+        const order = Object.assign({}, event, { id: event.order_id })
+        this.setData({ orders: [order].concat(orders) })
+      }
+    } else if (event.type === 'order_status' && index !== -1) {
+      if (status === 0 || status === event.status) {
+        this.setData({ [`orders[${index}].status`]: event.status })
+      } else {
+        orders.splice(index, 1)
+        this.setData({ orders })
+      }
+    }
+  },
+
   // 检查登录
   checkLogin() {
     const token = getToken()
@@ -113,13 +162,8 @@ Page({
                 icon: 'success'
               })
 
-              // 刷新列表
-              this.setData({ 
-                orders: [],
-                page: 1,
-                hasMore: true
-              })
-              this.loadOrders()
+              // 本地直接更新状态：多 worker 使用进程内推送时可能收不到事件，推送到达时重复更新无影响
+              this.handleOrderEvent({ type: 'order_status', order_id: orderId, status: 5 })
             })
             .catch(err => {
               console.error('取消订单失败', err)
@@ -0,0 +1,91 @@
+// 订单事件推送（WebSocket），页面订阅后收到订单变化，断线自动重连
+const { BASE_URL, getToken } = require('./request.js')
+
+const WS_URL = BASE_URL.replace(/^http/, 'ws') + '/events/orders/ws'
+
+// 重连间隔（毫秒），每次失败翻倍，最长30秒
+const RETRY_MIN = 1000
+const RETRY_MAX = 30000
+
+let socketTask = null
+let listeners = []
+let retryDelay = RETRY_MIN
+let retryTimer = null
+
+function dispatch(event) {
+  listeners.forEach(listener => listener(event))
+}
+
+function connect() {
+  const token = getToken()
+  if (!token || socketTask) return
+
+  const task = wx.connectSocket({
+    url: WS_URL,
+    header: { token }
+  })
+  socketTask = task
+
+  task.onOpen(() => {
+    // 断线期间可能错过事件，重连成功后让页面刷新一次
+    if (retryDelay > RETRY_MIN) {
+      dispatch({ type: 'resync' })
+    }
+    retryDelay = RETRY_MIN
+  })
+
+  task.onMessage(res => {
+    const event = JSON.parse(res.data)
+    if (event.type !== 'ping') {
+      dispatch(event)
+    }
+  })
+
+  task.onClose(() => {
+    if (socketTask !== task) return
+    socketTask = null
+    scheduleReconnect()
+  })
+
+  task.onError(() => {
+    task.close()
+  })
+}
+
+function scheduleReconnect() {
+  if (listeners.length === 0 || retryTimer) return
+  retryTimer = setTimeout(() => {
+    retryTimer = null
+    connect()
+  }, retryDelay)
+  retryDelay = Math.min(retryDelay * 2, RETRY_MAX)
+}
+
+function close() {
+  if (retryTimer) {
+    clearTimeout(retryTimer)
+    retryTimer = null
+  }
+  if (socketTask) {
+    const task = socketTask
+    socketTask = null
+    task.close()
+  }
+  retryDelay = RETRY_MIN
+}
+
+// 订阅订单事件，返回取消订阅函数；没有订阅者时断开连接
+function subscribeOrderEvents(listener) {
+  listeners.push(listener)
+  connect()
+  return () => {
+    listeners = listeners.filter(l => l !== listener)
+    if (listeners.length === 0) {
+      close()
+    }
+  }
+}
+
+module.exports = {
+  subscribeOrderEvents
+}
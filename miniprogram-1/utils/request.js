@@ -19,6 +19,16 @@ function clearToken() {
   wx.removeStorageSync(TOKEN_KEY)
 }
 
+// 条件请求缓存（公开的 GET 接口按 URL + 参数保存响应和 ETag，内容未变化时服务端返回 304）
+const ETAG_CACHE_PREFIX = 'etag_cache:'
+
+function getEtagCacheKey(url, method, data, needToken) {
+  if (method !== 'GET' || needToken) {
+    return ''
+  }
+  return ETAG_CACHE_PREFIX + url + '?' + JSON.stringify(data)
+}
+
 // 请求封装
 function request(url, method = 'GET', data = {}, needToken = true) {
   return new Promise((resolve, reject) => {
@@ -34,6 +44,13 @@ function request(url, method = 'GET', data = {}, needToken = true) {
       }
     }
     
+    // 带上已缓存响应的ETag
+    const cacheKey = getEtagCacheKey(url, method, data, needToken)
+    const cached = cacheKey ? wx.getStorageSync(cacheKey) : ''
+    if (cached && cached.etag) {
+      header['If-None-Match'] = cached.etag
+    }
+    
     // 调试日志
     console.log('=== API Request ===')
     console.log('URL:', BASE_URL + url)
@@ -50,8 +67,14 @@ function request(url, method = 'GET', data = {}, needToken = true) {
         console.log('=== API Response ===')
         console.log('Status:', res.statusCode)
         console.log('Data:', res.data)
-        if (res.statusCode === 200) {
+        if (res.statusCode === 304 && cached) {
+          resolve(cached.data)
+        } else if (res.statusCode === 200) {
           if (res.data.code === 200) {
+            const etag = res.header && (res.header.ETag || res.header.Etag || res.header.etag)
+            if (cacheKey && etag) {
+              wx.setStorageSync(cacheKey, { etag, data: res.data })
+            }
             resolve(res.data)
           } else {
             wx.showToast({
@@ -117,6 +140,14 @@ const categoryApi = {
   }
 }
 
+// 菜单API
+const menuApi = {
+  // 获取完整菜单（分类嵌套菜品，内容未变化时服务端返回304，直接使用本地缓存）
+  get() {
+    return request('/menu', 'GET', {}, false)
+  }
+}
+
 // 菜品相关API
 const dishApi = {
   // 获取菜品列表
@@ -170,12 +201,14 @@ const orderApi = {
 }
 
 module.exports = {
+  BASE_URL,
   request,
   getToken,
   setToken,
   clearToken,
   userApi,
   categoryApi,
+  menuApi,
   dishApi,
   orderApi
 }